@@ -0,0 +1,175 @@
+"""Counts the database commands that the fixture spider sends before its first request.
+
+Seeds a scratch database with synthetic leagues, clubs and fixtures, then runs the completeness check and the
+current season reset with both the previous per-club implementation and the current one.
+
+Usage: python -m benchmarks.db_queries [--clubs 20 100 200] [--db football_benchmark]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pymongo import monitoring
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../scraper")))
+
+from scraper.spiders.spider_utils.classes import BaseClass, Fixtures
+
+# commands sent by the driver itself that aren't queries of the spiders
+IGNORED_COMMANDS = {"hello", "ismaster", "isMaster", "ping", "endSessions"}
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts the commands sent to the server"""
+
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        if event.command_name not in IGNORED_COMMANDS:
+            self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def legacy_have_all_fixtures(fixtures: Fixtures) -> bool:
+    """Previous implementation of Fixtures.have_all_fixtures, with two lookups per club"""
+    db = fixtures.get_db()
+    played_docs = [doc for doc in db.played_fixtures.find(projection={"_id": False})]
+    played_docs_count = len(played_docs)
+    all_clubs_count = len([doc for doc in db.all_clubs.find(projection={"_id": False})])
+    all_upcoming_fixtures_count = len(
+        [doc for doc in db.upcoming_fixtures.find(projection={"_id": False})]
+    )
+    clubs_out_of_current_season_count: int = 0
+    for doc in played_docs:
+        all_seasons: set = set()
+        for _, v in fixtures.seasons.items():
+            all_seasons.update(v)
+        queries = [{f"clubs.{season}": doc["club"]} for season in all_seasons]
+        doc_league = db.all_leagues.find_one(filter={"$or": queries})["name"]
+        doc_country_current_season = db.competitions.find_one(
+            filter={"competitions.First Tier.name": doc_league}
+        )["current_season"]
+        if doc_country_current_season not in doc["seasons"].keys():
+            clubs_out_of_current_season_count += 1
+    return (played_docs_count == all_clubs_count) and (
+        played_docs_count - clubs_out_of_current_season_count
+        == all_upcoming_fixtures_count
+    )
+
+
+def legacy_reset_current_season_fixtures(fixtures: Fixtures):
+    """Previous implementation of Fixtures.reset_current_season_fixtures, with two lookups and an update per club"""
+    db = fixtures.get_db()
+    for col in [db.played_fixtures, db.upcoming_fixtures]:
+        for doc in [doc for doc in col.find(projection={"_id": False})]:
+            all_seasons: set = set()
+            for _, v in fixtures.seasons.items():
+                all_seasons.update(v)
+            queries = [{f"clubs.{season}": doc["club"]} for season in all_seasons]
+            doc_league = db.all_leagues.find_one(filter={"$or": queries})["name"]
+            doc_current_season = db.competitions.find_one(
+                filter={"competitions.First Tier.name": doc_league}
+            )["current_season"]
+            if doc_current_season in doc["seasons"].keys():
+                col.update_one(
+                    filter={"club": doc["club"]},
+                    update={"$unset": {f"seasons.{doc_current_season}": ""}},
+                )
+
+
+def seed(fixtures: Fixtures, clubs_per_league: int):
+    """Fills the scratch database with leagues, clubs and fixtures of every concerned season"""
+    db = fixtures.get_db()
+    for col in db.list_collection_names():
+        db.drop_collection(col)
+    fixture = {"date": "2023-08-12", "opponent": "Opponent"}
+    for country in fixtures.countries:
+        seasons = fixtures.seasons[country]
+        current_season = seasons[-1]
+        league = f"{country} League"
+        clubs = [f"{country} Club {i}" for i in range(clubs_per_league)]
+        db.competitions.insert_one(
+            {
+                "country": country,
+                "competitions": {"First Tier": {"name": league}},
+                "current_season": current_season,
+            }
+        )
+        db.all_leagues.insert_one(
+            {"name": league, "clubs": {season: clubs for season in seasons}}
+        )
+        db.all_clubs.insert_many([{"name": club} for club in clubs])
+        db.played_fixtures.insert_many(
+            [
+                {
+                    "club": club,
+                    "seasons": {season: {league: [fixture]} for season in seasons},
+                }
+                for club in clubs
+            ]
+        )
+        db.upcoming_fixtures.insert_many(
+            [
+                {"club": club, "seasons": {current_season: {league: [fixture]}}}
+                for club in clubs
+            ]
+        )
+
+
+def measure(counter: CommandCounter, func, *args) -> tuple:
+    """Runs func and returns the number of commands it sent and the seconds it took"""
+    start_count = counter.count
+    start = time.perf_counter()
+    func(*args)
+    return counter.count - start_count, time.perf_counter() - start
+
+
+def run_benchmark():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clubs", type=int, nargs="+", default=[4, 20, 40])
+    parser.add_argument("--db", default="football_benchmark")
+    args = parser.parse_args()
+
+    counter = CommandCounter()
+    BaseClass.close_client()
+    monitoring.register(counter)
+    fixtures = Fixtures()
+    fixtures.db_name = args.db
+    fixtures.set_seasons_per_league()
+
+    print(
+        f"{'clubs':>6} {'implementation':<15} {'check cmds':>10} {'reset cmds':>10} {'secs':>8}"
+    )
+    for clubs_per_league in args.clubs:
+        total_clubs = clubs_per_league * len(fixtures.countries)
+        for name, check, reset in [
+            (
+                "per-club",
+                legacy_have_all_fixtures,
+                legacy_reset_current_season_fixtures,
+            ),
+            (
+                "aggregation",
+                Fixtures.have_all_fixtures,
+                Fixtures.reset_current_season_fixtures,
+            ),
+        ]:
+            seed(fixtures, clubs_per_league)
+            check_cmds, check_secs = measure(counter, check, fixtures)
+            reset_cmds, reset_secs = measure(counter, reset, fixtures)
+            print(
+                f"{total_clubs:>6} {name:<15} {check_cmds:>10} {reset_cmds:>10} {check_secs + reset_secs:>8.3f}"
+            )
+    fixtures.get_client().drop_database(args.db)
+    BaseClass.close_client()
+
+
+if __name__ == "__main__":
+    run_benchmark()
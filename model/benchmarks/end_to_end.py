@@ -0,0 +1,89 @@
+"""Crawls the local transfermarkt stand-in end to end and reports the pages and the database writes per second.
+
+Starts benchmarks/standin_server.py on a free port and runs scripts/spider_script.py against it, pointed there
+with TRANSFERMARKT_BASE_URL and writing into the scratch database --db, which is dropped first unless --keep-db
+is given. The http cache and the page archive are turned off, so every page is fetched from the stand-in. The
+summary of spider_script gives the requests and the write operations per second of every stage, the counts of
+the stand-in the pages it served and the errors it injected.
+
+The mongo server is the one of MONGODB_CLIENT, or --mongodb. Seasons are limited with --seasons, the crawl
+otherwise covers every season since 2018 of the selected countries.
+
+Usage: python -m benchmarks.end_to_end [--clubs 20] [--latency 0.05] [--error-rate 0.01] [--countries England]
+    [--seasons 2022 2023] [--stages country_code comp_name club_name fixture] [--db football_benchmark]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+
+MODEL_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(MODEL_DIR, "scraper"))
+
+from benchmarks.standin_server import add_server_arguments, get_server
+from scraper.spiders.spider_utils.classes import BaseClass
+
+# settings of the crawl, so the pages come from the stand-in and aren't archived with the real ones
+CRAWL_SETTINGS = ["HTTPCACHE_ENABLED=False", "ARCHIVE_ENABLED=False"]
+
+
+def run_benchmark():
+    parser = argparse.ArgumentParser()
+    add_server_arguments(parser)
+    parser.add_argument(
+        "--stages",
+        nargs="+",
+        default=["country_code", "comp_name", "club_name", "fixture"],
+    )
+    parser.add_argument("--countries", nargs="+", default=["England"])
+    parser.add_argument("--seasons", nargs="+")
+    parser.add_argument("--db", default="football_benchmark")
+    parser.add_argument("--mongodb", help="mongo connection string")
+    parser.add_argument("--keep-db", action="store_true")
+    parser.add_argument(
+        "-s",
+        "--set",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="further scrapy settings of the crawl",
+    )
+    args = parser.parse_args()
+
+    server = get_server(args, 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # read by the spider_script process as well as by the client dropping the database
+    os.environ["TRANSFERMARKT_BASE_URL"] = server.get_base_url()
+    os.environ["MONGODB_DB"] = args.db
+    if args.mongodb is not None:
+        os.environ["MONGODB_CLIENT"] = args.mongodb
+
+    if not args.keep_db:
+        BaseClass().get_client().drop_database(args.db)
+        BaseClass.close_client()
+
+    command = [sys.executable, os.path.join(MODEL_DIR, "scripts", "spider_script.py")]
+    command += args.stages + ["--countries"] + args.countries
+    if args.seasons is not None:
+        command += ["--seasons"] + args.seasons
+    for setting in CRAWL_SETTINGS + args.set:
+        command += ["--set", setting]
+    print(f"Crawling {server.get_base_url()} into {args.db}.")
+    completed = subprocess.run(command, cwd=MODEL_DIR)
+
+    server.shutdown()
+    server.server_close()
+    stats = server.get_stats()
+    print(
+        f"Stand-in: {stats['pages']} pages, {stats['errors']} errors, {stats['bytes'] / 1e6:.1f} MB in "
+        f"{stats['seconds']:.1f}s, {stats['pages_per_second']:.1f} pages/s"
+    )
+    print(json.dumps(stats["routes"], indent=4))
+    sys.exit(completed.returncode)
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,217 @@
+"""Times the parsers of spider_utils/classes.py over the saved pages of benchmarks/corpus.
+
+Every page is parsed --repeat times and the fastest run gives the time per page and per row, a row being a
+country, a competition, a club or a fixture of the parsed result. A separate run under tracemalloc gives the
+peak memory allocated while parsing the page. The rows per second of every page are compared with
+parsers_baseline.json and the run fails when one of them drops by more than --tolerance; the baseline is
+rewritten with --update-baseline, on the machine the comparison runs on.
+
+The corpus pages have the structure of the transfermarkt pages the parsers' xpaths target: the europa overview,
+the competitions of a country, the clubs of a league and club fixture pages with cup, postponed and penalty
+rows. The parsers run in parse only mode, so no database is needed.
+
+Usage: python -m benchmarks.parsers [--repeat 50] [--tolerance 0.5] [--update-baseline]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../scraper")))
+
+from scrapy.http import HtmlResponse
+
+from scraper.spiders.spider_utils import classes
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "corpus")
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "parsers_baseline.json")
+
+# pages of the corpus, the url they were saved from and the parser called with them
+PAGES = [
+    {
+        "file": "europa.html",
+        "url": "https://www.transfermarkt.com/wettbewerbe/europa",
+        "class": "CountryCodes",
+        "method": "parse_country_codes",
+        "args": [],
+    },
+    {
+        "file": "europa.html",
+        "url": "https://www.transfermarkt.com/wettbewerbe/europa",
+        "class": "CompetitionNames",
+        "method": "parse_intl_comp_names",
+        "args": [],
+    },
+    {
+        "file": "country_england.html",
+        "url": "https://www.transfermarkt.com/wettbewerbe/national/wettbewerbe/189",
+        "class": "CompetitionNames",
+        "method": "parse_domestic_comp_names",
+        "args": ["England"],
+    },
+    {
+        "file": "country_germany.html",
+        "url": "https://www.transfermarkt.com/wettbewerbe/national/wettbewerbe/40",
+        "class": "CompetitionNames",
+        "method": "parse_domestic_comp_names",
+        "args": ["Germany"],
+    },
+    {
+        "file": "clubs_premier_league_2023.html",
+        "url": "https://www.transfermarkt.com/premier-league/startseite/wettbewerb/GB1/plus/?saison_id=2023",
+        "class": "ClubNames",
+        "method": "parse_club_names",
+        "args": ["Premier League", "2023"],
+    },
+    {
+        "file": "clubs_bundesliga_2023.html",
+        "url": "https://www.transfermarkt.com/bundesliga/startseite/wettbewerb/L1/plus/?saison_id=2023",
+        "class": "ClubNames",
+        "method": "parse_club_names",
+        "args": ["Bundesliga", "2023"],
+    },
+    {
+        "file": "fixtures_arsenal_2022.html",
+        "url": "https://www.transfermarkt.com/fc-arsenal/spielplandatum/verein/11/plus/0?saison_id=2022",
+        "class": "Fixtures",
+        "method": "parse_all_fixtures_info",
+        "args": ["Arsenal FC", "2022"],
+    },
+    {
+        "file": "fixtures_bayern_2022.html",
+        "url": "https://www.transfermarkt.com/fc-bayern-munchen/spielplandatum/verein/27/plus/0?saison_id=2022",
+        "class": "Fixtures",
+        "method": "parse_all_fixtures_info",
+        "args": ["Bayern Munich", "2022"],
+    },
+    {
+        "file": "fixtures_arsenal_2023_upcoming.html",
+        "url": "https://www.transfermarkt.com/fc-arsenal/spielplandatum/verein/11/plus/0?saison_id=2023",
+        "class": "Fixtures",
+        "method": "parse_all_fixtures_info",
+        "args": ["Arsenal FC", "2023"],
+    },
+]
+
+
+def get_page_name(page: dict) -> str:
+    """Returns the name of a page in the report and the baseline, such as europa.html:parse_country_codes"""
+    return f"{page['file']}:{page['method']}"
+
+
+def count_rows(result) -> int:
+    """Returns the number of countries, competitions, clubs or fixtures in the result of a parser"""
+    if isinstance(result, list):
+        return len(result)
+    for key in ["fixtures", "clubs", "competitions"]:
+        if key in result:
+            return len(result[key])
+    return 1
+
+
+def benchmark_page(parser, page: dict, repeat: int) -> dict:
+    """Times a parser over a page and measures the memory it allocates
+
+    Args:
+        parser (classes.BaseClass): object the parsing method belongs to
+        page (dict): page of PAGES
+        repeat (int): number of timed runs
+
+    Returns:
+        dict: {rows, seconds_per_page, microseconds_per_row, rows_per_second, peak_kib}
+    """
+    with open(os.path.join(CORPUS_DIR, page["file"]), "rb") as f:
+        body = f.read()
+    parse = getattr(parser, page["method"])
+
+    def run():
+        # a new response every run, so the parsed document isn't cached between the runs
+        response = HtmlResponse(url=page["url"], body=body, encoding="utf-8")
+        return parse(response, *page["args"])
+
+    rows = count_rows(run())
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    seconds = min(timings)
+    return {
+        "rows": rows,
+        "seconds_per_page": seconds,
+        "microseconds_per_row": seconds / rows * 1e6,
+        "rows_per_second": rows / seconds,
+        "peak_kib": peak / 1024,
+    }
+
+
+def run_benchmark():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="share of the baseline rows per second a page may lose before the run fails",
+    )
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    # parsing without the database or the log files of the spiders
+    classes.BaseClass.parse_only = True
+    parsers: dict = {}
+    results: dict = {}
+    for page in PAGES:
+        if page["class"] not in parsers:
+            parsers[page["class"]] = getattr(classes, page["class"])()
+        results[get_page_name(page)] = benchmark_page(
+            parsers[page["class"]], page, args.repeat
+        )
+
+    baseline: dict = {}
+    if os.path.exists(BASELINE_FILE) and not args.update_baseline:
+        with open(BASELINE_FILE, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print(
+        f"{'page':<58}{'rows':>6}{'ms/page':>10}{'us/row':>10}{'rows/s':>10}{'peak KiB':>10}{'baseline':>10}"
+    )
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name, {}).get("rows_per_second")
+        print(
+            f"{name:<58}{result['rows']:>6}{result['seconds_per_page'] * 1000:>10.2f}"
+            f"{result['microseconds_per_row']:>10.1f}{result['rows_per_second']:>10.0f}"
+            f"{result['peak_kib']:>10.0f}{'-' if expected is None else f'{expected:.0f}':>10}"
+        )
+        if (
+            expected is not None
+            and result["rows_per_second"] < (1 - args.tolerance) * expected
+        ):
+            regressions.append(name)
+
+    if args.update_baseline:
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    name: {"rows_per_second": round(result["rows_per_second"])}
+                    for name, result in results.items()
+                },
+                f,
+                indent=4,
+            )
+        print(f"Wrote the baseline to {BASELINE_FILE}.")
+    if len(regressions) > 0:
+        sys.exit(
+            f"Throughput dropped more than {args.tolerance:.0%} below the baseline for {regressions}."
+        )
+
+
+if __name__ == "__main__":
+    run_benchmark()
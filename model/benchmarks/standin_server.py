@@ -0,0 +1,682 @@
+"""Local stand-in for transfermarkt, serving synthetic pages on the url scheme the spiders crawl.
+
+The pages have the structure the parsers' xpaths target: the europa overview, the competitions of the five
+countries, the clubs of their leagues, the fixture pages of the clubs and the schedules of the leagues. Every
+league has --clubs clubs playing a double round robin and a few cup rounds in every season, the current season
+being --current-season. The pages are generated from the url, so the same url always gives the same page and
+the fixture page of a club agrees with the schedule of its league and with the pages of its opponents.
+
+Every page is answered after --latency seconds (+-50%) and --error-rate of them with a 503 and a Retry-After
+header. The pages served, the errors and the bytes sent are kept by route at /__stats and printed on shutdown.
+
+The spiders are pointed at the stand-in with the TRANSFERMARKT_BASE_URL environment variable, see
+benchmarks/end_to_end.py.
+
+Usage: python -m benchmarks.standin_server [--port 8800] [--clubs 20] [--latency 0.05] [--error-rate 0.01]
+"""
+
+import argparse
+import datetime
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+SEL = ' selected="selected"'
+
+# countries of the europa overview, the five crawled ones first, {country: country_code}
+COUNTRIES = {
+    "England": "189",
+    "Spain": "157",
+    "Italy": "75",
+    "Germany": "40",
+    "France": "50",
+    "Portugal": "136",
+    "Netherlands": "122",
+    "Belgium": "19",
+}
+
+# competitions of the crawled countries, {country: {tier: (name, url slug, kind, code)}}
+COMPETITIONS = {
+    "England": {
+        "First Tier": ("Premier League", "premier-league", "wettbewerb", "GB1"),
+        "Domestic Cup": ("FA Cup", "fa-cup", "pokalwettbewerb", "FAC"),
+        "Domestic Super Cup": (
+            "Community Shield",
+            "community-shield",
+            "pokalwettbewerb",
+            "GBCS",
+        ),
+        "League Cup": ("EFL Cup", "efl-cup", "pokalwettbewerb", "CGB"),
+    },
+    "Spain": {
+        "First Tier": ("LaLiga", "laliga", "wettbewerb", "ES1"),
+        "Domestic Cup": ("Copa del Rey", "copa-del-rey", "pokalwettbewerb", "CDR"),
+        "Domestic Super Cup": ("Supercopa", "supercopa", "pokalwettbewerb", "SUC"),
+        "League Cup": ("Copa de la Liga", "copa-de-la-liga", "pokalwettbewerb", "CDL"),
+    },
+    "Italy": {
+        "First Tier": ("Serie A", "serie-a", "wettbewerb", "IT1"),
+        "Domestic Cup": ("Italy Cup", "italy-cup", "pokalwettbewerb", "CIT"),
+        "Domestic Super Cup": (
+            "Supercoppa Italiana",
+            "supercoppa-italiana",
+            "pokalwettbewerb",
+            "SCI",
+        ),
+        "League Cup": ("Coppa di Lega", "coppa-di-lega", "pokalwettbewerb", "CLI"),
+    },
+    "Germany": {
+        "First Tier": ("Bundesliga", "bundesliga", "wettbewerb", "L1"),
+        "Domestic Cup": ("DFB-Pokal", "dfb-pokal", "pokalwettbewerb", "DFB"),
+        "Domestic Super Cup": ("Supercup", "supercup", "pokalwettbewerb", "DFL"),
+        "League Cup": ("Liga Cup", "liga-cup", "pokalwettbewerb", "DLP"),
+    },
+    "France": {
+        "First Tier": ("Ligue 1", "ligue-1", "wettbewerb", "FR1"),
+        "Domestic Cup": (
+            "Coupe de France",
+            "coupe-de-france",
+            "pokalwettbewerb",
+            "FRC",
+        ),
+        "Domestic Super Cup": (
+            "Trophée des Champions",
+            "trophee-des-champions",
+            "pokalwettbewerb",
+            "FRSC",
+        ),
+        "League Cup": (
+            "Coupe de la Ligue",
+            "coupe-de-la-ligue",
+            "pokalwettbewerb",
+            "FRLP",
+        ),
+    },
+}
+
+# european cups of the europa overview, {name: code}
+INTL_COMPS = {
+    "UEFA Champions League": "CL",
+    "UEFA Champions League Qualifying": "CLQ",
+    "UEFA Europa League": "EL",
+    "Europa League Qualifying": "ELQ",
+    "UEFA Europa Conference League": "UCOL",
+    "UEFA Europa Conference League Qualifiers": "ECLQ",
+    "UEFA Super Cup": "USC",
+}
+
+# rounds of the domestic cup every club plays, weeks after the start of its season
+CUP_ROUNDS = [6, 14, 22]
+
+KICKOFFS = ["12:30 PM", "3:00 PM", "5:30 PM", "8:00 PM", "8:45 PM"]
+
+ROUTES = {
+    "europa": re.compile(r"^/wettbewerbe/europa/?$"),
+    "country": re.compile(r"^/wettbewerbe/national/wettbewerbe/(?P<code>\d+)/?$"),
+    "clubs": re.compile(r"^/[^/]+/startseite/wettbewerb/(?P<code>[^/]+)(/plus)?/?$"),
+    "fixtures": re.compile(r"^/[^/]+/spielplandatum/verein/(?P<code>\d+)(/.*)?$"),
+    "schedule": re.compile(
+        r"^/[^/]+/gesamtspielplan/wettbewerb/(?P<code>[^/]+)/saison_id/(?P<season>\d+)/?$"
+    ),
+}
+
+
+def get_current_season() -> int:
+    """Returns the start year of the season being played, seasons start in July"""
+    today = datetime.date.today()
+    return today.year if today.month >= 7 else today.year - 1
+
+
+def get_page(title: str, body: str) -> str:
+    """Wraps the content of a page into the header, navigation and footer every page has"""
+    nav = "".join(
+        f'<li><a href="/nav/{i}">Menu {i}</a><ul>'
+        + "".join(f'<li><a href="/nav/{i}/{j}">Item {j}</a></li>' for j in range(8))
+        + "</ul></li>"
+        for i in range(12)
+    )
+    footer = "".join(
+        f'<p class="footer-text">Footer paragraph {i} with some text about the site.</p>'
+        for i in range(20)
+    )
+    return (
+        f'<!DOCTYPE html>\n<html lang="en">\n<head><meta charset="utf-8"><title>{title} | Transfermarkt</title>'
+        f"</head>\n<body>\n<header><nav><ul>{nav}</ul></nav></header>\n<main>\n{body}\n</main>\n"
+        f"<footer>{footer}</footer>\n</body>\n</html>\n"
+    )
+
+
+def format_date(date: datetime.date) -> str:
+    """Formats a date like the fixture tables, such as Sat. 12.08.23"""
+    return f"{date.strftime('%a')}. {date.strftime('%d.%m.%y')}"
+
+
+class World:
+    """Leagues, clubs and results the pages of the stand-in are generated from.
+
+    Every crawled country has a league of n clubs, the same in every season. The league of a season is a double
+    round robin with a matchday a week from the second Saturday of August, and every club also plays CUP_ROUNDS
+    against clubs of its league. Scores and ranks are drawn from generators seeded with the match they belong
+    to, so every page shows the same result for a match.
+    """
+
+    def __init__(self, clubs: int, current_season: int):
+        self.current_season = current_season
+        # {league_code: {country, name, slug, clubs: [club]}}
+        self.leagues: dict = {}
+        # {club_code: {name, slug, code, league}}
+        self.clubs: dict = {}
+        for i, (country, comps) in enumerate(COMPETITIONS.items()):
+            name, slug, _, code = comps["First Tier"]
+            league = {"country": country, "name": name, "slug": slug, "clubs": []}
+            for j in range(clubs):
+                club = {
+                    "name": f"{country} Club {j + 1:02d}",
+                    "slug": f"{country.lower()}-club-{j + 1:02d}",
+                    "code": str((i + 1) * 1000 + j + 1),
+                    "league": code,
+                }
+                league["clubs"].append(club)
+                self.clubs[club["code"]] = club
+            self.leagues[code] = league
+
+    def get_rng(self, *key) -> random.Random:
+        return random.Random("/".join([str(part) for part in key]))
+
+    def get_season_start(self, season: int) -> datetime.date:
+        """Returns the second Saturday of August of a season, the date of its first matchday"""
+        first = datetime.date(season, 8, 1)
+        return first + datetime.timedelta(days=(5 - first.weekday()) % 7 + 7)
+
+    def get_matchdays(self, league_code: str, season: int) -> list:
+        """Returns the matches of a league season with the circle method, the second half swapping the venues
+
+        Returns:
+            list: [{date, kickoff, matches: [(home club, away club)]}]
+        """
+        clubs = list(self.leagues[league_code]["clubs"])
+        if len(clubs) % 2 == 1:
+            clubs.append(None)
+        n = len(clubs)
+        rounds = []
+        for r in range(n - 1):
+            pairs = [
+                (clubs[i], clubs[n - 1 - i])
+                if r % 2 == 0
+                else (clubs[n - 1 - i], clubs[i])
+                for i in range(n // 2)
+            ]
+            rounds.append([pair for pair in pairs if None not in pair])
+            clubs = [clubs[0], clubs[-1]] + clubs[1:-1]
+        rounds += [[(away, home) for home, away in matches] for matches in rounds]
+        start = self.get_season_start(season)
+        return [
+            {
+                "date": start + datetime.timedelta(weeks=k),
+                "kickoff": self.get_rng(league_code, season, k).choice(KICKOFFS),
+                "matches": matches,
+            }
+            for k, matches in enumerate(rounds)
+        ]
+
+    def get_cup_matches(self, club: dict, season: int) -> list:
+        """Returns the domestic cup matches of a club, drawn against clubs of its league
+
+        Returns:
+            list: [(date, home club, away club)]
+        """
+        league_clubs = self.leagues[club["league"]]["clubs"]
+        start = self.get_season_start(season)
+        matches = []
+        for week in CUP_ROUNDS:
+            # the clubs are paired by their position in the league, so both clubs of a tie get the same match
+            position = league_clubs.index(club)
+            shift = week % max(1, len(league_clubs) - 1) + 1
+            if (position // shift) % 2 == 0:
+                opponent_position = position + shift
+            else:
+                opponent_position = position - shift
+            if not 0 <= opponent_position < len(league_clubs):
+                continue
+            opponent = league_clubs[opponent_position]
+            home, away = (
+                (club, opponent) if position < opponent_position else (opponent, club)
+            )
+            matches.append((start + datetime.timedelta(weeks=week, days=3), home, away))
+        return matches
+
+    def get_score(self, home: dict, away: dict, date: datetime.date) -> tuple:
+        """Returns the goals of a match and whether the home club won it on penalties, None if it wasn't played
+
+        Returns:
+            tuple: (home goals, away goals, home won on pens)
+        """
+        if date >= datetime.date.today():
+            return None
+        rng = self.get_rng(home["code"], away["code"], date.isoformat())
+        return rng.randint(0, 4), rng.randint(0, 4), rng.random() < 0.5
+
+    def get_rank(self, club: dict, season: int, week: int) -> int:
+        n = len(self.leagues[club["league"]]["clubs"])
+        return self.get_rng(club["code"], season, week).randint(1, n)
+
+    def get_club_link(self, club: dict, season: int) -> str:
+        return f"/{club['slug']}/spielplan/verein/{club['code']}/saison_id/{season}"
+
+    def render_europa(self) -> str:
+        rows = "".join(
+            f'<tr class="{"odd" if i % 2 else "even"}"><td class="zentriert">{i + 1}</td><td class="zentriert">'
+            f'<img src="https://tmssl.akamaized.net/images/flagge/tiny/{code}.png?lm=1520611569" title="{name}" '
+            f'alt="{name}" class="flaggenrahmen"></td><td class="hauptlink"><a href="/wettbewerbe/national/'
+            f'wettbewerbe/{code}">{name}</a></td><td class="rechts">{(i + 1) * 0.73:.2f} bn €</td></tr>'
+            for i, (name, code) in enumerate(COUNTRIES.items())
+        )
+        cups = "".join(
+            f'<a href="/{name.lower().replace(" ", "-")}/startseite/pokalwettbewerb/{code}" title="{name}">'
+            f'<img src="/logo/{code}.png" alt="{name}"></a>'
+            for name, code in INTL_COMPS.items()
+        )
+        return get_page(
+            "Europe",
+            f'<div class="row"><div class="large-8 columns"><div class="box"><h2>Countries</h2><table class="items">'
+            f"<thead><tr><th>#</th><th>Country</th><th>Name</th><th>Value</th></tr></thead><tbody>{rows}</tbody>"
+            f'</table></div></div><div class="large-4 columns"><div class="box"><div class="table-header">'
+            f'International Cups</div>{cups}</div><div class="box"><div class="table-header">News</div>'
+            f"<p>Latest</p></div></div></div>",
+        )
+
+    def render_country(self, country_code: str) -> str | None:
+        country = next(
+            (name for name, code in COUNTRIES.items() if code == country_code), None
+        )
+        if country not in COMPETITIONS:
+            return None
+        tiers = "".join(
+            f'<tr><td class="extrarow bg_blau_20 hauptlink" colspan="5">{tier}</td></tr><tr class="odd"><td>'
+            f'<table class="inline-table"><tr><td><img src="/logo/{code}.png"></td><td><a href="/{slug}/'
+            f'startseite/{kind}/{code}" title="{name}">{name}</a></td></tr></table></td><td class="zentriert">'
+            f'{len(self.leagues[COMPETITIONS[country]["First Tier"][3]]["clubs"])}</td></tr>'
+            for tier, (name, slug, kind, code) in COMPETITIONS[country].items()
+        )
+        options = "".join(
+            f'<option value="{year}"{SEL if year == self.current_season else ""}>{year}/{str(year + 1)[2:]}</option>'
+            for year in range(self.current_season, 1990, -1)
+        )
+        return get_page(
+            country,
+            f'<div class="box"><table class="auflistung"><tbody><tr><td>Country:</td><td>{country}</td></tr><tr>'
+            f'<td>Season:</td><td><div><select name="saison_id">{options}</select></div></td></tr></tbody></table>'
+            f'</div><div class="box"><table class="items"><thead><tr><th>Competition</th><th>Clubs</th></tr>'
+            f"</thead><tbody>{tiers}</tbody></table></div>",
+        )
+
+    def render_clubs(self, league_code: str, season: int) -> str | None:
+        if league_code not in self.leagues:
+            return None
+        league = self.leagues[league_code]
+        rows = "".join(
+            f'<tr class="{"odd" if i % 2 else "even"}"><td class="zentriert no-border-rechts"><a href="/'
+            f'{club["slug"]}/startseite/verein/{club["code"]}/saison_id/{season}"><img src="/wappen/'
+            f'{club["code"]}.png" title="{club["name"]}"></a></td><td class="hauptlink no-border-links"><a title="'
+            f'{club["name"]}" href="/{club["slug"]}/startseite/verein/{club["code"]}/saison_id/{season}">'
+            f'{club["name"]}</a></td><td class="zentriert">{25 + i % 10}</td></tr>'
+            for i, club in enumerate(league["clubs"])
+        )
+        return get_page(
+            league["name"],
+            f'<div class="box"><table class="auflistung"><tbody><tr><td>Season</td><td>{season}</td></tr></tbody>'
+            f'</table></div><div class="responsive-table"><table class="items"><thead><tr><th>Club</th><th>name'
+            f"</th><th>Squad</th></tr></thead><tbody>{rows}</tbody></table></div>",
+        )
+
+    def render_fixture_row(
+        self,
+        n: int,
+        club: dict,
+        date: datetime.date,
+        kickoff: str,
+        home: dict,
+        away: dict,
+        ranks: tuple,
+        season: int,
+    ) -> str:
+        """Renders a row of the fixture table of a club, the ranks being (club rank, opponent rank) or None"""
+        venue = "H" if home is club else "A"
+        opponent = away if home is club else home
+        score = self.get_score(home, away, date)
+        rank, opponent_rank = ["" if r is None else f"({r}.)" for r in ranks]
+        if score is None:
+            result = '<a title="Preview" class="ergebnis-link" href="/spielbericht/index/spielbericht/0"><span>-:-</span></a>'
+        else:
+            home_goals, away_goals, home_pens = score
+            pens = ""
+            if home_goals == away_goals and ranks == (None, None):
+                # cup ties are decided on penalties
+                won = home_pens == (venue == "H")
+                pens = '<span class="ergebnis-link-zusatz">on pens</span>'
+            else:
+                won = (home_goals > away_goals) == (venue == "H")
+            result_class = (
+                ""
+                if home_goals == away_goals and pens == ""
+                else "greentext"
+                if won
+                else "redtext"
+            )
+            result = (
+                f'<a title="Match report" class="ergebnis-link" href="/spielbericht/index/spielbericht/'
+                f'{home["code"]}{away["code"]}"><span class="{result_class}">{home_goals}:{away_goals} {pens}'
+                f"</span></a>"
+            )
+        return (
+            f'<tr style="background-color:#{"fff" if n % 2 else "f2f2f2"};"><td class="zentriert"><a href="/md/{n}">'
+            f'{n}</a></td><td class="zentriert">{format_date(date)}</td><td class="zentriert">{kickoff}</td>'
+            f'<td class="zentriert">{venue}</td><td class="zentriert"><span class="tabellenplatz">{rank}</span></td>'
+            f'<td class="zentriert no-border-rechts"><img src="/wappen/{opponent["code"]}.png" title="'
+            f'{opponent["name"]}"></td><td class="no-border-links hauptlink"><a title="{opponent["name"]}" href="'
+            f'{self.get_club_link(opponent, season)}">{opponent["name"]}</a><span class="tabellenplatz">'
+            f'{opponent_rank}</span></td><td class="zentriert">4-3-3</td><td class="rechts">'
+            f'{self.get_rng(home["code"], date).randint(10000, 80000):,}</td><td class="zentriert">{result}</td></tr>'
+        )
+
+    def render_fixtures(self, club_code: str, season: int) -> str | None:
+        if club_code not in self.clubs:
+            return None
+        club = self.clubs[club_code]
+        league = self.leagues[club["league"]]
+        country = COMPETITIONS[league["country"]]
+        rows = [
+            f'<tr><td colspan="10" class="hauptlink"><a title="{league["name"]}" href="/{league["slug"]}/startseite/'
+            f'wettbewerb/{club["league"]}"><img src="/logo/{club["league"]}.png" alt="{league["name"]}"></a></td></tr>'
+        ]
+        n = 0
+        for week, matchday in enumerate(self.get_matchdays(club["league"], season)):
+            for home, away in matchday["matches"]:
+                if club is home or club is away:
+                    n += 1
+                    opponent = away if home is club else home
+                    ranks = (
+                        self.get_rank(club, season, week),
+                        self.get_rank(opponent, season, week),
+                    )
+                    rows.append(
+                        self.render_fixture_row(
+                            n,
+                            club,
+                            matchday["date"],
+                            matchday["kickoff"],
+                            home,
+                            away,
+                            ranks,
+                            season,
+                        )
+                    )
+        name, slug, kind, code = country["Domestic Cup"]
+        rows.append(
+            f'<tr><td colspan="10" class="hauptlink"><a title="{name}" href="/{slug}/startseite/{kind}/{code}">'
+            f'<img src="/logo/{code}.png" alt="{name}"></a></td></tr>'
+        )
+        for date, home, away in self.get_cup_matches(club, season):
+            n += 1
+            rows.append(
+                self.render_fixture_row(
+                    n, club, date, "8:00 PM", home, away, (None, None), season
+                )
+            )
+        return get_page(
+            club["name"],
+            f'<div class="box"><table class="auflistung"><tbody><tr><td>Season</td><td><select><option selected='
+            f'"selected" value="{season}">{season}</option></select></td></tr></tbody></table></div><div class="'
+            f'responsive-table"><table><thead><tr><th>Matchday</th><th>Date</th><th>Time</th><th>Venue</th><th>Rank'
+            f'</th><th colspan="2">Opponent</th><th>System</th><th>Attendance</th><th>Result</th></tr></thead><tbody>'
+            f'{"".join(rows)}</tbody></table></div>',
+        )
+
+    def render_schedule(self, league_code: str, season: int) -> str | None:
+        if league_code not in self.leagues:
+            return None
+        league = self.leagues[league_code]
+        boxes = []
+        for week, matchday in enumerate(self.get_matchdays(league_code, season)):
+            rows = []
+            for i, (home, away) in enumerate(matchday["matches"]):
+                score = self.get_score(home, away, matchday["date"])
+                # the date and the kickoff are only shown on the first match of the day
+                date = format_date(matchday["date"]) if i == 0 else ""
+                kickoff = matchday["kickoff"] if i == 0 else ""
+                rows.append(
+                    f'<tr><td class="hide-for-small">{date}</td><td class="zentriert hide-for-small">{kickoff}</td>'
+                    f'<td class="text-right no-border-rechts hauptlink"><span class="tabellenplatz">('
+                    f'{self.get_rank(home, season, week)}.)</span> <a title="{home["name"]}" href="'
+                    f'{self.get_club_link(home, season)}">{home["name"]}</a></td><td class="zentriert no-border-links'
+                    f'"><img src="/wappen/{home["code"]}.png"></td><td class="zentriert hauptlink"><a class="'
+                    f'ergebnis-link" href="/spielbericht/index/spielbericht/{home["code"]}{away["code"]}">'
+                    f'{"-:-" if score is None else f"{score[0]}:{score[1]}"}</a></td><td class="zentriert '
+                    f'no-border-rechts"><img src="/wappen/{away["code"]}.png"></td><td class="no-border-links '
+                    f'hauptlink"><a title="{away["name"]}" href="{self.get_club_link(away, season)}">{away["name"]}'
+                    f'</a> <span class="tabellenplatz">({self.get_rank(away, season, week)}.)</span></td></tr>'
+                )
+            boxes.append(
+                f'<div class="box"><div class="content-box-headline">{week + 1}.Matchday</div><table><thead><tr>'
+                f'<th>Date</th><th>Time</th><th colspan="5">Match</th></tr></thead><tbody>{"".join(rows)}</tbody>'
+                f"</table></div>"
+            )
+        return get_page(
+            f"{league['name']} {season}/{str(season + 1)[2:]}",
+            f'<div class="row"><div class="large-6 columns">{"".join(boxes)}</div></div>',
+        )
+
+
+class StandInServer(ThreadingHTTPServer):
+    """HTTP server of the stand-in pages, with the latency, the error rate and the counts of what it served"""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple,
+        world: World,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        retry_after: int = 1,
+        verbose: bool = False,
+    ):
+        super().__init__(address, StandInHandler)
+        self.world = world
+        self.latency = latency
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.verbose = verbose
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+        # {route: {status: count}}
+        self.counts: dict = {}
+        self.bytes_sent = 0
+
+    def get_base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, route: str, status: int, size: int):
+        with self.lock:
+            statuses = self.counts.setdefault(route, {})
+            statuses[status] = statuses.get(status, 0) + 1
+            self.bytes_sent += size
+
+    def get_stats(self) -> dict:
+        """Returns the counts of the pages served
+
+        Returns:
+            dict: {seconds, pages, errors, bytes, pages_per_second, routes: {route: {status: count}}}
+        """
+        with self.lock:
+            seconds = time.monotonic() - self.started
+            pages = sum(
+                [
+                    count
+                    for statuses in self.counts.values()
+                    for status, count in statuses.items()
+                    if status == 200
+                ]
+            )
+            errors = sum(
+                [
+                    count
+                    for statuses in self.counts.values()
+                    for status, count in statuses.items()
+                    if not status == 200
+                ]
+            )
+            return {
+                "seconds": round(seconds, 3),
+                "pages": pages,
+                "errors": errors,
+                "bytes": self.bytes_sent,
+                "pages_per_second": round(pages / seconds, 2) if seconds > 0 else 0.0,
+                "routes": {
+                    route: {str(status): count for status, count in statuses.items()}
+                    for route, statuses in self.counts.items()
+                },
+            }
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    server: StandInServer
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/__stats":
+            self.send(200, json.dumps(self.server.get_stats()), "application/json")
+            return
+        route, match = next(
+            (
+                (route, pattern.match(url.path))
+                for route, pattern in ROUTES.items()
+                if pattern.match(url.path) is not None
+            ),
+            ("unknown", None),
+        )
+        if self.server.latency > 0:
+            time.sleep(self.server.latency * random.uniform(0.5, 1.5))
+        if match is not None and random.random() < self.server.error_rate:
+            self.server.count(route, 503, 0)
+            self.send(
+                503,
+                "Service Unavailable",
+                headers={"Retry-After": str(self.server.retry_after)},
+            )
+            return
+        page = None
+        if match is not None:
+            query = parse_qs(url.query)
+            season = int(
+                match.groupdict().get("season")
+                or query.get("saison_id", [self.server.world.current_season])[0]
+            )
+            world = self.server.world
+            if route == "europa":
+                page = world.render_europa()
+            elif route == "country":
+                page = world.render_country(match["code"])
+            elif route == "clubs":
+                page = world.render_clubs(match["code"], season)
+            elif route == "fixtures":
+                page = world.render_fixtures(match["code"], season)
+            elif route == "schedule":
+                page = world.render_schedule(match["code"], season)
+        if page is None:
+            self.server.count(route, 404, 0)
+            self.send(404, "Not Found")
+            return
+        body = page.encode("utf-8")
+        self.server.count(route, 200, len(body))
+        self.send(200, body)
+
+    def send(
+        self,
+        status: int,
+        body: str | bytes,
+        content_type: str = "text/html; charset=utf-8",
+        headers: dict = None,
+    ):
+        body = body.encode("utf-8") if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def add_server_arguments(parser: argparse.ArgumentParser):
+    """Adds the options of the stand-in to a parser, shared with benchmarks/end_to_end.py"""
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--clubs", type=int, default=20, help="clubs of every league")
+    parser.add_argument(
+        "--current-season",
+        type=int,
+        default=get_current_season(),
+        help="start year of the season being played",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds every page is held for"
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="share of the pages answered with a 503",
+    )
+    parser.add_argument(
+        "--retry-after",
+        type=int,
+        default=1,
+        help="seconds of the Retry-After header of a 503",
+    )
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+
+
+def get_server(args, port: int) -> StandInServer:
+    """Builds the stand-in from the parsed options of add_server_arguments"""
+    return StandInServer(
+        (args.host, port),
+        World(args.clubs, args.current_season),
+        latency=args.latency,
+        error_rate=args.error_rate,
+        retry_after=args.retry_after,
+        verbose=args.verbose,
+    )
+
+
+def run_server():
+    parser = argparse.ArgumentParser(
+        description="Serves synthetic transfermarkt pages on the url scheme of the spiders."
+    )
+    parser.add_argument("--port", type=int, default=8800)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+    server = get_server(args, args.port)
+    print(
+        f"Serving on {server.get_base_url()}, stats at {server.get_base_url()}/__stats."
+    )
+    print(f"Crawl it with TRANSFERMARKT_BASE_URL={server.get_base_url()}.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.get_stats(), indent=4))
+
+
+if __name__ == "__main__":
+    run_server()
@@ -0,0 +1,305 @@
+# Local archive of the raw pages fetched by the spiders
+#
+# Enabled with the ARCHIVE_ENABLED setting, see PageArchive and ArchiveMiddleware.
+
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.http import TextResponse
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class PageArchive:
+    """Content addressed store of page bodies with a sqlite index of the page each url was last fetched as.
+
+    A body is stored once under the sha256 of its content, compressed with zstd when the zstandard package is
+    installed and with gzip otherwise. The index keeps, for every url, the spider and the callback it was
+    fetched for, its callback arguments, the club, league or country and the season it is about and the
+    digest of its body, so the pages can be replayed through the parsers without the network.
+
+    Several crawls can archive into the same directory at once, like the workers of the frontier. The index rows
+    are kept in memory and written commit_every at a time in one short transaction, so the write lock of the
+    index is only held for the time of a batch, and a crawl finding it taken waits for up to busy_timeout seconds.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        codec: str = "zstd",
+        commit_every: int = 100,
+        busy_timeout: float = 30.0,
+    ):
+        self.root = root
+        # gzip when zstd is asked for but zstandard isn't installed
+        self.codec = codec if codec == "gzip" or zstandard is not None else "gzip"
+        self.commit_every = commit_every
+        self.busy_timeout = busy_timeout
+        self.db = None
+        # index rows not written yet
+        self.pending: list = []
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            root=settings.get("ARCHIVE_DIR"),
+            codec=settings.get("ARCHIVE_COMPRESSION", "zstd"),
+            commit_every=settings.getint("ARCHIVE_COMMIT_EVERY", 100),
+            busy_timeout=settings.getfloat("ARCHIVE_BUSY_TIMEOUT", 30.0),
+        )
+
+    def open(self):
+        os.makedirs(os.path.join(self.root, "objects"), exist_ok=True)
+        self.db = sqlite3.connect(
+            os.path.join(self.root, "index.sqlite"), timeout=self.busy_timeout
+        )
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            """CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                spider TEXT NOT NULL,
+                callback TEXT NOT NULL,
+                cb_kwargs TEXT NOT NULL,
+                name TEXT,
+                season TEXT,
+                digest TEXT NOT NULL,
+                codec TEXT NOT NULL,
+                encoding TEXT NOT NULL,
+                fetched_at TEXT NOT NULL
+            )"""
+        )
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS spider_callback ON pages (spider, callback)"
+        )
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS name_season ON pages (name, season)"
+        )
+        self.db.commit()
+        return self
+
+    def close(self):
+        if self.db is None:
+            return
+        self.commit()
+        self.db.close()
+        self.db = None
+
+    def commit(self):
+        """Writes the pending index rows in one transaction"""
+        if len(self.pending) == 0:
+            return
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self.pending,
+            )
+        self.pending = []
+
+    def get_object_path(self, digest: str, codec: str) -> str:
+        """Returns the path of a stored body, fanned out by the first two characters of its digest
+
+        Args:
+            digest (str): sha256 of the body
+            codec (str): "zstd" or "gzip"
+
+        Returns:
+            str: path of the compressed body
+        """
+        extension = "zst" if codec == "zstd" else "gz"
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.{extension}")
+
+    def compress(self, body: bytes) -> bytes:
+        if self.codec == "zstd":
+            return zstandard.ZstdCompressor(level=10).compress(body)
+        return gzip.compress(body)
+
+    def decompress(self, data: bytes, codec: str) -> bytes:
+        if codec == "zstd":
+            if zstandard is None:
+                raise RuntimeError(
+                    "The zstandard package is needed to read pages archived with zstd."
+                )
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    def put(
+        self,
+        url: str,
+        spider: str,
+        callback: str,
+        cb_kwargs: dict,
+        body: bytes,
+        encoding: str,
+    ) -> bool:
+        """Stores the body of a page unless the same content is stored already, and indexes the page by its url
+
+        Args:
+            url (str): url of the page
+            spider (str): name of the spider that fetched it
+            callback (str): name of the callback it was fetched for
+            cb_kwargs (dict): arguments of the callback
+            body (bytes): body of the page
+            encoding (str): encoding of the body
+
+        Returns:
+            bool: True if the body was new to the store else False.
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        path = self.get_object_path(digest, self.codec)
+        is_new = not os.path.exists(path)
+        if is_new:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # written under a temporary name first, so a crash never leaves a truncated object behind
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(self.compress(body))
+            os.replace(tmp_path, path)
+        name = next(
+            (
+                cb_kwargs[key]
+                for key in ["team", "league", "country"]
+                if key in cb_kwargs
+            ),
+            None,
+        )
+        self.pending.append(
+            (
+                url,
+                spider,
+                callback,
+                json.dumps(cb_kwargs, default=str),
+                name,
+                cb_kwargs.get("season"),
+                digest,
+                self.codec,
+                encoding,
+                datetime.datetime.now().isoformat(),
+            )
+        )
+        if len(self.pending) >= self.commit_every:
+            self.commit()
+        return is_new
+
+    def iter_pages(
+        self,
+        spider: str = None,
+        callback: str = None,
+        names: list = None,
+        seasons: list = None,
+        batch_size: int = 100,
+    ):
+        """Yields the indexed pages with their bodies, reading batch_size index rows and one body at a time
+
+        Args:
+            spider (str, optional): only the pages of this spider. Defaults to None.
+            callback (str, optional): only the pages of this callback. Defaults to None.
+            names (list, optional): only the pages of these clubs, leagues or countries. Defaults to None.
+            seasons (list, optional): only the pages of these seasons. Defaults to None.
+            batch_size (int, optional): index rows read at a time. Defaults to 100.
+
+        Yields:
+            dict: {url, spider, callback, cb_kwargs, name, season, encoding, fetched_at, body}
+        """
+        conditions, params = [], []
+        for column, values in [
+            ("spider", None if spider is None else [spider]),
+            ("callback", None if callback is None else [callback]),
+            ("name", names),
+            ("season", seasons),
+        ]:
+            if values is not None:
+                conditions.append(f"{column} IN ({', '.join(['?'] * len(values))})")
+                params += list(values)
+        self.commit()
+        query = "SELECT * FROM pages"
+        if len(conditions) > 0:
+            query += " WHERE " + " AND ".join(conditions)
+        cursor = self.db.execute(query + " ORDER BY url", params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if len(rows) == 0:
+                return
+            for row in rows:
+                with open(self.get_object_path(row["digest"], row["codec"]), "rb") as f:
+                    body = self.decompress(f.read(), row["codec"])
+                yield {
+                    "url": row["url"],
+                    "spider": row["spider"],
+                    "callback": row["callback"],
+                    "cb_kwargs": json.loads(row["cb_kwargs"]),
+                    "name": row["name"],
+                    "season": row["season"],
+                    "encoding": row["encoding"],
+                    "fetched_at": datetime.datetime.fromisoformat(row["fetched_at"]),
+                    "body": body,
+                }
+
+    def count_pages(self) -> dict:
+        """Returns the number of indexed pages of every spider and callback
+
+        Returns:
+            dict: {(spider, callback): count}
+        """
+        self.commit()
+        return {
+            (row["spider"], row["callback"]): row["count"]
+            for row in self.db.execute(
+                "SELECT spider, callback, COUNT(*) AS count FROM pages GROUP BY spider, callback"
+            )
+        }
+
+
+class ArchiveMiddleware:
+    """Downloader middleware archiving every successful page into the PageArchive at ARCHIVE_DIR.
+
+    Pages served by the http cache were archived when they were fetched, and archiving them again would record
+    the time of the cache hit as their fetch time, so only the responses from the network are archived.
+    """
+
+    def __init__(self, archive: PageArchive, stats):
+        self.archive = archive
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("ARCHIVE_ENABLED"):
+            raise NotConfigured
+        s = cls(PageArchive.from_settings(crawler.settings), crawler.stats)
+        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        return s
+
+    def spider_opened(self, spider):
+        self.archive.open()
+
+    def spider_closed(self, spider):
+        self.archive.close()
+
+    def process_response(self, request, response, spider):
+        if not response.status == 200 or not isinstance(response, TextResponse):
+            return response
+        if "cached" in response.flags:
+            self.stats.inc_value("archive/skipped_cached")
+            return response
+        is_new = self.archive.put(
+            url=response.url,
+            spider=spider.name,
+            callback=getattr(request.callback, "__name__", "parse"),
+            cb_kwargs=request.cb_kwargs,
+            body=response.body,
+            encoding=response.encoding,
+        )
+        self.stats.inc_value("archive/pages")
+        if is_new:
+            self.stats.inc_value("archive/new_objects")
+        return response
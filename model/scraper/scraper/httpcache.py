@@ -0,0 +1,68 @@
+# Cache policy of the HttpCacheMiddleware
+#
+# See documentation in:
+# https://docs.scrapy.org/en/latest/topics/downloader-middleware.html#httpcache-middleware-settings
+
+import datetime
+import re
+from scrapy.extensions.httpcache import RFC2616Policy
+
+
+class SeasonPolicy(RFC2616Policy):
+    """RFC2616 cache policy whose freshness depends on the season of the page instead of the response headers.
+
+    Pages of a season that is over never change, so they are kept for HTTPCACHE_PAST_SEASON_TTL. Pages of the
+    current season are kept for HTTPCACHE_CURRENT_SEASON_TTL and pages without a season, like the country and
+    competition pages, for HTTPCACHE_DEFAULT_TTL. Stale pages are revalidated with their ETag or Last-Modified
+    headers when the site sends them.
+    """
+
+    # saison_id=2023 in the query or saison_id/2023 in the path
+    SEASON_RE = re.compile(r"saison_id[=/](\d{4})")
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        self.past_season_ttl = settings.getint("HTTPCACHE_PAST_SEASON_TTL")
+        self.current_season_ttl = settings.getint("HTTPCACHE_CURRENT_SEASON_TTL")
+        self.default_ttl = settings.getint("HTTPCACHE_DEFAULT_TTL")
+        # month after which the season that started the year before is over
+        self.season_end_month = settings.getint("HTTPCACHE_SEASON_END_MONTH")
+        self.ignore_http_codes = [
+            int(code) for code in settings.getlist("HTTPCACHE_IGNORE_HTTP_CODES")
+        ]
+
+    def is_past_season(self, season: int) -> bool:
+        """Checks if a season is over
+
+        Args:
+            season (int): Start year of season
+
+        Returns:
+            bool: True if the season is over else False.
+        """
+        today = datetime.date.today()
+        return (today.year, today.month) > (season + 1, self.season_end_month)
+
+    def get_ttl(self, url: str) -> int:
+        """Returns the seconds a page stays fresh in the cache
+
+        Args:
+            url (str): url of the page
+
+        Returns:
+            int: freshness lifetime
+        """
+        season = self.SEASON_RE.search(url)
+        if season is None:
+            return self.default_ttl
+        if self.is_past_season(int(season.group(1))):
+            return self.past_season_ttl
+        return self.current_season_ttl
+
+    def should_cache_response(self, response, request):
+        if response.status in self.ignore_http_codes:
+            return False
+        return super().should_cache_response(response, request)
+
+    def _compute_freshness_lifetime(self, response, request, now):
+        return self.get_ttl(request.url)
@@ -10,3 +10,8 @@ class ScraperItem(scrapy.Item):
     # define the fields for your item here like:
     # name = scrapy.Field()
     pass
+
+
+class MongoWriteItem(scrapy.Item):
+    # write requests of a single callback, {collection_name: [pymongo write requests]}
+    write_reqs = scrapy.Field()
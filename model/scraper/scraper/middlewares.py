@@ -3,7 +3,15 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+import random
+import time
+from email.utils import parsedate_to_datetime
+
 from scrapy import signals
+from scrapy.utils.defer import maybe_deferred_to_future
+from scrapy.utils.httpobj import urlparse_cached
+from scrapy.utils.misc import load_object
+from twisted.internet import task
 
 # useful for handling different item types with a single interface
 from itemadapter import is_item, ItemAdapter
@@ -56,19 +64,96 @@ class ScraperSpiderMiddleware:
         spider.logger.info("Spider opened: %s" % spider.name)
 
 
+class HostWindow:
+    """AIMD window of the requests in flight to a host, with the latency and error rate it is adjusted by.
+
+    The window grows by one request per window of successful responses and is halved, at most once per
+    latency, when the host answers with an error or slower than the target latency.
+    """
+
+    def __init__(self, start, min_window, max_window, target_latency):
+        self.window = float(start)
+        self.min_window = min_window
+        self.max_window = max_window
+        self.target_latency = target_latency
+        self.latency = None  # moving average in seconds
+        self.error_rate = 0.0  # moving average of the share of failed requests
+        self.last_decrease = 0.0
+        self.resume_at = 0.0  # time before which no request is sent, from Retry-After
+
+    def record(self, latency, failed: bool):
+        """Updates the moving averages and the window with the outcome of a request
+
+        Args:
+            latency (float): download latency in seconds, None if unknown
+            failed (bool): whether the request failed with a transient error
+        """
+        if latency is not None:
+            self.latency = (
+                latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+            )
+        self.error_rate = 0.9 * self.error_rate + 0.1 * (1.0 if failed else 0.0)
+        congested = failed or (
+            self.latency is not None and self.latency > self.target_latency
+        )
+        now = time.monotonic()
+        if congested:
+            # one decrease per round trip, the other errors of the same burst are the same congestion
+            if now - self.last_decrease > (self.latency or 1.0):
+                self.window = max(self.min_window, self.window / 2)
+                self.last_decrease = now
+        else:
+            self.window = min(self.max_window, self.window + 1 / self.window)
+
+
 class ScraperDownloaderMiddleware:
     # Not all methods need to be defined. If a method is not defined,
     # scrapy acts as if the downloader middleware does not modify the
     # passed objects.
 
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        settings = crawler.settings
+        self.adaptive = settings.getbool("ADAPTIVE_ENABLED", True)
+        self.start_window = settings.getint("ADAPTIVE_START_WINDOW", 2)
+        self.min_window = settings.getint("ADAPTIVE_MIN_WINDOW", 1)
+        self.max_window = settings.getint("CONCURRENT_REQUESTS_PER_DOMAIN", 8)
+        self.target_latency = settings.getfloat("ADAPTIVE_TARGET_LATENCY", 3.0)
+        self.max_retries = settings.getint("ADAPTIVE_MAX_RETRIES", 5)
+        self.backoff_base = settings.getfloat("ADAPTIVE_BACKOFF_BASE", 1.0)
+        self.backoff_max = settings.getfloat("ADAPTIVE_BACKOFF_MAX", 120.0)
+        self.retry_http_codes = [
+            int(code) for code in settings.getlist("ADAPTIVE_RETRY_HTTP_CODES")
+        ]
+        self.retry_exceptions = tuple(
+            load_object(exception) if isinstance(exception, str) else exception
+            for exception in settings.getlist("RETRY_EXCEPTIONS")
+        )
+        self.hosts: dict = {}  # {download slot: HostWindow}
+
     @classmethod
     def from_crawler(cls, crawler):
         # This method is used by Scrapy to create your spiders.
-        s = cls()
+        s = cls(crawler)
         crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
         return s
 
-    def process_request(self, request, spider):
+    def get_slot_key(self, request) -> str:
+        """Returns the download slot of a request, its host unless the request sets download_slot"""
+        return request.meta.get("download_slot") or urlparse_cached(request).hostname
+
+    def get_host(self, request) -> HostWindow:
+        """Returns the window of the host of a request, by its download slot"""
+        key = self.get_slot_key(request)
+        if key not in self.hosts:
+            self.hosts[key] = HostWindow(
+                self.start_window, self.min_window, self.max_window, self.target_latency
+            )
+        return self.hosts[key]
+
+    async def process_request(self, request, spider):
         # Called for each request that goes through the downloader
         # middleware.
 
@@ -78,6 +163,18 @@ class ScraperDownloaderMiddleware:
         # - or return a Request object
         # - or raise IgnoreRequest: process_exception() methods of
         #   installed downloader middleware will be called
+        if not self.adaptive:
+            return None
+        # waiting out a Retry-After of the host or the backoff of a retried request
+        wait = (
+            max(self.get_host(request).resume_at, request.meta.get("backoff_until", 0))
+            - time.monotonic()
+        )
+        if wait > 0:
+            # imported here so that importing the middleware doesn't install the default reactor
+            from twisted.internet import reactor
+
+            await maybe_deferred_to_future(task.deferLater(reactor, wait))
         return None
 
     def process_response(self, request, response, spider):
@@ -87,7 +184,30 @@ class ScraperDownloaderMiddleware:
         # - return a Response object
         # - return a Request object
         # - or raise IgnoreRequest
-        return response
+
+        # fresh or revalidated responses of the HttpCacheMiddleware, whose body wasn't downloaded again
+        if "cached" in response.flags:
+            self.stats.inc_value("httpcache/bytes_saved", len(response.body))
+            return response
+        self.stats.inc_value("httpcache/bytes_downloaded", len(response.body))
+        if not self.adaptive:
+            return response
+        failed = response.status in self.retry_http_codes
+        self.record(request, failed)
+        if not failed:
+            return response
+        retry_after = self.get_retry_after(response)
+        if retry_after is not None and retry_after > self.backoff_max:
+            # a wait of hours would stall every request of the host, the request runs out of retries instead
+            self.stats.inc_value("adaptive/retry_after_capped")
+            spider.logger.warning(
+                f"Capped the Retry-After of {retry_after:.0f}s of {request} to {self.backoff_max:.0f}s."
+            )
+            retry_after = self.backoff_max
+        if retry_after is not None:
+            self.get_host(request).resume_at = time.monotonic() + retry_after
+            self.stats.inc_value("adaptive/retry_after_waits")
+        return self.retry(request, f"status {response.status}", retry_after) or response
 
     def process_exception(self, request, exception, spider):
         # Called when a download handler or a process_request()
@@ -97,7 +217,95 @@ class ScraperDownloaderMiddleware:
         # - return None: continue processing this exception
         # - return a Response object: stops process_exception() chain
         # - return a Request object: stops process_exception() chain
-        pass
+        if not self.adaptive or not isinstance(exception, self.retry_exceptions):
+            return None
+        self.record(request, True)
+        return self.retry(request, type(exception).__name__)
+
+    def record(self, request, failed: bool):
+        """Adjusts the window of the host of a request and exposes it in the crawl stats
+
+        Args:
+            request (scrapy.Request): request whose response or exception was received
+            failed (bool): whether the request failed with a transient error
+        """
+        key = self.get_slot_key(request)
+        host = self.get_host(request)
+        host.record(request.meta.get("download_latency"), failed)
+        slot = self.crawler.engine.downloader.slots.get(key)
+        if slot is not None:
+            slot.concurrency = int(host.window)
+        self.stats.set_value(f"adaptive/{key}/window", round(host.window, 2))
+        self.stats.set_value(f"adaptive/{key}/error_rate", round(host.error_rate, 3))
+        if host.latency is not None:
+            self.stats.set_value(f"adaptive/{key}/latency", round(host.latency, 3))
+
+    def get_retry_after(self, response):
+        """Parses the Retry-After header of a response, in seconds or as a date
+
+        Args:
+            response (scrapy.http.Response): response of the host
+
+        Returns:
+            float: seconds to wait, None if the header is missing or invalid
+        """
+        value = response.headers.get(b"Retry-After")
+        if value is None:
+            return None
+        value = value.decode("latin-1").strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def retry(self, request, reason: str, delay: float = None):
+        """Returns a copy of a request to retry after a jittered exponential backoff, None once out of retries
+
+        Args:
+            request (scrapy.Request): failed request
+            reason (str): reason of the failure, for the logs
+            delay (float, optional): seconds to wait instead of the backoff, from Retry-After. Defaults to None.
+
+        Returns:
+            scrapy.Request: request to retry
+        """
+        retries = request.meta.get("adaptive_retries", 0) + 1
+        if retries > self.max_retries:
+            self.stats.inc_value("adaptive/gave_up")
+            self.crawler.spider.logger.error(
+                f"Gave up {request} after {self.max_retries} retries, {reason}."
+            )
+            return None
+        if delay is None:
+            delay = min(
+                self.backoff_max, self.backoff_base * 2 ** (retries - 1)
+            ) * random.uniform(0.5, 1.5)
+        self.stats.inc_value("adaptive/retries")
+        self.crawler.spider.logger.debug(
+            f"Retrying {request} in {delay:.1f}s ({retries}/{self.max_retries}), {reason}."
+        )
+        retry_request = request.replace(dont_filter=True)
+        retry_request.meta["adaptive_retries"] = retries
+        retry_request.meta["backoff_until"] = time.monotonic() + delay
+        return retry_request
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
+
+    def spider_closed(self, spider):
+        spider.logger.info(
+            "HTTP cache: %d hits, %d misses, %d revalidated, %d bytes saved, %d bytes downloaded"
+            % (
+                self.stats.get_value("httpcache/hit", 0),
+                self.stats.get_value("httpcache/miss", 0),
+                self.stats.get_value("httpcache/revalidate", 0),
+                self.stats.get_value("httpcache/bytes_saved", 0),
+                self.stats.get_value("httpcache/bytes_downloaded", 0),
+            )
+        )
+        for key, host in self.hosts.items():
+            spider.logger.info(
+                f"Adaptive window of {key}: {host.window:.2f} requests, error rate {host.error_rate:.3f}, latency {host.latency}"
+            )
@@ -0,0 +1,136 @@
+# Process pool the spiders can hand their HTML parsing over to
+#
+# Enabled with the PARSE_POOL_ENABLED setting, see ParsePool.
+
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from scrapy.http import HtmlResponse
+
+from .spiders.spider_utils import classes
+
+# parsing objects of a worker process, {class_name: object}
+_parsers: dict = {}
+
+
+def init_worker():
+    """Puts a worker process in parse only mode, its objects neither query the database nor write the log files"""
+    classes.BaseClass.parse_only = True
+
+
+def parse_in_worker(
+    class_name: str, method: str, url: str, body: bytes, encoding: str, args: tuple
+) -> tuple:
+    """Parses a page in a worker process (runs in the process pool)
+
+    Args:
+        class_name (str): name of the class of classes.py doing the parsing, such as "Fixtures"
+        method (str): its parsing method, called with the response and args
+        url (str): url of the page
+        body (bytes): body of the page
+        encoding (str): encoding of the body
+        args (tuple): arguments of the parsing method after the response
+
+    Returns:
+        tuple: (result of the parsing method, seconds spent parsing)
+    """
+    start = time.monotonic()
+    if class_name not in _parsers:
+        _parsers[class_name] = getattr(classes, class_name)()
+    response = HtmlResponse(url=url, body=body, encoding=encoding)
+    result = getattr(_parsers[class_name], method)(response, *args)
+    return result, time.monotonic() - start
+
+
+class ParsePool:
+    """Spawned worker processes parsing the pages of a spider, so CPU heavy XPath evaluation doesn't hold up the
+    reactor thread and the downloads it drives.
+
+    The body and the url of a response are sent to a worker, which parses it with the same method of
+    classes.py as the spider would and returns the plain dicts it produces. The number of pages waiting for a
+    worker and the share of the time the workers spent parsing are kept in the crawl stats.
+    """
+
+    def __init__(self, stats, workers: int):
+        self.stats = stats
+        self.workers = workers
+        self.executor = None
+        self.started = None
+        self.in_flight = 0
+        self.busy_seconds = 0.0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        workers = crawler.settings.getint("PARSE_POOL_WORKERS", 0)
+        return cls(
+            stats=crawler.stats,
+            workers=workers if workers > 0 else multiprocessing.cpu_count(),
+        )
+
+    def start(self):
+        # spawned rather than forked, so the workers don't inherit the reactor, the sockets or the mongo client
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+        )
+        self.started = time.monotonic()
+        self.stats.set_value("parse_pool/workers", self.workers)
+
+    async def parse(self, obj: classes.BaseClass, method: str, response, *args):
+        """Parses a response in a worker process
+
+        Args:
+            obj (classes.BaseClass): object of the spider the parsing method belongs to
+            method (str): name of the parsing method
+            response (scrapy.http.Response): response to parse
+
+        Returns:
+            the result of the parsing method
+        """
+        if self.executor is None:
+            self.start()
+        future = self.executor.submit(
+            parse_in_worker,
+            type(obj).__name__,
+            method,
+            response.url,
+            response.body,
+            response.encoding,
+            args,
+        )
+        self.in_flight += 1
+        queue_depth = max(0, self.in_flight - self.workers)
+        self.stats.inc_value("parse_pool/submitted")
+        self.stats.set_value("parse_pool/queue_depth", queue_depth)
+        self.stats.max_value("parse_pool/max_queue_depth", queue_depth)
+        try:
+            result, seconds = await asyncio.wrap_future(future)
+        finally:
+            self.in_flight -= 1
+            self.stats.set_value(
+                "parse_pool/queue_depth", max(0, self.in_flight - self.workers)
+            )
+        self.busy_seconds += seconds
+        self.stats.inc_value("parse_pool/completed")
+        self.stats.set_value("parse_pool/busy_seconds", round(self.busy_seconds, 3))
+        self.stats.set_value("parse_pool/utilisation", self.get_utilisation())
+        return result
+
+    def get_utilisation(self) -> float:
+        """Returns the share of the time since the pool started that its workers spent parsing"""
+        elapsed = time.monotonic() - self.started
+        return (
+            round(self.busy_seconds / (self.workers * elapsed), 3)
+            if elapsed > 0
+            else 0.0
+        )
+
+    def close(self):
+        if self.executor is None:
+            return
+        self.stats.set_value("parse_pool/utilisation", self.get_utilisation())
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.executor = None
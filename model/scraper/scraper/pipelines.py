@@ -4,10 +4,291 @@
 # See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 
 
+import time
+
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
+from pymongo.errors import BulkWriteError
+from twisted.internet import defer, reactor, task, threads
+from twisted.python.threadpool import ThreadPool
+
+from .items import MongoWriteItem
+from .spiders.spider_utils.classes import BaseClass
 
 
 class ScraperPipeline:
+    """Write-behind pipeline for the database writes yielded by the spiders.
+
+    Write requests are buffered by collection and flushed with one unordered bulk write per collection on a
+    bounded thread pool, so the reactor thread never waits on the database. A flush is started when the
+    buffer reaches MONGO_PIPELINE_FLUSH_SIZE operations or every MONGO_PIPELINE_FLUSH_INTERVAL seconds.
+    Once MONGO_PIPELINE_MAX_PENDING operations are buffered or being written, items wait for a flush to
+    finish before they are accepted.
+
+    One flush runs at a time, so the writes of a collection land in the order they were yielded. The
+    collections of a flush are written in parallel, except MONGO_PIPELINE_LAST_COLLECTIONS, the page hashes
+    and frontier acks recording that a page is done, which are written after the others and only if all of
+    them went through. Operations that fail go back to the front of the buffer and are tried again by the
+    next flush, up to MONGO_PIPELINE_MAX_ATTEMPTS times. An operation failing its last attempt is dropped, and
+    so are the held back operations of the last collections yielded in the same item, so its page is crawled
+    again rather than recorded as done without its data.
+    """
+
+    def __init__(
+        self,
+        stats,
+        flush_size,
+        flush_interval,
+        max_pending,
+        workers,
+        max_attempts=3,
+        last_collections=("fixture_pages", "frontier"),
+    ):
+        self.stats = stats
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.last_collections = list(last_collections)
+        # buffered operations, {collection_name: [{req: write request, item: item number, attempts: failed attempts}]}
+        self.buffer: dict = {}
+        self.buffered_ops = 0
+        self.items = 0
+        self.in_flight: dict = {}  # {flush deferred: number of operations}
+        self.last_flush_failed = False
+        self.db = None
+        self.thread_pool = None
+        self.flush_loop = None
+        self.spider = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            stats=crawler.stats,
+            flush_size=settings.getint("MONGO_PIPELINE_FLUSH_SIZE", 500),
+            flush_interval=settings.getfloat("MONGO_PIPELINE_FLUSH_INTERVAL", 2.0),
+            max_pending=settings.getint("MONGO_PIPELINE_MAX_PENDING", 5000),
+            workers=settings.getint("MONGO_PIPELINE_WORKERS", 4),
+            max_attempts=settings.getint("MONGO_PIPELINE_MAX_ATTEMPTS", 3),
+            last_collections=settings.getlist(
+                "MONGO_PIPELINE_LAST_COLLECTIONS", ["fixture_pages", "frontier"]
+            ),
+        )
+
+    def open_spider(self, spider):
+        self.spider = spider
+        self.db = BaseClass().get_db()
+        self.thread_pool = ThreadPool(
+            minthreads=1, maxthreads=self.workers, name="mongo-pipeline"
+        )
+        self.thread_pool.start()
+        self.flush_loop = task.LoopingCall(self.flush)
+        self.flush_loop.start(self.flush_interval, now=False)
+
     def process_item(self, item, spider):
+        if not isinstance(item, MongoWriteItem):
+            return item
+        # the operations of an item are those of one page, dropped together
+        self.items += 1
+        for col, reqs in ItemAdapter(item)["write_reqs"].items():
+            if len(reqs) > 0:
+                self.buffer.setdefault(col, []).extend(
+                    [{"req": req, "item": self.items, "attempts": 0} for req in reqs]
+                )
+                self.buffered_ops += len(reqs)
+        self.stats.inc_value("mongo_pipeline/items")
+        if self.buffered_ops >= self.flush_size:
+            self.flush()
+        if self.buffered_ops + sum(self.in_flight.values()) >= self.max_pending:
+            # backpressure: hold the item until a flush has finished
+            self.stats.inc_value("mongo_pipeline/backpressure_waits")
+            if len(self.in_flight) == 0:
+                self.flush()
+            dfd = defer.DeferredList(
+                list(self.in_flight.keys()), fireOnOneCallback=True
+            )
+            dfd.addCallback(lambda _: item)
+            return dfd
         return item
+
+    def flush(self):
+        """Hands the buffered write requests over to the thread pool, unless a flush is running already
+
+        Returns:
+            Deferred: fired once the running flush or the new one has finished
+        """
+        if len(self.in_flight) > 0:
+            return defer.DeferredList(list(self.in_flight.keys()))
+        if self.buffered_ops == 0:
+            return defer.succeed(None)
+        buffer, ops = self.buffer, self.buffered_ops
+        self.buffer, self.buffered_ops = {}, 0
+        dfd = self.write_buffer(buffer)
+        self.in_flight[dfd] = ops
+        dfd.addBoth(self.remove_in_flight, dfd)
+        return dfd
+
+    @defer.inlineCallbacks
+    def write_buffer(self, buffer: dict):
+        """Writes the collections of a flush in parallel and then the last collections, requeueing what failed
+
+        Args:
+            buffer (dict): {collection_name: [buffered operations]}
+        """
+        start = time.monotonic()
+        first = {
+            col: reqs
+            for col, reqs in buffer.items()
+            if col not in self.last_collections
+        }
+        last = {
+            col: reqs for col, reqs in buffer.items() if col in self.last_collections
+        }
+        results = yield self.write_collections(first)
+        first_failed = any(
+            [len(failed_indexes) > 0 for _, failed_indexes, _ in results.values()]
+        )
+        if not first_failed:
+            results.update((yield self.write_collections(last)))
+        written: dict = {}
+        # items with an operation dropped after its last attempt
+        dropped_items: set = set()
+        for col, (ops, failed_indexes, error) in results.items():
+            if ops > 0:
+                written[col] = ops
+                self.stats.inc_value(f"mongo_pipeline/ops_written/{col}", ops)
+            if len(failed_indexes) > 0:
+                self.stats.inc_value("mongo_pipeline/ops_failed", len(failed_indexes))
+                self.spider.logger.error(
+                    f"Failed to write {len(failed_indexes)} operations into {col}: {error}"
+                )
+                failed = [buffer[col][i] for i in failed_indexes]
+                dropped_items.update(self.requeue(col, failed, attempts=True))
+        if first_failed:
+            # a page is only recorded as done once its data is written, the others are held back for the next flush
+            for col, ops in last.items():
+                dropped = [op for op in ops if op["item"] in dropped_items]
+                if len(dropped) > 0:
+                    self.stats.inc_value("mongo_pipeline/ops_dropped", len(dropped))
+                    self.spider.logger.error(
+                        f"Dropped {len(dropped)} operations of {col}, so their pages are crawled again."
+                    )
+                self.requeue(
+                    col,
+                    [op for op in ops if op["item"] not in dropped_items],
+                    attempts=False,
+                )
+        # the shared resolver has to be reloaded if the collections it was loaded from were written, even in part
+        BaseClass.invalidate_resolver(results.keys())
+        seconds = time.monotonic() - start
+        failed = any(
+            [len(failed_indexes) > 0 for _, failed_indexes, _ in results.values()]
+        )
+        self.last_flush_failed = failed
+        self.stats.inc_value("mongo_pipeline/flushes")
+        if failed:
+            self.stats.inc_value("mongo_pipeline/failed_flushes")
+        self.stats.max_value("mongo_pipeline/max_flush_seconds", seconds)
+        self.spider.logger.debug(f"Flushed {written} in {seconds:.3f}s.")
+
+    @defer.inlineCallbacks
+    def write_collections(self, buffer: dict):
+        """Writes every collection of buffer with a bulk write of its own on the thread pool
+
+        Args:
+            buffer (dict): {collection_name: [buffered operations]}
+
+        Returns:
+            Deferred: fired with {collection_name: (operations written, indexes of the failed operations, error)}
+        """
+        cols = list(buffer.keys())
+        results = yield defer.gatherResults(
+            [
+                threads.deferToThreadPool(
+                    reactor,
+                    self.thread_pool,
+                    self.write,
+                    col,
+                    [op["req"] for op in buffer[col]],
+                )
+                for col in cols
+            ]
+        )
+        return dict(zip(cols, results))
+
+    def write(self, col: str, reqs: list) -> tuple:
+        """Writes the requests of a collection with one unordered bulk write (runs in the thread pool)
+
+        Args:
+            col (str): name of the collection
+            reqs (list): write requests
+
+        Returns:
+            tuple: (operations written, indexes of the failed requests, error message or None)
+        """
+        try:
+            self.db[col].bulk_write(reqs, ordered=False)
+        except BulkWriteError as e:
+            if len(e.details.get("writeConcernErrors", [])) > 0:
+                # the writes may or may not have been applied, they are idempotent so all of them are retried
+                return 0, list(range(len(reqs))), str(e)
+            failed_indexes = sorted(
+                {error["index"] for error in e.details["writeErrors"]}
+            )
+            return len(reqs) - len(failed_indexes), failed_indexes, str(e)
+        except Exception as e:
+            return 0, list(range(len(reqs))), str(e)
+        return len(reqs), [], None
+
+    def requeue(self, col: str, ops: list, attempts: bool) -> set:
+        """Puts buffered operations back at the front of the buffer, dropping those out of attempts
+
+        Args:
+            col (str): name of the collection
+            ops (list): buffered operations
+            attempts (bool): whether the operations failed, counting an attempt, or were only held back
+
+        Returns:
+            set: items of the dropped operations
+        """
+        kept = []
+        dropped_items: set = set()
+        for op in ops:
+            if attempts:
+                op["attempts"] += 1
+            if op["attempts"] >= self.max_attempts:
+                dropped_items.add(op["item"])
+                continue
+            kept.append(op)
+        dropped = len(ops) - len(kept)
+        if dropped > 0:
+            self.stats.inc_value("mongo_pipeline/ops_dropped", dropped)
+            self.spider.logger.error(
+                f"Dropped {dropped} operations of {col} after {self.max_attempts} attempts."
+            )
+        if len(kept) > 0:
+            self.buffer[col] = kept + self.buffer.get(col, [])
+            self.buffered_ops += len(kept)
+            self.stats.inc_value("mongo_pipeline/ops_requeued", len(kept))
+        return dropped_items
+
+    def remove_in_flight(self, result, dfd):
+        self.in_flight.pop(dfd, None)
+        # the items buffered meanwhile don't wait for the next timed flush
+        if self.buffered_ops >= self.flush_size and not self.last_flush_failed:
+            self.flush()
+        return result
+
+    @defer.inlineCallbacks
+    def close_spider(self, spider):
+        if self.flush_loop is not None and self.flush_loop.running:
+            self.flush_loop.stop()
+        # drain whatever is still buffered, retrying the failed operations until they are written or dropped
+        while self.buffered_ops > 0 or len(self.in_flight) > 0:
+            yield self.flush()
+            if self.last_flush_failed and self.buffered_ops > 0:
+                yield task.deferLater(reactor, self.flush_interval, lambda: None)
+        self.thread_pool.stop()
+        spider.logger.info("Drained the mongo write pipeline.")
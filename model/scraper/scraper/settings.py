@@ -7,6 +7,8 @@
 #     https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
 #     https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+import os
+
 BOT_NAME = "scraper"
 
 SPIDER_MODULES = ["scraper.spiders"]
@@ -27,9 +29,25 @@ ROBOTSTXT_OBEY = False
 # See also autothrottle settings and docs
 # DOWNLOAD_DELAY = 3
 # The download delay setting will honor only one of:
-# CONCURRENT_REQUESTS_PER_DOMAIN = 16
+# upper bound of the adaptive window of ScraperDownloaderMiddleware
+CONCURRENT_REQUESTS_PER_DOMAIN = 8
 # CONCURRENT_REQUESTS_PER_IP = 16
 
+# Adaptive per host concurrency of ScraperDownloaderMiddleware: the window of requests in flight starts at
+# ADAPTIVE_START_WINDOW, grows while responses come faster than ADAPTIVE_TARGET_LATENCY seconds and is halved on
+# ADAPTIVE_RETRY_HTTP_CODES, RETRY_EXCEPTIONS or slow responses. Failed requests are retried up to
+# ADAPTIVE_MAX_RETRIES times after Retry-After or a jittered exponential backoff, replacing the RetryMiddleware.
+# Both waits are capped at ADAPTIVE_BACKOFF_MAX seconds.
+ADAPTIVE_ENABLED = True
+ADAPTIVE_START_WINDOW = 2
+ADAPTIVE_MIN_WINDOW = 1
+ADAPTIVE_TARGET_LATENCY = 3.0
+ADAPTIVE_MAX_RETRIES = 5
+ADAPTIVE_BACKOFF_BASE = 1.0
+ADAPTIVE_BACKOFF_MAX = 120.0
+ADAPTIVE_RETRY_HTTP_CODES = [403, 408, 429, 500, 502, 503, 504, 522, 524]
+RETRY_ENABLED = False
+
 # Disable cookies (enabled by default)
 # COOKIES_ENABLED = False
 
@@ -50,9 +68,10 @@ ROBOTSTXT_OBEY = False
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
-# DOWNLOADER_MIDDLEWARES = {
-#    "scraper.middlewares.ScraperDownloaderMiddleware": 543,
-# }
+DOWNLOADER_MIDDLEWARES = {
+    "scraper.middlewares.ScraperDownloaderMiddleware": 543,
+    "scraper.archive.ArchiveMiddleware": 545,
+}
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
@@ -62,9 +81,41 @@ ROBOTSTXT_OBEY = False
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
-# ITEM_PIPELINES = {
-#    "scraper.pipelines.ScraperPipeline": 300,
-# }
+ITEM_PIPELINES = {
+    "scraper.pipelines.ScraperPipeline": 300,
+}
+# Write-behind settings of ScraperPipeline: operations buffered before a flush, seconds between timed flushes,
+# operations buffered or in flight before items wait (backpressure), threads writing the collections of a flush,
+# attempts at an operation before it is dropped, and the collections recording that a page is done, which are
+# only written once the other writes of their flush went through
+MONGO_PIPELINE_FLUSH_SIZE = 500
+MONGO_PIPELINE_FLUSH_INTERVAL = 2.0
+MONGO_PIPELINE_MAX_PENDING = 5000
+MONGO_PIPELINE_WORKERS = 4
+MONGO_PIPELINE_MAX_ATTEMPTS = 3
+MONGO_PIPELINE_LAST_COLLECTIONS = ["fixture_pages", "frontier"]
+# whether a spider closes the shared mongo client when it closes, off when several spiders crawl in one process
+MONGODB_CLOSE_ON_SPIDER_CLOSE = True
+
+# parsing the fixture, club and competition pages in PARSE_POOL_WORKERS spawned processes (0 for one per CPU)
+# instead of the reactor thread
+PARSE_POOL_ENABLED = False
+PARSE_POOL_WORKERS = 0
+
+# archiving every page fetched from the network into ARCHIVE_DIR, for the reparse command to replay it through the
+# parsers; the http cache hits were archived when they were fetched and are skipped;
+# compressed with zstd if the zstandard package is installed, else with gzip
+ARCHIVE_ENABLED = True
+ARCHIVE_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "../../data/archive")
+)
+ARCHIVE_COMPRESSION = "zstd"
+ARCHIVE_COMMIT_EVERY = 100
+# seconds a crawl waits for the index of the archive while another crawl is writing into it
+ARCHIVE_BUSY_TIMEOUT = 30.0
+
+# pages between two progress logs of a checkpointed crawl
+PROGRESS_EVERY = 25
 
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
@@ -81,11 +132,27 @@ ROBOTSTXT_OBEY = False
 
 # Enable and configure HTTP caching (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html#httpcache-middleware-settings
-# HTTPCACHE_ENABLED = True
-# HTTPCACHE_EXPIRATION_SECS = 0
-# HTTPCACHE_DIR = "httpcache"
-# HTTPCACHE_IGNORE_HTTP_CODES = []
-# HTTPCACHE_STORAGE = "scrapy.extensions.httpcache.FilesystemCacheStorage"
+HTTPCACHE_ENABLED = True
+HTTPCACHE_EXPIRATION_SECS = 0
+HTTPCACHE_DIR = "httpcache"
+HTTPCACHE_IGNORE_HTTP_CODES = [403, 404, 429, 500, 502, 503, 504]
+HTTPCACHE_STORAGE = "scrapy.extensions.httpcache.FilesystemCacheStorage"
+HTTPCACHE_GZIP = True
+# freshness of the pages depends on their season, stale pages are revalidated with ETag/Last-Modified
+HTTPCACHE_POLICY = "scraper.httpcache.SeasonPolicy"
+HTTPCACHE_ALWAYS_STORE = True
+HTTPCACHE_IGNORE_RESPONSE_CACHE_CONTROLS = [
+    "no-cache",
+    "no-store",
+    "private",
+    "max-age",
+]
+# seconds a page stays fresh: pages of seasons that are over, of the current season and without a season
+HTTPCACHE_PAST_SEASON_TTL = 3600 * 24 * 365
+HTTPCACHE_CURRENT_SEASON_TTL = 3600 * 6
+HTTPCACHE_DEFAULT_TTL = 3600 * 24
+# a season that started the year before is over after this month
+HTTPCACHE_SEASON_END_MONTH = 7
 
 # Set settings whose default value is deprecated to a future-proof value
 REQUEST_FINGERPRINTER_IMPLEMENTATION = "2.7"
@@ -1,20 +1,128 @@
 import scrapy
+from ..items import MongoWriteItem
+from ..parsepool import ParsePool
 
 # from spider_utils.classes import CountryCodes, CompetitionNames, ClubNames
 from .spider_utils.classes import (
+    BaseClass,
     CountryCodes,
     CompetitionNames,
     ClubNames,
     Fixtures,
     Injuries,
+    UnitOfWork,
 )
+from .spider_utils.indexes import Indexes
 
 
 class BaseSpider(scrapy.Spider):
     name = "base"
 
-    def __init__(self):
-        super().__init__()
+    def __init__(
+        self,
+        countries: str = None,
+        leagues: str = None,
+        seasons: str = None,
+        clubs: str = None,
+        *args,
+        **kwargs,
+    ):
+        """
+        Args:
+            countries (str, optional): comma separated countries the crawl is restricted to. Defaults to None for all.
+            leagues (str, optional): comma separated leagues the crawl is restricted to. Defaults to None for all.
+            seasons (str, optional): comma separated start years of the seasons the crawl is restricted to.
+                Defaults to None for all.
+            clubs (str, optional): comma separated clubs the crawl is restricted to. Defaults to None for all.
+        """
+        super().__init__(*args, **kwargs)
+        # {countries|leagues|seasons|clubs: [names]} of a targeted crawl, applied to every object of the spider
+        self.selection: dict = {
+            key: [name.strip() for name in value.split(",") if len(name.strip()) > 0]
+            for key, value in {
+                "countries": countries,
+                "leagues": leagues,
+                "seasons": seasons,
+                "clubs": clubs,
+            }.items()
+            if value is not None
+        }
+        # pool the pages are parsed in when PARSE_POOL_ENABLED is on, started on the first page
+        self.parse_pool = None
+        # creating the missing indexes before any spider queries the database, once per process
+        Indexes.ensure_indexes_once()
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        if crawler.settings.getbool("PARSE_POOL_ENABLED", False):
+            spider.parse_pool = ParsePool.from_crawler(crawler)
+        return spider
+
+    def closed(self, reason):
+        """Records the mongo connection pool stats and closes the shared client once the spider is closed.
+
+        The client is kept open when MONGODB_CLOSE_ON_SPIDER_CLOSE is off, for the other spiders crawling in the
+        same process.
+
+        Args:
+            reason (str): reason why the spider was closed
+        """
+        pool_stats = BaseClass.get_pool_stats()
+        for stat, value in pool_stats.items():
+            self.crawler.stats.set_value(f"mongo/pool/{stat}", value)
+        self.logger.info(f"Mongo connection pool stats: {pool_stats}")
+        if self.parse_pool is not None:
+            self.parse_pool.close()
+        if self.settings.getbool("MONGODB_CLOSE_ON_SPIDER_CLOSE", True):
+            BaseClass.close_client()
+
+    async def run_parser(self, obj: BaseClass, method: str, response, *args):
+        """Parses a response with a method of an object, in the parse pool if it is enabled.
+
+        Args:
+            obj (BaseClass): object the parsing method belongs to
+            method (str): name of the parsing method
+            response (scrapy.http.Response): response to parse
+
+        Returns:
+            the result of the parsing method, plain dicts and lists
+        """
+        if self.parse_pool is None:
+            return getattr(obj, method)(response, *args)
+        return await self.parse_pool.parse(obj, method, response, *args)
+
+    def get_unit_of_work(self) -> UnitOfWork:
+        """Returns a unit of work to stage the write requests of a callback.
+
+        Returns:
+            UnitOfWork: an empty unit of work
+        """
+        return UnitOfWork()
+
+    def get_write_item(self, write_reqs: dict) -> MongoWriteItem:
+        """Wraps the write requests of a callback into an item for the mongo write pipeline.
+
+        Args:
+            write_reqs (dict): {collection_name: [write requests]}
+
+        Returns:
+            MongoWriteItem: item holding the write requests
+        """
+        return MongoWriteItem(write_reqs=write_reqs)
+
+    def apply_selection(self, obj: BaseClass) -> BaseClass:
+        """Restricts an object to the selection of the spider, if any.
+
+        Args:
+            obj (BaseClass): object dealing with the crawl
+
+        Returns:
+            BaseClass: the same object
+        """
+        if len(self.selection) > 0:
+            obj.select(**self.selection)
+        return obj
 
     def get_country_code_obj(self) -> CountryCodes:
         """Returns an object to deal with parsing country codes.
@@ -22,7 +130,7 @@ class BaseSpider(scrapy.Spider):
         Returns:
             CountryCodes: an object of class CountryCodes
         """
-        return CountryCodes()
+        return self.apply_selection(CountryCodes())
 
     def get_comp_name_obj(self) -> CompetitionNames:
         """Returns an object to deal with parsing competition names.
@@ -30,7 +138,7 @@ class BaseSpider(scrapy.Spider):
         Returns:
             CompetitionNames: an object of class CompetitionNames
         """
-        return CompetitionNames()
+        return self.apply_selection(CompetitionNames())
 
     def get_club_name_obj(self) -> ClubNames:
         """Returns an object to deal with parsing club names.
@@ -38,7 +146,7 @@ class BaseSpider(scrapy.Spider):
         Returns:
             ClubNames: an object of class ClubNames
         """
-        return ClubNames()
+        return self.apply_selection(ClubNames())
 
     def get_fixture_obj(self) -> Fixtures:
         """Returns an object to deal with parsing fixtures.
@@ -46,7 +154,7 @@ class BaseSpider(scrapy.Spider):
         Returns:
             Fixtures: an object of class Fixtures
         """
-        return Fixtures()
+        return self.apply_selection(Fixtures())
 
     def get_injury_obj(self) -> Injuries:
         """Returns an object to deal with parsing injuries.
@@ -54,4 +162,12 @@ class BaseSpider(scrapy.Spider):
         Returns:
             Injuries: an object of class Injuries
         """
-        return Injuries()
+        return self.apply_selection(Injuries())
+
+    def get_index_obj(self) -> Indexes:
+        """Returns an object to deal with the indexes of the database.
+
+        Returns:
+            Indexes: an object of class Indexes
+        """
+        return Indexes()
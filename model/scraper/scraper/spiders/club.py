@@ -1,13 +1,32 @@
 from .base import BaseSpider, scrapy
+from .fixture import FixturePagesMixin
 from pprint import pp
 
 
-class ClubNameSpider(BaseSpider):
+class ClubNameSpider(FixturePagesMixin, BaseSpider):
     name = "club_name"
 
-    def __init__(self):
-        super().__init__()
+    def __init__(
+        self, stream_fixtures: str = "false", source: str = "club", *args, **kwargs
+    ):
+        """
+        Args:
+            stream_fixtures (str, optional): "true" to request the fixtures of the clubs of a league and season as soon as
+                they are parsed, in the same crawl, instead of leaving them to the fixture spider. The streamed pages
+                are written like the ones of the fixture spider crawling all the seasons, and the fixture spider leaves
+                them out when given skip_pages_since. Defaults to "false".
+            source (str, optional): where the streamed league fixtures are scraped from, as for the fixture spider.
+                Defaults to "club".
+        """
+        super().__init__(*args, **kwargs)
         self.club_names = self.get_club_name_obj()
+        self.stream_fixtures = stream_fixtures.lower() == "true"
+        self.fixtures = self.get_fixture_obj() if self.stream_fixtures else None
+        self.source = source
+        # hashes of the fixture tables recorded by the last crawl, {(page, name, season): hash}
+        self.page_hashes: dict = {}
+        # pages skipped because of an unchanged hash, [(page, name, season)]
+        self.unchanged_pages: list = []
 
     def start_requests(self):
         """Checks if teams for all the leagues in all seasons are available; if not then generates url for each league each season and sends request
@@ -15,6 +34,13 @@ class ClubNameSpider(BaseSpider):
         Yields:
             _type_: scrapy.Request
         """
+        if self.stream_fixtures and self.fixtures.is_shadow_refresh_running():
+            self.club_names.logger.warning(
+                "Not streaming the fixtures because a shadow refresh of the fixture collections is running."
+            )
+            self.stream_fixtures = False
+        if self.stream_fixtures:
+            self.page_hashes = self.fixtures.get_fixture_page_hashes()
         have_all_club_names = self.club_names.have_all_leagues_seasons_club_names()
         if not have_all_club_names:
             all_clubs_urls_info = self.club_names.get_all_seasons_leagues_url()
@@ -35,13 +61,78 @@ class ClubNameSpider(BaseSpider):
                 "Club names not parsed because they were found in the database."
             )
 
-    def parse(self, response, league, season):
-        """Parses the club names from the response and writes them
+    async def parse(self, response, league, season):
+        """Parses the club names from the response and yields their writes
 
         Args:
             response (_type_): response object from spider
             league (_type_): league name
             season (_type_): season
         """
-        clubs = self.club_names.parse_club_names(response, league, season)
-        self.club_names.record_in_db(clubs)
+        clubs = await self.run_parser(
+            self.club_names, "parse_club_names", response, league, season
+        )
+        uow = self.get_unit_of_work()
+        uow.stage(self.club_names.get_club_info_write_reqs(season, clubs["clubs"]))
+        uow.stage(self.club_names.get_league_clubs_write_reqs(clubs))
+        yield self.get_write_item(uow.write_reqs)
+        if self.stream_fixtures:
+            # the urls are built from the parsed clubs, which may not be written to the database yet
+            streamed = [
+                club
+                for club in clubs["clubs"]
+                if self.fixtures.is_selected(club=club["name"])
+            ]
+            if self.source == "league":
+                yield scrapy.Request(
+                    url=self.fixtures.get_league_schedule_url(league, season),
+                    callback=self.parse_schedule,
+                    cb_kwargs={"league": league, "season": season},
+                )
+            for club in streamed:
+                yield scrapy.Request(
+                    url=self.fixtures.get_fixture_url_from_club_url(
+                        club["url"], season
+                    ),
+                    callback=self.parse_fixtures,
+                    cb_kwargs={
+                        "team": club["name"],
+                        "season": season,
+                        "skip_competitions": self.get_skip_competitions(league),
+                    },
+                )
+            self.crawler.stats.inc_value("fixtures/streamed_requests", len(streamed))
+
+    async def parse_fixtures(self, response, team, season, skip_competitions=None):
+        """Parses the fixtures of a club streamed from the league it was found in and yields their writes
+
+        Args:
+            response (_type_): response object from spider
+            team (str): Name of the club
+            season (str): Start year of season
+            skip_competitions (list, optional): competitions left out of the page. Defaults to None.
+        """
+        async for item in self.record_club_page(
+            response, team, season, skip_competitions
+        ):
+            yield item
+
+    def parse_schedule(self, response, league, season):
+        """Parses the fixtures of the schedule of a streamed league and yields their writes
+
+        Args:
+            response (_type_): response object from spider
+            league (str): Name of the league
+            season (str): Start year of season
+        """
+        yield from self.record_schedule_page(response, league, season)
+
+    def closed(self, reason):
+        """Records the crawl of the streamed pages whose fixture table was unchanged.
+
+        Args:
+            reason (str): reason why the spider was closed
+        """
+        if self.stream_fixtures:
+            self.touch_unchanged_pages()
+        super().closed(reason)
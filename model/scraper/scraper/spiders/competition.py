@@ -5,8 +5,8 @@ from pprint import pp
 class CompNameSpider(BaseSpider):
     name = "comp_name"
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         self.comp_names = self.get_comp_name_obj()
 
     def start_requests(self):
@@ -50,7 +50,7 @@ class CompNameSpider(BaseSpider):
         if not have_all_intl_comps:
             self.comp_names.logger.info("Scraping url to parse intl competition names.")
             yield scrapy.Request(
-                url="https://www.transfermarkt.com/wettbewerbe/europa",
+                url=f"{self.comp_names.base_url}/wettbewerbe/europa",
                 callback=self.parse_intl_comp,
             )
         else:
@@ -58,30 +58,35 @@ class CompNameSpider(BaseSpider):
                 "Intl competition names not scraped because they were found in the database."
             )
 
-    def parse_domestic_comp(self, response, country):
-        """Parses the competition names from the response and writes them
+    async def parse_domestic_comp(self, response, country):
+        """Parses the competition names from the response and yields their writes
 
         Args:
             response (_type_): response object from spider
             country (_type_): country name
         """
-        comps = self.comp_names.parse_domestic_comp_names(response, country)
-        self.comp_names.record_in_db(comps)
+        comps = await self.run_parser(
+            self.comp_names, "parse_domestic_comp_names", response, country
+        )
+        yield self.get_write_item(self.comp_names.get_write_reqs(comps))
 
     def parse_intl_comp(self, response):
-        """Parses the intl (UEFA) competition names from the response and writes them
+        """Parses the intl (UEFA) competition names from the response and yields their writes
 
         Args:
             response (_type_): response object from spider
         """
         comps = self.comp_names.parse_intl_comp_names(response)
-        self.comp_names.record_in_db(comps)
+        yield self.get_write_item(self.comp_names.get_write_reqs(comps))
 
     def update_current_season(self, response, country: str):
-        """Updates the current season for the country and records in the database
+        """Parses the current season for the country and yields its write
 
         Args:
             response (_type_): response object from the spider
             country (_type_): country name in string
         """
-        self.comp_names.update_current_seasons_in_db(response, country)
+        current_season = self.comp_names.parse_current_season(response)
+        yield self.get_write_item(
+            self.comp_names.get_current_season_write_reqs(country, current_season)
+        )
@@ -5,8 +5,8 @@ from pprint import pp
 class CountryCodeSpider(BaseSpider):
     name = "country_code"
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         self.country_codes = self.get_country_code_obj()
 
     def start_requests(self):
@@ -17,7 +17,7 @@ class CountryCodeSpider(BaseSpider):
         """
         have_all_country_codes: bool = self.country_codes.have_all_country_codes()
         if not have_all_country_codes:
-            url = "https://www.transfermarkt.com/wettbewerbe/europa"
+            url = f"{self.country_codes.base_url}/wettbewerbe/europa"
             yield scrapy.Request(url=url, callback=self.parse)
             self.country_codes.logger.info("Scraping URL because all codes not found.")
         else:
@@ -30,4 +30,4 @@ class CountryCodeSpider(BaseSpider):
             response (_type_): response object from spider
         """
         competitions = self.country_codes.parse_country_codes(response)
-        self.country_codes.record_in_db(competitions)
+        yield self.get_write_item(self.country_codes.get_write_reqs(competitions))
@@ -1,51 +1,406 @@
+import datetime
 from .base import BaseSpider, scrapy
 
 
-class FixtureSpider(BaseSpider):
+class FixturePagesMixin:
+    """Records the fixture pages of the clubs and the schedules of the leagues, leaving out the ones whose fixture
+    table is unchanged since the last crawl.
+
+    Shared by the spiders scraping fixture pages, which set self.fixtures, self.source, self.page_hashes and
+    self.unchanged_pages, and call touch_unchanged_pages when they close.
+    """
+
+    def get_skip_competitions(self, league: str) -> list:
+        """Returns the competitions left out of the club pages of a league, as they come from its schedule
+
+        Args:
+            league (str): Name of the league of the club
+
+        Returns:
+            list: competition names
+        """
+        return [league] if self.source == "league" else []
+
+    def is_page_unchanged(self, page: str, name: str, season: str, page_hash: str):
+        """Checks if the fixture table of a page is the same as in the last crawl, counting the skipped pages
+
+        Args:
+            page (str): "club" for the fixture page of a club, "league" for the schedule of a league
+            name (str): Name of the club or the league
+            season (str): Start year of season
+            page_hash (str): hash of the fixture table
+
+        Returns:
+            bool: True if unchanged else False.
+        """
+        if self.page_hashes.get((page, name, season)) == page_hash:
+            self.unchanged_pages.append((page, name, season))
+            self.crawler.stats.inc_value("fixtures/pages_short_circuited")
+            return True
+        return False
+
+    def touch_unchanged_pages(self):
+        """Keeps the unchanged pages from looking stale to the next incremental refresh"""
+        self.fixtures.touch_fixture_pages(self.unchanged_pages)
+
+    async def record_club_page(self, response, team, season, skip_competitions=None):
+        """Parses the fixtures of a club page and yields their writes along with the hash of the page
+
+        Args:
+            response (_type_): response object from spider
+            team (str): Name of the club
+            season (str): Start year of season
+            skip_competitions (list, optional): competitions left out of the page. Defaults to None.
+        """
+        page_hash = self.fixtures.get_fixture_page_hash(response, "club")
+        if self.is_page_unchanged("club", team, season, page_hash):
+            return
+        fixture_info = await self.run_parser(
+            self.fixtures,
+            "parse_all_fixtures_info",
+            response,
+            team,
+            season,
+            skip_competitions,
+        )
+        # the hash is written after the fixtures, so a failed write gets the page parsed again
+        write_reqs = (
+            self.get_unit_of_work()
+            .stage(self.fixtures.get_fixture_write_reqs(fixture_info))
+            .stage(
+                self.fixtures.get_fixture_page_write_reqs(
+                    "club", team, season, page_hash
+                )
+            )
+            .write_reqs
+        )
+        # number of write operations per page, to keep track of the round trips to the database
+        for col, reqs in write_reqs.items():
+            self.crawler.stats.inc_value(f"fixtures/db_ops/{col}", len(reqs))
+        self.crawler.stats.inc_value("fixtures/pages_recorded")
+        yield self.get_write_item(write_reqs)
+
+    def record_schedule_page(self, response, league, season):
+        """Parses the fixtures of a league schedule and yields their writes along with the hash of the page
+
+        Args:
+            response (_type_): response object from spider
+            league (str): Name of the league
+            season (str): Start year of season
+        """
+        page_hash = self.fixtures.get_fixture_page_hash(response, "league")
+        if self.is_page_unchanged("league", league, season, page_hash):
+            return
+        fixture_infos = self.fixtures.parse_league_schedule(response, league, season)
+        write_reqs = (
+            self.get_unit_of_work()
+            .stage(self.fixtures.get_league_schedule_write_reqs(fixture_infos))
+            .stage(
+                self.fixtures.get_fixture_page_write_reqs(
+                    "league", league, season, page_hash
+                )
+            )
+            .write_reqs
+        )
+        for col, reqs in write_reqs.items():
+            self.crawler.stats.inc_value(f"fixtures/db_ops/{col}", len(reqs))
+        self.crawler.stats.inc_value("fixtures/schedules_recorded")
+        yield self.get_write_item(write_reqs)
+
+
+class FixtureSpider(FixturePagesMixin, BaseSpider):
     name = "fixture"
 
-    def __init__(self):
-        super().__init__()
+    def __init__(
+        self,
+        refresh_mode: str = "shadow",
+        source: str = "club",
+        staleness_hours: str = "72",
+        skip_pages_since: str = None,
+        *args,
+        **kwargs,
+    ):
+        """
+        Args:
+            refresh_mode (str, optional): how the current season is refreshed once all the previous fixtures are stored;
+                "shadow" writes into staging collections swapped in when the crawl finishes, "reset" unsets the current
+                season of every club before scraping it again, "incremental" only scrapes the clubs that have played
+                since their last crawl or whose page is older than staleness_hours. Defaults to "shadow".
+            source (str, optional): where the league fixtures are scraped from; "club" parses them from the fixture
+                page of every club, "league" parses them from the schedule page of every league and keeps the club
+                pages for the cup and European fixtures. Defaults to "club".
+            staleness_hours (str, optional): hours after which an incremental refresh scrapes a page again even if its
+                club hasn't played. Defaults to "72".
+            skip_pages_since (str, optional): ISO time since which the pages already recorded are left out, for the
+                pages streamed by the club_name spider of the same crawl. A reset refresh scrapes them again, as it
+                unsets their season. Defaults to None.
+        """
+        super().__init__(*args, **kwargs)
         self.fixtures = self.get_fixture_obj()
+        self.refresh_mode = refresh_mode
+        self.source = source
+        self.staleness = datetime.timedelta(hours=float(staleness_hours))
+        # hashes of the fixture tables recorded by the last crawl, {(page, name, season): hash}
+        self.page_hashes: dict = {}
+        # pages skipped because of an unchanged hash, [(page, name, season)]
+        self.unchanged_pages: list = []
+        # checkpointed crawl of all the seasons, resumed by the next crawl if it doesn't finish
+        self.crawl_job = None
+        self.pages_done = 0
+        self.run_pages_done = 0
+        self.run_started = None
+        # last time the lock of a shadow refresh was renewed
+        self.refresh_lock_renewed = None
+        # whether another refresh took the lock over, its staging collections aren't this crawl's any more
+        self.refresh_lock_lost = False
+        # whether the upcoming matches that have passed are deleted from the live collections once the crawl finished
+        self.delete_past_upcoming = False
+        # pages recorded since then were streamed by the club_name spider of the same crawl
+        self.skip_pages_since = (
+            None
+            if skip_pages_since is None
+            else datetime.datetime.fromisoformat(skip_pages_since)
+        )
 
     def start_requests(self):
+        # the writes into the live collections would be lost when the running refresh swaps its copies in
+        if self.fixtures.is_shadow_refresh_running():
+            self.fixtures.logger.error(
+                "Not scraped the fixtures because a shadow refresh of the fixture collections is running."
+            )
+            return
         # getting all the fixtures for all the seasons if not available
         have_all_fixtures_parsed: bool = self.fixtures.have_all_fixtures()
+        # a reset unsets the current season, so its pages have to be written even when they haven't changed
+        if not (have_all_fixtures_parsed and self.refresh_mode == "reset"):
+            self.page_hashes = self.fixtures.get_fixture_page_hashes()
         if not have_all_fixtures_parsed:
+            requests: list = []
+            if self.source == "league":
+                requests += list(self.get_schedule_requests(current_season_only=False))
             all_fixture_urls = self.fixtures.get_all_club_all_season_fixture_urls()
             for league, fixtures in all_fixture_urls.items():
                 self.fixtures.logger.info(f"Scraping fixture urls for {league}.")
                 for fixture in fixtures:
-                    yield scrapy.Request(
-                        url=fixture["url"],
-                        callback=self.parse,
-                        cb_kwargs={
-                            "team": fixture["team"],
-                            "season": fixture["season"],
-                        },
+                    requests.append(
+                        scrapy.Request(
+                            url=fixture["url"],
+                            callback=self.parse,
+                            cb_kwargs={
+                                "team": fixture["team"],
+                                "season": fixture["season"],
+                                "skip_competitions": self.get_skip_competitions(league),
+                            },
+                        )
                     )
+            yield from self.resume_crawl_job(self.skip_streamed_pages(requests))
         else:
             self.fixtures.logger.info(
                 "Not scraped all the previous fixtures because previous fixtures are stored in the database."
             )
-            # resetting all current season fixtures
-            self.fixtures.reset_current_season_fixtures()
-            # getting all the fixtures of only the current season to update played and upcoming fixtures
-            current_fixture_urls = self.fixtures.get_all_club_current_season_urls()
+            if self.refresh_mode == "incremental":
+                # the planned clubs replace their current season in the live collections
+                self.fixtures.replace_seasons = True
+                self.delete_past_upcoming = True
+                plan = self.fixtures.get_fixture_refresh_plan(self.staleness)
+                self.crawler.stats.set_value(
+                    "fixtures/planned_clubs",
+                    sum([len(clubs) for clubs in plan.values()]),
+                )
+                current_fixture_urls = (
+                    self.fixtures.get_planned_club_current_season_urls(plan)
+                )
+            else:
+                # getting all the fixtures of only the current season to update played and upcoming fixtures
+                current_fixture_urls = self.fixtures.get_all_club_current_season_urls()
+            requests: list = []
+            if self.source == "league":
+                requests += list(
+                    self.get_schedule_requests(
+                        current_season_only=True,
+                        leagues=list(current_fixture_urls.keys()),
+                    )
+                )
             for league, fixtures in current_fixture_urls.items():
                 self.fixtures.logger.info(
                     f"Scraping fixture urls for {league} to update upcoming fixtures."
                 )
                 for fixture in fixtures:
-                    yield scrapy.Request(
-                        url=fixture["url"],
-                        callback=self.parse,
-                        cb_kwargs={
-                            "team": fixture["team"],
-                            "season": fixture["season"],
-                        },
+                    requests.append(
+                        scrapy.Request(
+                            url=fixture["url"],
+                            callback=self.parse,
+                            cb_kwargs={
+                                "team": fixture["team"],
+                                "season": fixture["season"],
+                                "skip_competitions": self.get_skip_competitions(league),
+                            },
+                        )
+                    )
+            # a reset unsets the current season of the streamed pages as well
+            if not self.refresh_mode == "reset":
+                requests = self.skip_streamed_pages(requests)
+                if len(requests) == 0:
+                    self.fixtures.logger.info(
+                        "Not refreshed the current season because none of its pages are left to scrape."
                     )
+                    return
+            if self.refresh_mode == "shadow":
+                # writing the current season into staging collections, live ones are kept until the crawl finishes
+                if not self.fixtures.start_shadow_refresh():
+                    return
+                self.refresh_lock_renewed = datetime.datetime.now()
+            elif self.refresh_mode == "reset":
+                # resetting all current season fixtures
+                self.fixtures.reset_current_season_fixtures()
+            yield from requests
+
+    def get_page_key(self, request: scrapy.Request) -> tuple:
+        """Returns the fixture page a request is for
+
+        Args:
+            request (scrapy.Request): request of a club fixture page or a league schedule
+
+        Returns:
+            tuple: (page, name, season)
+        """
+        if request.callback == self.parse_schedule:
+            return ("league", request.cb_kwargs["league"], request.cb_kwargs["season"])
+        return ("club", request.cb_kwargs["team"], request.cb_kwargs["season"])
+
+    def skip_streamed_pages(self, requests: list) -> list:
+        """Leaves out the pages recorded since skip_pages_since, as the club_name spider streamed them
+
+        Args:
+            requests (list): requests of the fixture pages
+
+        Returns:
+            list: requests of the pages that weren't streamed
+        """
+        if self.skip_pages_since is None:
+            return requests
+        streamed = self.fixtures.get_completed_pages(self.skip_pages_since)
+        remaining = [
+            request
+            for request in requests
+            if self.get_page_key(request) not in streamed
+        ]
+        self.crawler.stats.set_value(
+            "fixtures/pages_streamed", len(requests) - len(remaining)
+        )
+        return remaining
+
+    def resume_crawl_job(self, requests: list) -> list:
+        """Starts or resumes the checkpointed crawl of all the seasons, leaving out the pages it already recorded
+
+        Args:
+            requests (list): requests of all the pages of the crawl
+
+        Returns:
+            list: requests of the pages still missing
+        """
+        self.crawl_job = self.fixtures.start_crawl_job(self.name, len(requests))
+        completed = self.fixtures.get_completed_pages(self.crawl_job["started_at"])
+        missing = [
+            request
+            for request in requests
+            if self.get_page_key(request) not in completed
+        ]
+        self.pages_done = len(requests) - len(missing)
+        self.run_started = datetime.datetime.now()
+        self.crawler.stats.set_value("fixtures/job_pages_total", len(requests))
+        self.crawler.stats.set_value("fixtures/job_pages_resumed", self.pages_done)
+        return missing
+
+    def log_progress(self):
+        """Counts a page of the checkpointed crawl and logs the completion and the ETA every PROGRESS_EVERY pages"""
+        if self.crawl_job is None:
+            return
+        self.pages_done += 1
+        self.run_pages_done += 1
+        if not self.run_pages_done % self.settings.getint("PROGRESS_EVERY", 25) == 0:
+            return
+        total = self.crawl_job["total"]
+        elapsed = datetime.datetime.now() - self.run_started
+        eta = elapsed / self.run_pages_done * (total - self.pages_done)
+        self.fixtures.logger.info(
+            f"Progress: {self.pages_done}/{total} pages ({100 * self.pages_done / total:.1f}%), ETA {eta}."
+        )
+
+    def renew_refresh_lock(self):
+        """Renews the lock of a running shadow refresh once a quarter of its lease has passed"""
+        if self.refresh_lock_renewed is None:
+            return
+        now = datetime.datetime.now()
+        if now - self.refresh_lock_renewed < self.fixtures.shadow_refresh_lease / 4:
+            return
+        if not self.fixtures.acquire_shadow_refresh_lock():
+            self.fixtures.logger.error(
+                "The lock of the shadow refresh was taken over by another refresh, stopping the crawl."
+            )
+            self.refresh_lock_renewed = None
+            self.refresh_lock_lost = True
+            self.crawler.engine.close_spider(self, "shadow_refresh_lock_lost")
+            return
+        self.refresh_lock_renewed = now
+
+    def get_schedule_requests(self, current_season_only: bool, leagues: list = None):
+        """Yields the requests for the league schedules
+
+        Args:
+            current_season_only (bool): whether only the current season of the leagues is scraped
+            leagues (list, optional): leagues whose schedules are scraped. Defaults to None for all the leagues.
+        """
+        for schedule in self.fixtures.get_all_league_schedule_urls(
+            current_season_only=current_season_only
+        ):
+            if leagues is not None and schedule["league"] not in leagues:
+                continue
+            yield scrapy.Request(
+                url=schedule["url"],
+                callback=self.parse_schedule,
+                cb_kwargs={"league": schedule["league"], "season": schedule["season"]},
+            )
+
+    def closed(self, reason):
+        """Swaps in the staging collections of a shadow refresh once the crawl has finished with all its writes.
+
+        Args:
+            reason (str): reason why the spider was closed
+        """
+        if self.refresh_lock_lost:
+            # the staging collections belong to the refresh holding the lock now
+            self.fixtures.abort_shadow_refresh()
+        self.touch_unchanged_pages()
+        # pages whose writes the pipeline dropped are missing, they are crawled again by the next crawl
+        complete = (
+            reason == "finished"
+            and self.crawler.stats.get_value("mongo_pipeline/ops_dropped", 0) == 0
+        )
+        # an unfinished crawl job is resumed by the next crawl
+        if self.crawl_job is not None and complete:
+            self.fixtures.finish_crawl_job(self.crawl_job)
+        # the crawl has recorded the matches played meanwhile, a failed one leaves them to readers until the next
+        if self.delete_past_upcoming and complete:
+            self.fixtures.delete_past_upcoming_matches()
+        try:
+            if len(self.fixtures.refresh_collections) > 0:
+                if complete:
+                    self.fixtures.finish_shadow_refresh()
+                else:
+                    self.fixtures.abort_shadow_refresh()
+        finally:
+            super().closed(reason)
+
+    async def parse(self, response, team, season, skip_competitions=None):
+        self.log_progress()
+        self.renew_refresh_lock()
+        async for item in self.record_club_page(
+            response, team, season, skip_competitions
+        ):
+            yield item
 
-    def parse(self, response, team, season):
-        fixture_info = self.fixtures.parse_all_fixtures_info(response, team, season)
-        self.fixtures.record_fixtures_in_db(fixture_info)
+    def parse_schedule(self, response, league, season):
+        self.log_progress()
+        self.renew_refresh_lock()
+        yield from self.record_schedule_page(response, league, season)
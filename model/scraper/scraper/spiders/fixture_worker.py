@@ -0,0 +1,174 @@
+import datetime
+import os
+import socket
+from scrapy import signals
+from scrapy.exceptions import DontCloseSpider
+from twisted.internet import task
+from .base import scrapy
+from .fixture import FixtureSpider
+
+
+class FixtureWorkerSpider(FixtureSpider):
+    """Worker of the frontier collection, any number of which can crawl the published fixture tasks together.
+
+    A task is claimed with an expiring lease only when the crawl has room for another request, and acknowledged
+    together with the writes of its page. Tasks of a worker that died are claimed again once their lease expires.
+    An ack dropped by the pipeline is made up for from the recorded page when the worker is idle or stops. A task
+    whose page can't be fetched is released, and abandoned once it is out of attempts, as is a task whose lease
+    expired on its last attempt; abandoned tasks stay in the frontier until they are retried. The leases of the
+    tasks still being crawled are renewed every third of the lease, as a request can wait out backoffs and
+    Retry-After longer than a lease.
+    Politeness limits apply per worker, so the total concurrency is the number of workers times
+    CONCURRENT_REQUESTS_PER_DOMAIN.
+    """
+
+    name = "fixture_worker"
+
+    def __init__(
+        self,
+        worker_id: str = None,
+        lease_seconds: str = "300",
+        max_attempts: str = "3",
+        *args,
+        **kwargs,
+    ):
+        """
+        Args:
+            worker_id (str, optional): id of the worker recorded on its leases. Defaults to None for host-pid.
+            lease_seconds (str, optional): seconds a claimed task is reserved for the worker. Defaults to "300".
+            max_attempts (str, optional): claims after which a failing task is given up. Defaults to "3".
+        """
+        super().__init__(*args, **kwargs)
+        self.worker_id = (
+            f"{socket.gethostname()}-{os.getpid()}" if worker_id is None else worker_id
+        )
+        self.lease = datetime.timedelta(seconds=int(lease_seconds))
+        self.max_attempts = int(max_attempts)
+        # tasks claimed whose page hasn't been parsed or failed yet, {task _id}
+        self.crawling_tasks: set = set()
+        self.lease_loop = None
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        crawler.signals.connect(spider.spider_idle, signal=signals.spider_idle)
+        crawler.signals.connect(spider.spider_opened, signal=signals.spider_opened)
+        return spider
+
+    def spider_opened(self, spider):
+        self.lease_loop = task.LoopingCall(self.renew_leases)
+        self.lease_loop.start(self.lease.total_seconds() / 3, now=False)
+
+    def renew_leases(self):
+        """Renews the leases of the tasks still being crawled"""
+        self.crawler.stats.inc_value(
+            "frontier/leases_renewed",
+            self.fixtures.renew_fixture_task_leases(
+                self.worker_id, list(self.crawling_tasks), self.lease
+            ),
+        )
+
+    def start_requests(self):
+        if self.fixtures.is_shadow_refresh_running():
+            self.fixtures.logger.error(
+                "Not claimed any task because a shadow refresh of the fixture collections is running."
+            )
+            return
+        self.page_hashes = self.fixtures.get_fixture_page_hashes()
+        # consumed lazily by the engine, so a task is only claimed once there is room for its request
+        while True:
+            request = self.claim_request()
+            if request is None:
+                return
+            yield request
+
+    def claim_request(self):
+        """Claims a task of the frontier and returns the request of its page
+
+        Returns:
+            scrapy.Request: request of the page, None if there is no task to claim
+        """
+        task = self.fixtures.claim_fixture_task(
+            self.worker_id, self.lease, self.max_attempts
+        )
+        if task is None:
+            return None
+        self.crawler.stats.inc_value("frontier/claimed")
+        self.crawling_tasks.add(task["_id"])
+        return scrapy.Request(
+            url=task["url"],
+            callback=self.parse_task,
+            errback=self.fail_task,
+            cb_kwargs={
+                "task_id": task["_id"],
+                "team": task["name"],
+                "season": task["season"],
+            },
+            meta={"task_attempts": task["attempts"]},
+            dont_filter=True,
+        )
+
+    def settle_tasks(self):
+        """Acknowledges the tasks of the pages recorded without their ack and abandons the ones out of attempts"""
+        self.crawler.stats.inc_value(
+            "frontier/acknowledged_from_pages",
+            self.fixtures.ack_recorded_fixture_tasks(self.worker_id),
+        )
+        self.crawler.stats.inc_value(
+            "frontier/abandoned", self.fixtures.abandon_fixture_tasks(self.max_attempts)
+        )
+
+    def fail_task(self, failure):
+        """Releases the task of a page that couldn't be fetched, abandoning it on its last attempt
+
+        Args:
+            failure (Failure): error of the request
+        """
+        request = failure.request
+        self.crawling_tasks.discard(request.cb_kwargs["task_id"])
+        abandon = request.meta["task_attempts"] >= self.max_attempts
+        self.fixtures.fail_fixture_task(
+            request.cb_kwargs["task_id"],
+            self.worker_id,
+            abandon,
+            repr(failure.value),
+        )
+        self.crawler.stats.inc_value(
+            "frontier/abandoned" if abandon else "frontier/released"
+        )
+
+    def spider_idle(self):
+        """Keeps the worker alive while other workers hold tasks whose lease can still expire"""
+        self.settle_tasks()
+        request = self.claim_request()
+        if request is not None:
+            self.crawler.engine.crawl(request)
+            raise DontCloseSpider
+        if self.fixtures.has_open_fixture_tasks(self.max_attempts):
+            raise DontCloseSpider
+
+    def closed(self, reason):
+        if self.lease_loop is not None and self.lease_loop.running:
+            self.lease_loop.stop()
+        # the unchanged pages are recorded first, so that their tasks can be acknowledged as well
+        self.touch_unchanged_pages()
+        self.unchanged_pages = []
+        self.settle_tasks()
+        self.fixtures.logger.info(
+            f"Worker {self.worker_id} stopped, frontier: {self.fixtures.get_frontier_status()}."
+        )
+        super().closed(reason)
+
+    async def parse_task(self, response, task_id, team, season):
+        uow = self.get_unit_of_work()
+        try:
+            async for item in self.parse(response, team, season):
+                uow.stage(item["write_reqs"])
+        finally:
+            # a page failing to parse lets its lease expire, so another attempt is made
+            self.crawling_tasks.discard(task_id)
+        # acknowledged after the writes of the page, so a failed write leaves the task to be claimed again; an ack
+        # dropped on its own is made up for by settle_tasks
+        uow.stage(self.fixtures.get_ack_fixture_task_write_reqs(task_id))
+        self.crawler.stats.inc_value("frontier/acknowledged")
+        yield self.get_write_item(uow.write_reqs)
@@ -7,8 +7,8 @@ class InjurySpider(BaseSpider):
     load_dotenv()
     name = "injury"
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         self.injuries = self.get_injury_obj()
 
     def start_requests(self):
@@ -1,17 +1,218 @@
 import json
 import os
+import re
 import datetime
+import hashlib
 import time
 import pymongo
 from dotenv import load_dotenv
 from pprint import pp
 import logging
+import socket
+import threading
+from pymongo import monitoring
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 
 
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Keeps counts of the connection pool events of the shared mongo client"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts: dict = {
+            "connections_created": 0,
+            "connections_closed": 0,
+            "checkouts": 0,
+            "checkout_failures": 0,
+            "open": 0,
+            "max_open": 0,
+            "in_use": 0,
+            "max_in_use": 0,
+        }
+
+    def get_stats(self) -> dict:
+        """Returns a snapshot of the pool statistics
+
+        Returns:
+            dict: {stat_name: count}
+        """
+        with self.lock:
+            return dict(self.counts)
+
+    def _inc(self, key: str, by: int = 1):
+        with self.lock:
+            self.counts[key] += by
+            if key == "open":
+                self.counts["max_open"] = max(
+                    self.counts["max_open"], self.counts["open"]
+                )
+            elif key == "in_use":
+                self.counts["max_in_use"] = max(
+                    self.counts["max_in_use"], self.counts["in_use"]
+                )
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._inc("connections_created")
+        self._inc("open")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._inc("connections_closed")
+        self._inc("open", -1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._inc("checkout_failures")
+
+    def connection_checked_out(self, event):
+        self._inc("checkouts")
+        self._inc("in_use")
+
+    def connection_checked_in(self, event):
+        self._inc("in_use", -1)
+
+
+class Resolver:
+    """In-memory view of competitions, all_leagues and all_clubs for resolving a club, league or country
+    without querying the database.
+    """
+
+    # collections the resolver is loaded from; writes to any of them invalidate it
+    COLLECTIONS = ("competitions", "all_leagues", "all_clubs")
+
+    def __init__(self, db):
+        # {country: competitions doc}
+        self.countries: dict = {
+            doc["country"]: doc
+            for doc in db.competitions.find(
+                filter={"country": {"$exists": True}}, projection={"_id": False}
+            )
+        }
+        # {league: country}
+        self.league_countries: dict = {
+            doc["competitions"]["First Tier"]["name"]: country
+            for country, doc in self.countries.items()
+            if "First Tier" in doc.get("competitions", {})
+        }
+        # {league: {season: [club_name]}}
+        self.leagues: dict = {
+            doc["name"]: doc.get("clubs", {})
+            for doc in db.all_leagues.find(projection={"_id": False})
+        }
+        # {club: all_clubs doc}
+        self.clubs: dict = {
+            doc["name"]: doc for doc in db.all_clubs.find(projection={"_id": False})
+        }
+        # {transfermarkt club code: club_name}
+        self.club_codes: dict = {
+            doc["code"]: name for name, doc in self.clubs.items() if "code" in doc
+        }
+        # {club: league}, from the latest season the club was found in
+        self.club_leagues: dict = {}
+        latest_seasons: dict = {}
+        for league, seasons in self.leagues.items():
+            for season, clubs in seasons.items():
+                for club in clubs:
+                    if season >= latest_seasons.get(club, ""):
+                        latest_seasons[club] = season
+                        self.club_leagues[club] = league
+
+    def get_league_country(self, league: str) -> str:
+        """Returns the country of a league, None if unknown"""
+        return self.league_countries.get(league)
+
+    def get_league_current_season(self, league: str) -> str:
+        """Returns the current season of a league, None if unknown"""
+        country = self.league_countries.get(league)
+        if country is None:
+            return None
+        return self.countries[country].get("current_season")
+
+    def get_club_context(self, club: str) -> dict:
+        """Returns the league, country and current season of a club
+
+        Args:
+            club (str): Name of the club
+
+        Returns:
+            dict: {league, country, current_season}, values are None if unknown
+        """
+        league = self.club_leagues.get(club)
+        return {
+            "league": league,
+            "country": self.get_league_country(league),
+            "current_season": self.get_league_current_season(league),
+        }
+
+
+class UnitOfWork:
+    """Stages the write requests of a callback so that they are committed together, with one bulk write per
+    collection, or handed over together to the write pipeline as a single item.
+    """
+
+    def __init__(self):
+        self.write_reqs: dict = {}
+
+    def stage(self, write_reqs: dict):
+        """Adds write requests to the unit of work
+
+        Args:
+            write_reqs (dict): {collection_name: [write requests]}
+
+        Returns:
+            UnitOfWork: itself, to chain the stages
+        """
+        for col, reqs in write_reqs.items():
+            self.write_reqs.setdefault(col, []).extend(reqs)
+        return self
+
+    def __len__(self) -> int:
+        return sum([len(reqs) for reqs in self.write_reqs.values()])
+
+    def commit(self, base, ordered: bool = True) -> dict:
+        """Writes the staged requests and empties the unit of work
+
+        Args:
+            base (BaseClass): object whose database is written to
+            ordered (bool, optional): whether the requests of a collection should be written in order. Defaults to True.
+
+        Returns:
+            dict: {collection_name: number of write operations sent}
+        """
+        ops_sent = base.bulk_write_reqs(self.write_reqs, ordered=ordered)
+        self.write_reqs = {}
+        return ops_sent
+
+
 class BaseClass:
+    # one mongo client (and hence one connection pool) per process, shared by all the subclasses
+    _mongo_client = None
+    _mongo_client_lock = threading.Lock()
+    _pool_stats = PoolStatsListener()
+    # resolver shared by all the subclasses, loaded on first use and dropped when its collections are written to
+    _resolver = None
+    _resolver_lock = threading.Lock()
+    # set in the worker processes of the parse pool, whose objects only parse pages
+    parse_only = False
+
     def __init__(self):
         self.DATA_DIR = os.path.abspath(
             os.path.join(os.path.dirname(__file__), "../../../../data")
@@ -21,6 +222,20 @@ class BaseClass:
         )
         load_dotenv()
         self.mongo_con = os.getenv("MONGODB_CLIENT", "mongodb://localhost:27017")
+        self.mongo_options = {
+            "maxPoolSize": int(os.getenv("MONGODB_MAX_POOL_SIZE", "10")),
+            "minPoolSize": int(os.getenv("MONGODB_MIN_POOL_SIZE", "0")),
+            "maxIdleTimeMS": int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "60000")),
+            "connectTimeoutMS": int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "10000")),
+            "serverSelectionTimeoutMS": int(
+                os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "10000")
+            ),
+            "socketTimeoutMS": int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", "60000")),
+        }
+        # site the urls are built on, pointed at a local stand-in to crawl without the real site
+        self.base_url = os.getenv(
+            "TRANSFERMARKT_BASE_URL", "https://www.transfermarkt.com"
+        ).rstrip("/")
         self.countries = ["England", "Spain", "Italy", "Germany", "France"]
         self.competitions = [
             "First Tier",
@@ -30,8 +245,12 @@ class BaseClass:
         ]
         self.current_year = datetime.datetime.now().year
         self.seasons: dict = {}
+        # leagues, seasons and clubs a targeted crawl is restricted to, None for all of them
+        self.selected_leagues = None
+        self.selected_seasons = None
+        self.selected_clubs = None
         self.logger = None
-        self.db_name = "football"
+        self.db_name = os.getenv("MONGODB_DB", "football")
         # BaseClass.set_logger("spiders", None)
 
     def set_logger(self, logger_name: str, file_path: str):
@@ -42,6 +261,9 @@ class BaseClass:
             file_path (str): Name/path of the file
         """
         self.logger = logging.getLogger(logger_name)
+        if BaseClass.parse_only:
+            # keeping the log files of the crawl from being truncated and the database from being queried
+            return
         self.logger.setLevel(logging.DEBUG)
         for handler in self.logger.handlers[:]:
             self.logger.removeHandler(handler)
@@ -80,6 +302,39 @@ class BaseClass:
         else:
             return os.path.getsize(file) <= 0
 
+    def get_client(self) -> pymongo.MongoClient:
+        """Returns the mongo client shared by the whole process, creating it on first use
+
+        Returns:
+            pymongo.MongoClient: shared client
+        """
+        if BaseClass._mongo_client is None:
+            with BaseClass._mongo_client_lock:
+                if BaseClass._mongo_client is None:
+                    BaseClass._mongo_client = pymongo.MongoClient(
+                        self.mongo_con,
+                        event_listeners=[BaseClass._pool_stats],
+                        **self.mongo_options,
+                    )
+        return BaseClass._mongo_client
+
+    @classmethod
+    def close_client(cls):
+        """Closes the shared mongo client if it has been created"""
+        with BaseClass._mongo_client_lock:
+            if BaseClass._mongo_client is not None:
+                BaseClass._mongo_client.close()
+                BaseClass._mongo_client = None
+
+    @classmethod
+    def get_pool_stats(cls) -> dict:
+        """Returns the connection pool statistics of the shared mongo client
+
+        Returns:
+            dict: {stat_name: count}
+        """
+        return BaseClass._pool_stats.get_stats()
+
     def get_db(self, db_name: str = None):
         """Returns db object
 
@@ -91,8 +346,50 @@ class BaseClass:
         """
         if db_name is None:
             db_name = self.db_name
-        mongo_client = pymongo.MongoClient(self.mongo_con)
-        return mongo_client[db_name]
+        return self.get_client()[db_name]
+
+    def get_resolver(self) -> Resolver:
+        """Returns the shared resolver, loading it from the database if it was invalidated
+
+        Returns:
+            Resolver: shared resolver
+        """
+        resolver = BaseClass._resolver
+        if resolver is None:
+            with BaseClass._resolver_lock:
+                if BaseClass._resolver is None:
+                    BaseClass._resolver = Resolver(self.get_db())
+                resolver = BaseClass._resolver
+        return resolver
+
+    @classmethod
+    def invalidate_resolver(cls, collections=Resolver.COLLECTIONS):
+        """Drops the shared resolver if any of the written collections is one it was loaded from
+
+        Args:
+            collections (optional): names of the written collections. Defaults to all the resolver's collections.
+        """
+        if any([col in Resolver.COLLECTIONS for col in collections]):
+            BaseClass._resolver = None
+
+    def bulk_write_reqs(self, write_reqs: dict, ordered: bool = True) -> dict:
+        """Sends the write requests with one bulk write per collection
+
+        Args:
+            write_reqs (dict): {collection_name: [write requests]}
+            ordered (bool, optional): whether the requests of a collection should be written in order. Defaults to True.
+
+        Returns:
+            dict: {collection_name: number of write operations sent}
+        """
+        db = self.get_db()
+        ops_sent: dict = {}
+        for col, reqs in write_reqs.items():
+            ops_sent[col] = len(reqs)
+            if len(reqs) > 0:
+                db[col].bulk_write(reqs, ordered=ordered)
+        self.invalidate_resolver(write_reqs.keys())
+        return ops_sent
 
     def set_seasons_per_league(self):
         """Creates a dict of season list for each country."""
@@ -132,6 +429,120 @@ class BaseClass:
                 for country in self.countries
             }
 
+    def select(
+        self,
+        countries: list = None,
+        leagues: list = None,
+        seasons: list = None,
+        clubs: list = None,
+    ):
+        """Restricts the urls and the completeness checks to a selection of countries, leagues, seasons and clubs.
+
+        The clubs narrow the leagues, and the leagues the countries, when the database already knows where they
+        belong, so a targeted refresh only scrapes the pages leading to the selection.
+
+        Args:
+            countries (list, optional): country names. Defaults to None for all of them.
+            leagues (list, optional): league names. Defaults to None for all of them.
+            seasons (list, optional): start years of the seasons. Defaults to None for all of them.
+            clubs (list, optional): club names. Defaults to None for all of them.
+        """
+        resolver = self.get_resolver()
+        if clubs is not None:
+            self.selected_clubs = list(clubs)
+            club_leagues = {
+                club: [
+                    league
+                    for league, league_seasons in resolver.leagues.items()
+                    if any([club in names for names in league_seasons.values()])
+                ]
+                for club in clubs
+            }
+            if leagues is None and all([len(l) > 0 for l in club_leagues.values()]):
+                leagues = sorted(set(sum(club_leagues.values(), [])))
+        if leagues is not None:
+            self.selected_leagues = list(leagues)
+            league_countries = [resolver.get_league_country(l) for l in leagues]
+            if countries is None and all([c is not None for c in league_countries]):
+                countries = league_countries
+        if countries is not None:
+            self.countries = [c for c in self.countries if c in countries]
+        if seasons is not None:
+            self.selected_seasons = [str(season) for season in seasons]
+        self.seasons = {
+            country: [
+                season
+                for season in country_seasons
+                if self.selected_seasons is None or season in self.selected_seasons
+            ]
+            for country, country_seasons in self.seasons.items()
+            if country in self.countries
+        }
+        self.logger.debug(
+            f"SELECTED: {self.countries}, {self.selected_leagues}, {self.selected_seasons}, {self.selected_clubs}"
+        )
+        self.logger.info("Restricted the crawl to the selection.")
+
+    def has_selection(self) -> bool:
+        """Checks if the crawl is restricted to a selection of leagues, seasons or clubs
+
+        Returns:
+            bool: True if restricted else False.
+        """
+        return any(
+            [
+                self.selected_leagues is not None,
+                self.selected_seasons is not None,
+                self.selected_clubs is not None,
+            ]
+        )
+
+    def is_selected(
+        self, league: str = None, season: str = None, club: str = None
+    ) -> bool:
+        """Checks if a league, a season and a club are in the selection, leaving out the ones not given
+
+        Args:
+            league (str, optional): Name of the league. Defaults to None.
+            season (str, optional): Start year of season. Defaults to None.
+            club (str, optional): Name of the club. Defaults to None.
+
+        Returns:
+            bool: True if selected else False.
+        """
+        if league is not None:
+            country = self.get_resolver().get_league_country(league)
+            if country is not None and country not in self.countries:
+                return False
+            if (
+                self.selected_leagues is not None
+                and league not in self.selected_leagues
+            ):
+                return False
+        if season is not None and self.selected_seasons is not None:
+            if season not in self.selected_seasons:
+                return False
+        if club is not None and self.selected_clubs is not None:
+            if club not in self.selected_clubs:
+                return False
+        return True
+
+    def get_selected_leagues(self) -> dict:
+        """Returns the clubs of the selected leagues in the selected seasons
+
+        Returns:
+            dict: {league: {season: [club_name]}}
+        """
+        return {
+            league: {
+                season: [club for club in clubs if self.is_selected(club=club)]
+                for season, clubs in seasons.items()
+                if self.is_selected(season=season)
+            }
+            for league, seasons in self.get_resolver().leagues.items()
+            if self.is_selected(league=league)
+        }
+
     def init_selenium_web_driver(self):
         chrome_options = Options()
         chrome_options.add_experimental_option("detach", True)
@@ -228,62 +639,34 @@ class CountryCodes(BaseClass):
         super().write_to_json_file(self.FILE, json_content)
         self.logger.info("Written to json file.")
 
+    def get_write_reqs(self, db_content: list) -> dict:
+        """Builds the write requests that complete incomplete data, or add missing data
+
+        Args:
+            db_content (list): list of dictionaries in the format [{country: code},]
+
+        Returns:
+            dict: {collection_name: [write requests]}
+        """
+        # documents with a code but no country are deleted by have_all_country_codes before parsing,
+        # so a single upsert per country completes, corrects or inserts its code
+        update_reqs = [
+            pymongo.UpdateOne(
+                filter={"country": data["country"]},
+                update={"$set": {"country_code": data["country_code"]}},
+                upsert=True,
+            )
+            for data in db_content
+        ]
+        return {"competitions": update_reqs}
+
     def record_in_db(self, db_content: list):
         """Records the data in db by completing incomplete data, or adding missing data
 
         Args:
             db_content (list): list of dictionaries in the format [{country: code},]
         """
-        db = self.get_db()
-        collection = db.competitions
-        update_reqs = (
-            # only has country, no code
-            [
-                pymongo.UpdateOne(
-                    filter={
-                        "country": data["country"],
-                        "country_code": {"$exists": False},
-                    },
-                    update={"$set": data},
-                )
-                for data in db_content
-            ]
-            # stored code doesn't match parsed code
-            + [
-                pymongo.UpdateOne(
-                    filter={
-                        "country": data["country"],
-                        "country_code": {"$ne": False},
-                    },
-                    update={"$set": {"country_code": data["country_code"]}},
-                )
-                for data in db_content
-            ]
-            # only has code, no country
-            + [
-                pymongo.UpdateOne(
-                    filter={
-                        "country": {"$exists": False},
-                        "country_code": data["country_code"],
-                    },
-                    update={"$set": data},
-                )
-                for data in db_content
-            ]
-            # has no country, no code
-            + [
-                pymongo.UpdateOne(
-                    filter={
-                        "country": data["country"],
-                        "country_code": data["country_code"],
-                    },
-                    update={"$setOnInsert": data},
-                    upsert=True,
-                )
-                for data in db_content
-            ]
-        )
-        collection.bulk_write(update_reqs)
+        self.bulk_write_reqs(self.get_write_reqs(db_content))
         self.logger.info("Recorded in database.")
 
 
@@ -433,6 +816,8 @@ class CompetitionNames(BaseClass):
             countries_exist: list = [c in countries for c in self.countries]
             tiers_exist: list = []
             for c in docs:
+                if c["country"] not in self.countries:
+                    continue
                 if "competitions" in c.keys():
                     tiers_exist.append(
                         all(
@@ -488,7 +873,7 @@ class CompetitionNames(BaseClass):
         Returns:
             str: _description_
         """
-        url: str = f"https://www.transfermarkt.com/wettbewerbe/national/wettbewerbe/{country_code}"
+        url: str = f"{self.base_url}/wettbewerbe/national/wettbewerbe/{country_code}"
         self.logger.debug(f"RETURNED: {url}")
         self.logger.info("Returned country URL.")
         return url
@@ -512,7 +897,9 @@ class CompetitionNames(BaseClass):
         db = self.get_db()
         all_country_urls: dict = {}
         collection = db.competitions
-        for country in collection.find({"country_code": {"$exists": True}}):
+        for country in collection.find(
+            {"country": {"$in": self.countries}, "country_code": {"$exists": True}}
+        ):
             all_country_urls[country["country"]] = self.get_country_url(
                 country["country_code"]
             )
@@ -521,51 +908,102 @@ class CompetitionNames(BaseClass):
         self.logger.info("Returned all country urls.")
         return all_country_urls
 
-    def record_in_db(self, db_content: dict):
-        """Updates database to contain competition information
+    def get_write_reqs(self, db_content: dict) -> dict:
+        """Builds the write requests that update the database to contain competition information
 
         Args:
             db_content (dict): dict in format of {"country":country_name, "competitions":competitions_dict}
+
+        Returns:
+            dict: {collection_name: [write requests]}
         """
-        db = self.get_db()
-        collection = db.competitions
         if db_content["country"] == "Europe":
-            collection.update_many(
-                filter={"country": db_content["country"]},
-                update={
-                    "$setOnInsert": db_content,
-                },
-                upsert=True,
-            )
-            collection.update_many(
-                filter={"country": db_content["country"]},
-                update={
-                    "$set": db_content,
-                },
-            )
+            update_reqs = [
+                pymongo.UpdateMany(
+                    filter={"country": db_content["country"]},
+                    update={
+                        "$setOnInsert": db_content,
+                    },
+                    upsert=True,
+                ),
+                pymongo.UpdateMany(
+                    filter={"country": db_content["country"]},
+                    update={
+                        "$set": db_content,
+                    },
+                ),
+            ]
         else:
-            collection.update_many(
-                filter={
-                    "$and": [
-                        {"country": db_content["country"]},
-                        {
-                            "$or": [
-                                {"competitions": {"$exists": False}},
-                                {"competitions": {"$ne": db_content["competitions"]}},
-                            ]
+            update_reqs = [
+                pymongo.UpdateMany(
+                    filter={
+                        "$and": [
+                            {"country": db_content["country"]},
+                            {
+                                "$or": [
+                                    {"competitions": {"$exists": False}},
+                                    {
+                                        "competitions": {
+                                            "$ne": db_content["competitions"]
+                                        }
+                                    },
+                                ]
+                            },
+                        ]
+                    },
+                    update={
+                        "$set": {
+                            "competitions": db_content["competitions"],
+                            "current_season": db_content["current_season"],
                         },
-                    ]
-                },
-                update={
-                    "$set": {
-                        "competitions": db_content["competitions"],
-                        "current_season": db_content["current_season"],
                     },
-                },
-            )
+                )
+            ]
+        return {"competitions": update_reqs}
+
+    def record_in_db(self, db_content: dict):
+        """Updates database to contain competition information
 
+        Args:
+            db_content (dict): dict in format of {"country":country_name, "competitions":competitions_dict}
+        """
+        self.bulk_write_reqs(self.get_write_reqs(db_content))
         self.logger.info("Recorded in database.")
 
+    def parse_current_season(self, response) -> str:
+        """Parses the current season of a country from its competitions page.
+
+        Args:
+            response (_type_): Response object from spider
+
+        Returns:
+            str: start year of the current season
+        """
+        season_xpath = self.get_domestic_comps_xpaths()["current_season"]
+        current_season = response.xpath(season_xpath).get().strip()
+        self.logger.debug(f"RETURNED: {current_season}")
+        self.logger.info("Parsed current season.")
+        return current_season
+
+    def get_current_season_write_reqs(self, country: str, current_season: str) -> dict:
+        """Builds the write requests that update the current season of country in the database.
+
+        Args:
+            country (str): Country name in string
+            current_season (str): start year of the current season
+
+        Returns:
+            dict: {collection_name: [write requests]}
+        """
+        return {
+            "competitions": [
+                pymongo.UpdateOne(
+                    filter={"country": country},
+                    update={"$set": {"current_season": current_season}},
+                )
+            ]
+        }
+
     def update_current_seasons_in_db(self, response, country):
         """Updates the current season of country in the database.
 
@@ -573,13 +1011,9 @@ class CompetitionNames(BaseClass):
             response (_type_): Response object from spider
             country (_type_): Country name in string
         """
-        season_xpath = self.get_domestic_comps_xpaths()["current_season"]
-        current_season = response.xpath(season_xpath).get().strip()
-        db = self.get_db()
-        collection = db.competitions
-        collection.update_one(
-            filter={"country": country},
-            update={"$set": {"current_season": current_season}},
+        current_season = self.parse_current_season(response)
+        self.bulk_write_reqs(
+            self.get_current_season_write_reqs(country, current_season)
         )
         self.logger.debug(f"Updated {country}'s current season as {current_season}.")
         self.logger.info(f"Updated {country}'s current season")
@@ -605,11 +1039,9 @@ class ClubNames(BaseClass):
         Returns:
             str: {url:url of that competition, league:league name, season:season start year}
         """
-        db = self.get_db()
-        collection = db.competitions
-        doc = collection.find_one({"country": country})
+        doc = self.get_resolver().countries[country]
         url: str = (
-            "https://www.transfermarkt.com"
+            self.base_url
             + doc["competitions"][comp]["url"]
             + "/plus/?saison_id="
             + season
@@ -632,9 +1064,13 @@ class ClubNames(BaseClass):
             list[str]: list of urls
         """
         league_urls = [
-            self.get_comp_url(country, "First Tier", season)
-            for country in self.countries
-            for season in self.seasons[country]
+            url_info
+            for url_info in [
+                self.get_comp_url(country, "First Tier", season)
+                for country in self.countries
+                for season in self.seasons[country]
+            ]
+            if self.is_selected(league=url_info["league"])
         ]
         self.logger.debug(f"RETURNED: {league_urls}")
         self.logger.info("Returned the urls of all leagues for all the seasons.")
@@ -695,10 +1131,59 @@ class ClubNames(BaseClass):
         Args:
             data (dict): Dict containing info about the season wise club list for all the leagues.
         """
-        self.record_club_info_in_db(
-            season=data["season"], data=data["clubs"]
-        )  # storing all club info in a single database
-        self.record_league_clubs_in_db(data)
+        UnitOfWork().stage(self.get_write_reqs(data)).commit(self)
+        self.logger.info(
+            f"Recorded the clubs and the clubs in {data['league']} for {data['season']} season."
+        )
+
+    def get_write_reqs(self, data: dict) -> dict:
+        """Builds the write requests for all the clubs info as well as season wise club names for all the leagues.
+
+        Args:
+            data (dict): Dict containing info about the season wise club list for all the leagues.
+
+        Returns:
+            dict: {collection_name: [write requests]}
+        """
+        uow = UnitOfWork()
+        uow.stage(
+            self.get_club_info_write_reqs(season=data["season"], data=data["clubs"])
+        )  # storing all club info in a single collection
+        uow.stage(self.get_league_clubs_write_reqs(data))
+        return uow.write_reqs
+
+    def get_club_info_write_reqs(self, season: str, data: list) -> dict:
+        """Builds the write requests that record all the clubs within a single collection
+
+        Args:
+            season (str): Season start year
+            data (list): List conatining dicts of clubs and their season wise urls.
+
+        Returns:
+            dict: {collection_name: [write requests]}
+        """
+        # the code is only set on insert, the season's url is added to the stored urls
+        write_reqs = [
+            pymongo.UpdateOne(
+                filter={"name": club["name"]},
+                update=[
+                    {
+                        "$set": {
+                            "code": {"$ifNull": ["$code", club["url"].split("/")[-3]]},
+                            "urls": {
+                                "$mergeObjects": [
+                                    "$urls",
+                                    {"$literal": {season: club["url"]}},
+                                ]
+                            },
+                        }
+                    }
+                ],
+                upsert=True,
+            )
+            for club in data
+        ]
+        return {"all_clubs": write_reqs}
 
     def record_club_info_in_db(self, season: str, data: list):
         """Records all the clubs within a single collection in the database
@@ -707,72 +1192,37 @@ class ClubNames(BaseClass):
             season (str): Season start year
             data (list): List conatining dicts of clubs and their season wise urls.
         """
-        db = self.get_db()
-        collection = db.all_clubs
-        write_reqs = (
-            # if club name doesn't exist, then insert
-            [
-                pymongo.UpdateOne(
-                    filter={"name": club["name"]},
-                    update={
-                        "$setOnInsert": {
-                            "name": club["name"],
-                            "code": club["url"].split("/")[-3],
-                            "urls": {season: club["url"]},
-                        }
-                    },
-                    upsert=True,
-                )
-                for club in data
-            ]
-            # if club name exists then update
-            + [
-                pymongo.UpdateOne(
-                    filter={"name": club["name"]},
-                    update={"$set": {f"urls.{season}": club["url"]}},
-                )
-                for club in data
-            ]
-        )
-        collection.bulk_write(write_reqs)
+        self.bulk_write_reqs(self.get_club_info_write_reqs(season, data))
         self.logger.info("Recorded club names and urls in database.")
 
-    def record_league_clubs_in_db(self, data: dict):
-        """Records all clubs in a league in a respective season in the database.
+    def get_league_clubs_write_reqs(self, data: dict) -> dict:
+        """Builds the write requests that record all clubs in a league in a respective season.
 
         Args:
             data (dict): dict containing info of league name, season, and all the clubs.
+
+        Returns:
+            dict: {collection_name: [write requests]}
         """
-        db = self.get_db()
-        all_clubs = db.all_clubs
-        clubs = [
-            all_clubs.find_one(filter={"name": club["name"]}) for club in data["clubs"]
+        # the names are the same ones that get recorded in all_clubs, so they don't need to be read back
+        club_names = [club["name"] for club in data["clubs"]]
+        # inserts the league document if not found, sets the season's clubs either way
+        write_reqs = [
+            pymongo.UpdateOne(
+                filter={"name": data["league"]},
+                update={"$set": {f"clubs.{data['season']}": club_names}},
+                upsert=True,
+            )
         ]
-        club_names = [club["name"] for club in clubs]
-        collection = db.all_leagues
-        write_reqs = (
-            # if no document of that league is found
-            [
-                pymongo.UpdateOne(
-                    filter={"name": data["league"]},
-                    update={
-                        "$setOnInsert": {
-                            "name": data["league"],
-                            f"clubs.{data['season']}": club_names,
-                        }
-                    },
-                    upsert=True,
-                )
-            ]
-            # if the document of that league is found
-            + [
-                pymongo.UpdateOne(
-                    filter={"name": data["league"]},
-                    update={"$set": {f"clubs.{data['season']}": club_names}},
-                )
-            ]
-        )
-        collection.bulk_write(write_reqs)
+        return {"all_leagues": write_reqs}
+
+    def record_league_clubs_in_db(self, data: dict):
+        """Records all clubs in a league in a respective season in the database.
+
+        Args:
+            data (dict): dict containing info of league name, season, and all the clubs.
+        """
+        self.bulk_write_reqs(self.get_league_clubs_write_reqs(data))
         self.logger.info(
             f"Recorded the clubs in {data['league']} for {data['season']} season."
         )
@@ -783,17 +1233,14 @@ class ClubNames(BaseClass):
         Returns:
             bool: True if all club names for all seasons found in the record, else False.
         """
-        db = self.get_db()
-        collection = db.all_leagues
-        docs = [c for c in collection.find(projection={"_id": False})]
-        all_club_names_parsed: bool = len(docs) > 0
+        resolver = self.get_resolver()
+        all_club_names_parsed: bool = len(resolver.leagues) > 0
         if all_club_names_parsed:
             seasons_exist: list = []
-            for doc in docs:
-                seasons_parsed: list = doc["clubs"].keys()
-                doc_country = db.competitions.find_one(
-                    filter={"competitions.First Tier.name": doc["name"]}
-                )["country"]
+            for league, seasons_parsed in resolver.leagues.items():
+                if not self.is_selected(league=league):
+                    continue
+                doc_country = resolver.get_league_country(league)
                 seasons_exist.append(
                     all(
                         [
@@ -802,11 +1249,12 @@ class ClubNames(BaseClass):
                         ]
                     )
                 )
-            leagues_parsed: list = [doc["name"] for doc in docs]
+            leagues_parsed: list = list(resolver.leagues.keys())
             league_names = [
                 c["competitions"]["First Tier"]["name"]
-                for c in db.competitions.find(projection={"_id": False})
-                if not c["country"] == "Europe"
+                for country, c in resolver.countries.items()
+                if country in self.countries
+                and self.is_selected(league=c["competitions"]["First Tier"]["name"])
             ]
             leagues_exist = [league in leagues_parsed for league in league_names]
             all_club_names_parsed = all(leagues_exist + seasons_exist)
@@ -816,10 +1264,27 @@ class ClubNames(BaseClass):
 
 
 class Fixtures(BaseClass):
+    # date cell of a fixture table row such as "Sat. 12.08.23", matching day, month and two digit year
+    FIXTURE_DATE_RE = re.compile(r"(\d{1,2})\.(\d{1,2})\.(\d{2})\s*$")
+    NUMBER_RE = re.compile(r"\d+")
+
     def __init__(self):
         super().__init__()
         self.LOG_FILE = os.path.join(self.LOG_DIR, "fixtures.log")
         self.set_logger("fixtures", self.LOG_FILE)
+        # collections refreshed through a staging copy, and the staging collection each of them is written to
+        self.shadow_collections = [
+            "played_fixtures",
+            "upcoming_fixtures",
+            "matches",
+            "fixture_pages",
+        ]
+        self.refresh_collections: dict = {}
+        # whether a page replaces the season of its club instead of adding the fixtures that are missing
+        self.replace_seasons = False
+        # holder of the shadow refresh lock and the time it is held for without being renewed
+        self.shadow_refresh_owner = f"{socket.gethostname()}-{os.getpid()}-{id(self)}"
+        self.shadow_refresh_lease = datetime.timedelta(hours=6)
 
     def get_club_fixture_url(self, club_name: str, season: str) -> str:
         """Given a club name and its season, returns the url for the fixtures of the club in that season.
@@ -831,30 +1296,38 @@ class Fixtures(BaseClass):
         Returns:
             str: required url
         """
-        db = self.get_db()
-        collection = db.all_clubs
-        doc = collection.find_one(filter={"name": club_name})
-        url_club_name = doc["urls"][season].split("/")[-6]
-        club_code = doc["code"]
-        url = f"https://www.transfermarkt.com/{url_club_name}/spielplandatum/verein/{club_code}/plus/0?saison_id={season}"
-        self.logger.debug(f"RETURNED: {url}")
+        doc = self.get_resolver().clubs[club_name]
+        url = self.get_fixture_url_from_club_url(doc["urls"][season], season)
         self.logger.info(f"Returned fixture url for {club_name}'s {season} season")
         return url
 
+    def get_fixture_url_from_club_url(self, club_url: str, season: str) -> str:
+        """Given the url of a club as listed by its league, returns the url for the fixtures of the club in a season.
+
+        Args:
+            club_url (str): url of the club such as /arsenal-fc/startseite/verein/11/saison_id/2023
+            season (str): Start year of season
+
+        Returns:
+            str: required url
+        """
+        url_club_name = club_url.split("/")[-6]
+        club_code = club_url.split("/")[-3]
+        url = f"{self.base_url}/{url_club_name}/spielplandatum/verein/{club_code}/plus/0?saison_id={season}"
+        self.logger.debug(f"RETURNED: {url}")
+        return url
+
     def get_all_club_all_season_fixture_urls(self) -> dict:
         """Returns the url for the fixtures of all the clubs in all seasons from the database.
 
         Returns:
             dict: {league_name:[{'team':club_name, season: season_start_year 'url':club_fixture_url}]}
         """
-        db = self.get_db()
-        collection = db.all_leagues
-        docs = [c for c in collection.find(projection={"_id": False})]
         urls: dict = {}
-        for doc in docs:
-            urls[doc["name"]] = []
-            for season, clubs in doc["clubs"].items():
-                urls[doc["name"]] += [
+        for league, seasons in self.get_selected_leagues().items():
+            urls[league] = []
+            for season, clubs in seasons.items():
+                urls[league] += [
                     {
                         "team": club,
                         "season": season,
@@ -867,285 +1340,1188 @@ class Fixtures(BaseClass):
         return urls
 
     def get_all_fixtures_xpath(self):
-        """Generates xpath for the fixtures listed in a table.
+        """Generates xpath for the rows of the fixture table, the competition headers followed by their fixtures.
 
         Returns:
             str: xpath
         """
-        xpath_fixtures = "(//table[not(@class='auflistung')])[1]/tbody/tr[@style]"
+        xpath_fixtures = "(//table[not(@class='auflistung')])[1]/tbody/tr"
         self.logger.debug(f"RETURNED: {xpath_fixtures}")
-        self.logger.info("Returned the xpath for all the fixtures in the table.")
+        self.logger.info("Returned the xpath for all the rows in the table.")
         return xpath_fixtures
 
-    def parse_all_fixtures_info(self, response, team, season) -> dict:
+    def parse_fixture_date(self, fix_date: str, kickoff: str) -> datetime.datetime:
+        """Combines the date and the kickoff time of a fixture table row.
+
+        Args:
+            fix_date (str): date cell of the row such as "Sat. 12.08.23"
+            kickoff (str): time cell of the row such as "3:00 PM", empty when not known yet
+
+        Returns:
+            datetime.datetime: kickoff, at midnight when the time is not known yet
+        """
+        date_parts = None if fix_date is None else self.FIXTURE_DATE_RE.search(fix_date)
+        if date_parts is None:
+            raise ValueError(f"Unknown fixture date {fix_date!r}.")
+        day, month, year = date_parts.groups()
+        return self.get_kickoff(
+            datetime.date(2000 + int(year), int(month), int(day)), kickoff
+        )
+
+    def get_kickoff(
+        self, fixture_date: datetime.date, kickoff: str
+    ) -> datetime.datetime:
+        """Combines the date of a fixture with its kickoff time.
+
+        Args:
+            fixture_date (datetime.date): date of the fixture
+            kickoff (str): kickoff time such as "3:00 PM"
+
+        Returns:
+            datetime.datetime: kickoff, at midnight when the time is not known
+        """
+        try:
+            kickoff_time = datetime.datetime.strptime(
+                kickoff.strip(), "%I:%M %p"
+            ).time()
+        except (AttributeError, ValueError):
+            kickoff_time = datetime.time()
+        return datetime.datetime.combine(fixture_date, kickoff_time)
+
+    def parse_int(self, text: str) -> int | None:
+        """Parses the first number in text such as a matchday rank "(5.)".
+
+        Args:
+            text (str): text of the cell, None if the cell is missing
+
+        Returns:
+            int | None: the number, None when there is none
+        """
+        number = None if text is None else self.NUMBER_RE.search(text)
+        return None if number is None else int(number.group())
+
+    def parse_venue(self, venue: str) -> str:
+        """Parses the venue cell into H (home), A (away) or N (neutral).
+
+        Args:
+            venue (str): venue cell of the row
+
+        Returns:
+            str: venue enum
+        """
+        venue = "" if venue is None else venue.strip().upper()
+        return venue if venue in ["H", "A"] else "N"
+
+    def get_first(self, element, path: str) -> str | None:
+        """Returns the first text or attribute matched by a relative xpath, like parsel's get().
+
+        Args:
+            element (lxml.html.HtmlElement): element the path is relative to
+            path (str): xpath ending in text() or an attribute
+
+        Returns:
+            str | None: first match, None when there is none
+        """
+        values = element.xpath(path)
+        return str(values[0]) if len(values) > 0 else None
+
+    def parse_all_fixtures_info(
+        self,
+        response,
+        team,
+        season,
+        skip_competitions: list = None,
+        reference_date: datetime.date = None,
+    ) -> dict:
         """Parses info from all the rows within a fixture table.
 
+        The rows are walked once in order, every competition header row applying to the fixture rows after it,
+        and every cell of a row is extracted once.
+
+        Dates are kickoff datetimes, goals and matchday ranks are ints and values which aren't known, like the
+        goals of an upcoming fixture, are None. Venue is H, A or N and result is W, L or D.
+
         Args:
             response (_type_): response obj from the spider
             team (str): Name of the team whose fixture is being parsed
+            skip_competitions (list, optional): competitions whose rows are left out because they are parsed
+                from their league schedule page instead. Defaults to None.
+            reference_date (datetime.date, optional): date the page was fetched on, fixtures from then on are
+                upcoming. Defaults to None for today.
 
         Returns:
             dict: Returns fixture info dict in the format of {'team':team, 'fixtures':[{fixture}]}
         """
-        rows_xpath = self.get_all_fixtures_xpath()
         fixture_info = {}
         fixture_info["team"] = team
         fixture_info["season"] = season
         fixture_info["fixtures"] = []
-        fixture_rows = response.xpath(rows_xpath)
-        for row in fixture_rows:
-            fixture = {}
-            fix_date = row.xpath("td[2]/text()").get()
+        fixture_info["skip_competitions"] = (
+            [] if skip_competitions is None else skip_competitions
+        )
+        today = datetime.date.today() if reference_date is None else reference_date
+        competition = None
+        for row in response.xpath(self.get_all_fixtures_xpath()):
+            # the lxml element of the row, its cells are read without wrapping every result into a selector
+            row = row.root
+            # header rows have no style, the competition they name lasts until the next header
+            if row.get("style") is None:
+                competition = self.get_first(row, "td/a/@title")
+                continue
+            if competition in fixture_info["skip_competitions"]:
+                continue
+            cells = row.findall("td")
+            fix_date = self.get_first(cells[1], "text()")
             # checking if postponed
             if fix_date.strip().lower() == "unknown":
                 continue
+            fixture = {}
+            fixture["competition"] = competition
+            fixture["date"] = self.parse_fixture_date(
+                fix_date, self.get_first(cells[2], "text()")
+            )
+            fixture["venue"] = self.parse_venue(self.get_first(cells[3], "text()"))
+            fixture["opponent_team"] = self.get_first(cells[6], "a/@title")
             # if not upcoming match
-            if not (
-                datetime.date(
-                    int("20" + fix_date.split(".")[3].strip()),
-                    int(fix_date.split(".")[2].strip()),
-                    int(fix_date.split(".")[1].strip()),
-                )
-                >= datetime.date.today()
-            ):
+            if not fixture["date"].date() >= today:
                 fixture["match_status"] = "PLAYED"
-                fixture["competition"] = row.xpath(
-                    "preceding-sibling::tr[not(@style)][1]/td/a/@title"
-                ).get()
-                fixture["date"] = str(
-                    datetime.date(
-                        int("20" + fix_date.split(".")[3].strip()),
-                        int(fix_date.split(".")[2].strip()),
-                        int(fix_date.split(".")[1].strip()),
-                    )
-                )
-                fixture["day"] = fix_date.split(".")[0].strip()
-                fixture["time"] = row.xpath("td[3]/text()").get().strip()
-                fixture["venue"] = row.xpath("td[4]/text()").get().strip()
-                fixture["matchday_rank"] = (
-                    "N/A"
-                    if row.xpath("td[5]/span/text()").get() is None
-                    else row.xpath("td[5]/span/text()").get().strip()
+                fixture["matchday_rank"] = self.parse_int(
+                    self.get_first(cells[4], "span/text()")
                 )
-                fixture["opponent_team"] = row.xpath("td[7]/a/@title").get()
-                fixture["opponent_matchday_rank"] = (
-                    "N/A"
-                    if row.xpath("td[7]/span/text()").get() is None
-                    else row.xpath("td[7]/span/text()").get().strip()
+                fixture["opponent_matchday_rank"] = self.parse_int(
+                    self.get_first(cells[6], "span/text()")
                 )
+                result_span = cells[9].find("a/span")
+                home_goals, away_goals = [
+                    self.parse_int(goals)
+                    for goals in self.get_first(result_span, "text()")
+                    .strip()
+                    .split(":")
+                ][:2]
                 fixture["goals_scored"] = (
-                    row.xpath("td[10]/a/span/text()").get().strip().split(":")[0]
-                    if fixture["venue"].lower() == "h"
-                    else row.xpath("td[10]/a/span/text()").get().strip().split(":")[1]
+                    home_goals if fixture["venue"] == "H" else away_goals
                 )
                 fixture["goals_conceded"] = (
-                    row.xpath("td[10]/a/span/text()").get().strip().split(":")[1]
-                    if fixture["venue"].lower() == "h"
-                    else row.xpath("td[10]/a/span/text()").get().strip().split(":")[0]
+                    away_goals if fixture["venue"] == "H" else home_goals
                 )
+                result_class = result_span.get("class", "").strip().lower()
                 fixture["result"] = (
-                    "Won"
-                    if row.xpath("td[10]/a/span/@class").get().strip().lower()
-                    == "greentext"
-                    else "Lost"
-                    if row.xpath("td[10]/a/span/@class").get().strip().lower()
-                    == "redtext"
-                    else "draw"
-                )
-                pens = (
-                    row.xpath("td[10]/a/span/span/text()").get().strip().lower()
-                    if row.xpath("td[10]/a/span/span").get() is not None
-                    else None
+                    "W"
+                    if result_class == "greentext"
+                    else "L"
+                    if result_class == "redtext"
+                    else "D"
                 )
+                pens = self.get_first(result_span, "span/text()")
                 fixture["on_pens"] = (
-                    False if pens is None else False if not "on pens" == pens else True
+                    pens is not None and pens.strip().lower() == "on pens"
                 )
             else:
                 fixture["match_status"] = "UPCOMING"
-                fixture["competition"] = row.xpath(
-                    "preceding-sibling::tr[not(@style)][1]/td/a/@title"
-                ).get()
-                fixture["date"] = str(
-                    datetime.date(
-                        int("20" + fix_date.split(".")[3].strip()),
-                        int(fix_date.split(".")[2].strip()),
-                        int(fix_date.split(".")[1].strip()),
-                    )
-                )
-                fixture["day"] = fix_date.split(".")[0].strip()
-                fixture["time"] = row.xpath("td[3]/text()").get().strip()
-                fixture["venue"] = row.xpath("td[4]/text()").get().strip()
-                fixture["matchday_rank"] = "TBD"
-                fixture["opponent_team"] = row.xpath("td[7]/a/@title").get()
-                fixture["opponent_matchday_rank"] = "TBD"
-                fixture["goals_scored"] = "TBD"
-                fixture["goals_conceded"] = "TBD"
+                fixture["matchday_rank"] = None
+                fixture["opponent_matchday_rank"] = None
+                fixture["goals_scored"] = None
+                fixture["goals_conceded"] = None
             fixture_info["fixtures"].append(fixture)
 
         self.logger.debug(f"RETURNED: {fixture_info}")
         self.logger.info(f"Returned fixtures of {team}.")
         return fixture_info
 
-    def record_fixtures_in_db(self, fixture_info):
-        """Records fixture_info in database
+    def get_league_schedule_url(self, league: str, season: str) -> str:
+        """Given a league and a season, returns the url of the schedule with every match of the league.
 
         Args:
-            fixture_info (dict): parsed fixture info
+            league (str): Name of the league
+            season (str): Start year of season
+
+        Returns:
+            str: required url
         """
-        db = self.get_db()
-        played = db.played_fixtures
-        upcoming = db.upcoming_fixtures
-        for fixture in fixture_info["fixtures"]:
-            if fixture["match_status"] == "PLAYED":
-                # insert doc if doc not found
-                played.update_one(
-                    filter={
-                        "club": fixture_info["team"],
+        resolver = self.get_resolver()
+        comp_url = resolver.countries[resolver.get_league_country(league)][
+            "competitions"
+        ]["First Tier"]["url"]
+        # /premier-league/startseite/wettbewerb/GB1 -> premier-league, GB1
+        url_league_name, league_code = comp_url.split("/")[1], comp_url.split("/")[-1]
+        url = f"{self.base_url}/{url_league_name}/gesamtspielplan/wettbewerb/{league_code}/saison_id/{season}"
+        self.logger.debug(f"RETURNED: {url}")
+        self.logger.info(f"Returned schedule url for {league}'s {season} season")
+        return url
+
+    def get_all_league_schedule_urls(self, current_season_only: bool = False) -> list:
+        """Returns the urls of the schedules of all the leagues.
+
+        Args:
+            current_season_only (bool, optional): whether only the current season of the leagues is needed.
+                Defaults to False.
+
+        Returns:
+            list: [{'league':league_name, 'season':season_start_year, 'url':league_schedule_url}]
+        """
+        resolver = self.get_resolver()
+        urls = [
+            {
+                "league": league,
+                "season": season,
+                "url": self.get_league_schedule_url(league, season),
+            }
+            for league, seasons in self.get_selected_leagues().items()
+            for season in seasons.keys()
+            if not current_season_only
+            or season == resolver.get_league_current_season(league)
+        ]
+        self.logger.debug(f"RETURNED: {urls}")
+        self.logger.info("Returned the urls for the league schedules.")
+        return urls
+
+    def get_league_schedule_xpath(self) -> str:
+        """Generates xpath for the matches listed in the matchday tables of a league schedule.
+
+        Returns:
+            str: xpath
+        """
+        xpath_matches = '//div[@class="box"]/table/tbody/tr[count(td) >= 7]'
+        self.logger.debug(f"RETURNED: {xpath_matches}")
+        self.logger.info("Returned the xpath for all the matches in the schedule.")
+        return xpath_matches
+
+    def get_schedule_club_name(self, club_cell) -> str:
+        """Returns the stored name of the club linked in a cell of a league schedule.
+
+        Schedules show short names, so the club is found by its code in the link, falling back to the title of
+        the link for clubs that aren't stored.
+
+        Args:
+            club_cell (_type_): selector of the cell
+
+        Returns:
+            str: club name
+        """
+        code = re.search(r"/verein/(\d+)", club_cell.xpath(".//a/@href").get() or "")
+        title = club_cell.xpath(".//a/@title").get()
+        if code is None:
+            return title
+        return self.get_resolver().club_codes.get(code.group(1), title)
+
+    def parse_league_schedule(
+        self, response, league, season, reference_date: datetime.date = None
+    ) -> list:
+        """Parses every match of a league schedule into the fixtures of each of the clubs.
+
+        Every match gives a home fixture to one club and an away fixture to the other, in the same shape as the
+        fixtures parsed from the page of a club.
+
+        Args:
+            response (_type_): response obj from the spider
+            league (str): Name of the league
+            season (str): Start year of season
+            reference_date (datetime.date, optional): date the page was fetched on, matches from then on are
+                upcoming. Defaults to None for today.
+
+        Returns:
+            list: fixture info dicts, one per club, each in the format of {'team':team, 'fixtures':[{fixture}]}
+        """
+        fixture_infos: dict = {}
+        today = datetime.date.today() if reference_date is None else reference_date
+        fix_date, kickoff = None, None
+        for row in response.xpath(self.get_league_schedule_xpath()):
+            # rows of matches on the same day or at the same time leave those cells empty
+            row_date = row.xpath("normalize-space(td[1])").get()
+            row_kickoff = row.xpath("normalize-space(td[2])").get()
+            if len(row_date) > 0:
+                fix_date, kickoff = row_date, row_kickoff
+            elif len(row_kickoff) > 0:
+                kickoff = row_kickoff
+            try:
+                date = self.parse_fixture_date(fix_date, kickoff)
+            except (AttributeError, IndexError, ValueError):
+                # postponed matches without a date
+                continue
+            home_club = self.get_schedule_club_name(row.xpath("td[3]"))
+            away_club = self.get_schedule_club_name(row.xpath("td[7]"))
+            home_rank = self.parse_int(row.xpath("td[3]/span/text()").get())
+            away_rank = self.parse_int(row.xpath("td[7]/span/text()").get())
+            for team, opponent, venue, rank, opponent_rank in [
+                (home_club, away_club, "H", home_rank, away_rank),
+                (away_club, home_club, "A", away_rank, home_rank),
+            ]:
+                fixture = {
+                    "competition": league,
+                    "date": date,
+                    "venue": venue,
+                    "opponent_team": opponent,
+                }
+                if not date.date() >= today:
+                    score = [
+                        self.parse_int(goals)
+                        for goals in row.xpath("normalize-space(td[5])")
+                        .get()
+                        .split(":")
+                    ] + [None, None]
+                    goals_scored = score[0] if venue == "H" else score[1]
+                    goals_conceded = score[1] if venue == "H" else score[0]
+                    fixture["match_status"] = "PLAYED"
+                    fixture["matchday_rank"] = rank
+                    fixture["opponent_matchday_rank"] = opponent_rank
+                    fixture["goals_scored"] = goals_scored
+                    fixture["goals_conceded"] = goals_conceded
+                    fixture["result"] = (
+                        None
+                        if goals_scored is None or goals_conceded is None
+                        else "W"
+                        if goals_scored > goals_conceded
+                        else "L"
+                        if goals_scored < goals_conceded
+                        else "D"
+                    )
+                    # league matches aren't decided on penalties
+                    fixture["on_pens"] = False
+                else:
+                    fixture["match_status"] = "UPCOMING"
+                    fixture["matchday_rank"] = None
+                    fixture["opponent_matchday_rank"] = None
+                    fixture["goals_scored"] = None
+                    fixture["goals_conceded"] = None
+                fixture_infos.setdefault(
+                    team,
+                    {
+                        "team": team,
+                        "season": season,
+                        "fixtures": [],
+                        # the page has every fixture of the league and nothing else
+                        "competitions": [league],
                     },
+                )["fixtures"].append(fixture)
+
+        fixture_infos = list(fixture_infos.values())
+        self.logger.debug(f"RETURNED: {fixture_infos}")
+        self.logger.info(
+            f"Returned fixtures of {len(fixture_infos)} clubs from {league}'s {season} schedule."
+        )
+        return fixture_infos
+
+    def get_league_schedule_write_reqs(self, fixture_infos: list) -> dict:
+        """Collects the writes for the fixtures of all the clubs of a league schedule.
+
+        Args:
+            fixture_infos (list): fixture info dicts parsed from the schedule
+
+        Returns:
+            dict: {collection_name: [write requests]}
+        """
+        unit_of_work = UnitOfWork()
+        for fixture_info in fixture_infos:
+            unit_of_work.stage(self.get_fixture_write_reqs(fixture_info))
+        return unit_of_work.write_reqs
+
+    def get_fixture_table_xpath(self, page: str) -> str:
+        """Generates xpath for the region of a page holding its fixtures.
+
+        Args:
+            page (str): "club" for the fixture page of a club, "league" for the schedule of a league
+
+        Returns:
+            str: xpath
+        """
+        xpath_table = (
+            '//div[@class="box"]/table'
+            if page == "league"
+            else "(//table[not(@class='auflistung')])[1]"
+        )
+        self.logger.debug(f"RETURNED: {xpath_table}")
+        self.logger.info(f"Returned the xpath for the fixture table of a {page} page.")
+        return xpath_table
+
+    def get_fixture_page_hash(self, response, page: str) -> str:
+        """Hashes the fixture table of a page, so that an unchanged page can be skipped.
+
+        Args:
+            response (_type_): response obj from the spider
+            page (str): "club" for the fixture page of a club, "league" for the schedule of a league
+
+        Returns:
+            str: sha256 hex digest of the table
+        """
+        table = "".join(response.xpath(self.get_fixture_table_xpath(page)).getall())
+        page_hash = hashlib.sha256(table.encode("utf-8")).hexdigest()
+        self.logger.debug(f"RETURNED: {page_hash}")
+        return page_hash
+
+    def get_fixture_page_hashes(self) -> dict:
+        """Fetches the hashes of the fixture tables recorded by the last crawl.
+
+        Returns:
+            dict: {(page, name, season): hash}
+        """
+        db = self.get_db()
+        hashes = {
+            (doc["page"], doc["name"], doc["season"]): doc["hash"]
+            for doc in db.fixture_pages.find(
+                projection={
+                    "_id": False,
+                    "page": True,
+                    "name": True,
+                    "season": True,
+                    "hash": True,
+                }
+            )
+        }
+        self.logger.info(f"Returned the hashes of {len(hashes)} fixture pages.")
+        return hashes
+
+    def get_fixture_page_write_reqs(
+        self, page: str, name: str, season: str, page_hash: str
+    ) -> dict:
+        """Builds the write recording the hash of a fixture table once its fixtures are written.
+
+        Args:
+            page (str): "club" for the fixture page of a club, "league" for the schedule of a league
+            name (str): Name of the club or the league
+            season (str): Start year of season
+            page_hash (str): hash of the fixture table
+
+        Returns:
+            dict: {collection_name: [write requests]}
+        """
+        col = self.refresh_collections.get("fixture_pages", "fixture_pages")
+        return {
+            col: [
+                pymongo.UpdateOne(
+                    filter={"page": page, "name": name, "season": season},
                     update={
-                        "$setOnInsert": {
-                            "club": fixture_info["team"],
-                            f"seasons.{fixture_info['season']}.{fixture['competition']}": [
-                                {
-                                    "date": fixture["date"],
-                                    "day": fixture["day"],
-                                    "time": fixture["time"],
-                                    "venue": fixture["venue"],
-                                    "matchday_rank": fixture["matchday_rank"],
-                                    "opponent": fixture["opponent_team"],
-                                    "opponent_matchday_rank": fixture[
-                                        "opponent_matchday_rank"
-                                    ],
-                                    "goals_scored": fixture["goals_scored"],
-                                    "goals_conceded": fixture["goals_conceded"],
-                                    "result": fixture["result"],
-                                    "on_pens": fixture["on_pens"],
-                                }
-                            ],
+                        "$set": {
+                            "hash": page_hash,
+                            "crawled_at": datetime.datetime.now(),
                         }
                     },
                     upsert=True,
                 )
-                # push fixture if doc found
-                played.update_one(
-                    filter={
-                        "club": fixture_info["team"],
-                        f"seasons.{fixture_info['season']}.{fixture['competition']}": {
-                            "$nin": [
-                                {
-                                    "date": fixture["date"],
-                                    "day": fixture["day"],
-                                    "time": fixture["time"],
-                                    "venue": fixture["venue"],
-                                    "matchday_rank": fixture["matchday_rank"],
-                                    "opponent": fixture["opponent_team"],
-                                    "opponent_matchday_rank": fixture[
-                                        "opponent_matchday_rank"
-                                    ],
-                                    "goals_scored": fixture["goals_scored"],
-                                    "goals_conceded": fixture["goals_conceded"],
-                                    "result": fixture["result"],
-                                    "on_pens": fixture["on_pens"],
-                                }
-                            ]
-                        },
-                    },
+            ]
+        }
+
+    def get_played_fixture_doc(self, fixture: dict) -> dict:
+        """Builds the document stored in played_fixtures for a parsed fixture.
+
+        Args:
+            fixture (dict): parsed fixture
+
+        Returns:
+            dict: fixture document
+        """
+        return {
+            "date": fixture["date"],
+            "venue": fixture["venue"],
+            "matchday_rank": fixture["matchday_rank"],
+            "opponent": fixture["opponent_team"],
+            "opponent_matchday_rank": fixture["opponent_matchday_rank"],
+            "goals_scored": fixture["goals_scored"],
+            "goals_conceded": fixture["goals_conceded"],
+            "result": fixture["result"],
+            "on_pens": fixture["on_pens"],
+        }
+
+    def get_upcoming_fixture_doc(self, fixture: dict) -> dict:
+        """Builds the document stored in upcoming_fixtures for a parsed fixture.
+
+        Args:
+            fixture (dict): parsed fixture
+
+        Returns:
+            dict: fixture document
+        """
+        return {
+            "date": fixture["date"],
+            "venue": fixture["venue"],
+            "opponent": fixture["opponent_team"],
+        }
+
+    def get_fixture_write_reqs(self, fixture_info: dict) -> dict:
+        """Collects the writes for all the fixtures of a page, grouped by collection.
+
+        Fixtures are added with $addToSet, which skips the fixtures that are already stored just like the
+        $nin guarded $push did, so the requests stay idempotent and can be sent unordered. During a shadow or an
+        incremental refresh the page replaces the whole season of the club instead, in the staging collections
+        of a shadow refresh.
+
+        Args:
+            fixture_info (dict): parsed fixture info
+
+        Returns:
+            dict: {collection_name: [write requests]}
+        """
+        played: dict = {}
+        upcoming: dict = {}
+        for fixture in fixture_info["fixtures"]:
+            if fixture["match_status"] == "PLAYED":
+                played.setdefault(fixture["competition"], []).append(fixture)
+            elif fixture["match_status"] == "UPCOMING":
+                upcoming.setdefault(fixture["competition"], []).append(fixture)
+        if self.replace_seasons:
+            write_reqs = self.get_season_replace_write_reqs(
+                fixture_info, played, upcoming
+            )
+        else:
+            write_reqs = self.get_season_add_write_reqs(fixture_info, played, upcoming)
+        if "competitions" in fixture_info:
+            # a league schedule has every match in the fixtures of both clubs, the home club writes it
+            write_reqs["matches"] = self.get_match_write_reqs(
+                {
+                    **fixture_info,
+                    "fixtures": [
+                        fixture
+                        for fixture in fixture_info["fixtures"]
+                        if fixture["venue"] == "H"
+                    ],
+                }
+            )
+        else:
+            write_reqs["matches"] = self.get_match_write_reqs(fixture_info)
+        # during a shadow refresh the writes go to the staging collections
+        return {
+            self.refresh_collections.get(col, col): reqs
+            for col, reqs in write_reqs.items()
+        }
+
+    def get_season_add_write_reqs(
+        self, fixture_info: dict, played: dict, upcoming: dict
+    ) -> dict:
+        """Builds the writes that add the missing fixtures of a page to the season of a club.
+
+        Args:
+            fixture_info (dict): parsed fixture info
+            played (dict): played fixtures of the page, {competition: [fixtures]}
+            upcoming (dict): upcoming fixtures of the page, {competition: [fixtures]}
+
+        Returns:
+            dict: {collection_name: [write requests]}
+        """
+        season = fixture_info["season"]
+        write_reqs: dict = {"played_fixtures": [], "upcoming_fixtures": []}
+        if len(played) > 0:
+            # insert doc if doc not found, add missing fixtures if doc found
+            write_reqs["played_fixtures"].append(
+                pymongo.UpdateOne(
+                    filter={"club": fixture_info["team"]},
                     update={
-                        "$push": {
-                            f"seasons.{fixture_info['season']}.{fixture['competition']}": {
-                                "date": fixture["date"],
-                                "day": fixture["day"],
-                                "time": fixture["time"],
-                                "venue": fixture["venue"],
-                                "matchday_rank": fixture["matchday_rank"],
-                                "opponent": fixture["opponent_team"],
-                                "opponent_matchday_rank": fixture[
-                                    "opponent_matchday_rank"
-                                ],
-                                "goals_scored": fixture["goals_scored"],
-                                "goals_conceded": fixture["goals_conceded"],
-                                "result": fixture["result"],
-                                "on_pens": fixture["on_pens"],
+                        "$addToSet": {
+                            f"seasons.{season}.{comp}": {
+                                "$each": [
+                                    self.get_played_fixture_doc(fixture)
+                                    for fixture in fixtures
+                                ]
                             }
+                            for comp, fixtures in played.items()
                         }
                     },
+                    upsert=True,
                 )
-                # delete the same fixture from upcoming if applicable
-                upcoming.update_one(
+            )
+            # delete the same fixtures from upcoming if applicable
+            write_reqs["upcoming_fixtures"].append(
+                pymongo.UpdateOne(
                     filter={"club": fixture_info["team"]},
                     update={
                         "$pull": {
-                            f"seasons.{fixture_info['season']}.{fixture['competition']}": {
-                                "date": fixture["date"],
-                                "day": fixture["day"],
-                                "time": fixture["time"],
-                                "venue": fixture["venue"],
-                                "opponent": fixture["opponent_team"],
+                            f"seasons.{season}.{comp}": {
+                                "$or": [
+                                    self.get_upcoming_fixture_doc(fixture)
+                                    for fixture in fixtures
+                                ]
                             }
+                            for comp, fixtures in played.items()
                         }
                     },
                 )
-                col = "played_fixtures"
-                self.logger.info(
-                    f"Recorded {fixture_info['team']} fixture in {col} collection."
-                )
-
-            elif fixture["match_status"] == "UPCOMING":
-                # insert new document if no document match
-                upcoming.update_one(
+            )
+        if len(upcoming) > 0:
+            # insert new document if no document match, add missing fixtures if document match
+            write_reqs["upcoming_fixtures"].append(
+                pymongo.UpdateOne(
                     filter={"club": fixture_info["team"]},
                     update={
-                        "$setOnInsert": {
-                            "club": fixture_info["team"],
-                            f"seasons.{fixture_info['season']}.{fixture['competition']}": [
-                                {
-                                    "date": fixture["date"],
-                                    "day": fixture["day"],
-                                    "time": fixture["time"],
-                                    "venue": fixture["venue"],
-                                    "opponent": fixture["opponent_team"],
-                                }
-                            ],
-                        }
-                    },
-                    upsert=True,
-                )
-                # push new fixture if document match
-                upcoming.update_one(
-                    filter={
-                        "club": fixture_info["team"],
-                        f"seasons.{fixture_info['season']}.{fixture['competition']}": {
-                            "$nin": [
-                                {
-                                    "date": fixture["date"],
-                                    "day": fixture["day"],
-                                    "time": fixture["time"],
-                                    "venue": fixture["venue"],
-                                    "opponent": fixture["opponent_team"],
-                                }
-                            ]
-                        },
-                    },
-                    update={
-                        "$push": {
-                            f"seasons.{fixture_info['season']}.{fixture['competition']}": {
-                                "date": fixture["date"],
-                                "day": fixture["day"],
-                                "time": fixture["time"],
-                                "venue": fixture["venue"],
-                                "opponent": fixture["opponent_team"],
+                        "$addToSet": {
+                            f"seasons.{season}.{comp}": {
+                                "$each": [
+                                    self.get_upcoming_fixture_doc(fixture)
+                                    for fixture in fixtures
+                                ]
                             }
+                            for comp, fixtures in upcoming.items()
                         }
                     },
+                    upsert=True,
                 )
-                col = "upcoming_fixtures"
-                self.logger.info(
-                    f"Recorded {fixture_info['team']} fixture in {col} collection."
-                )
-                # no need to delete from played_fixtures because upcoming match won't be stored there
+            )
+            # no need to delete from played_fixtures because upcoming match won't be stored there
+        return write_reqs
 
-    def have_all_fixtures(self) -> bool:
-        """Checks if all the fixtures of all the clubs for relevant seasons are parsed.
+    def get_season_replace_write_reqs(
+        self, fixture_info: dict, played: dict, upcoming: dict
+    ) -> dict:
+        """Builds the writes that replace the whole season of a club with the fixtures of its page.
+
+        A league schedule only replaces the league of the club and a club page that skipped the league keeps
+        the stored league fixtures, so the two pages can be written in any order.
+
+        Args:
+            fixture_info (dict): parsed fixture info
+            played (dict): played fixtures of the page, {competition: [fixtures]}
+            upcoming (dict): upcoming fixtures of the page, {competition: [fixtures]}
+
+        Returns:
+            dict: {collection_name: [write requests]}
+        """
+        season_field = f"seasons.{fixture_info['season']}"
+        skip_competitions = fixture_info.get("skip_competitions", [])
+        write_reqs: dict = {}
+        for col, fixtures_by_comp, get_doc in [
+            ("played_fixtures", played, self.get_played_fixture_doc),
+            ("upcoming_fixtures", upcoming, self.get_upcoming_fixture_doc),
+        ]:
+            season_fixtures = {
+                comp: [get_doc(fixture) for fixture in fixtures]
+                for comp, fixtures in fixtures_by_comp.items()
+            }
+            if "competitions" in fixture_info:
+                update: dict = {}
+                for comp in fixture_info["competitions"]:
+                    if comp in season_fixtures:
+                        update.setdefault("$set", {})[
+                            f"{season_field}.{comp}"
+                        ] = season_fixtures[comp]
+                    else:
+                        update.setdefault("$unset", {})[f"{season_field}.{comp}"] = ""
+            elif len(skip_competitions) > 0:
+                # keeping the skipped competitions of the stored season
+                update = [
+                    {
+                        "$set": {
+                            season_field: {
+                                "$mergeObjects": [
+                                    {
+                                        "$arrayToObject": {
+                                            "$filter": {
+                                                "input": {
+                                                    "$objectToArray": {
+                                                        "$ifNull": [
+                                                            f"${season_field}",
+                                                            {},
+                                                        ]
+                                                    }
+                                                },
+                                                "cond": {
+                                                    "$in": [
+                                                        "$$this.k",
+                                                        skip_competitions,
+                                                    ]
+                                                },
+                                            }
+                                        }
+                                    },
+                                    {"$literal": season_fixtures},
+                                ]
+                            }
+                        }
+                    }
+                ]
+            elif len(season_fixtures) > 0:
+                update = {"$set": {season_field: season_fixtures}}
+            else:
+                update = {"$unset": {season_field: ""}}
+            write_reqs[col] = [
+                pymongo.UpdateOne(
+                    filter={"club": fixture_info["team"]},
+                    update=update,
+                    upsert=len(fixtures_by_comp) > 0,
+                )
+            ]
+        return write_reqs
+
+    def get_match_key(self, team: str, fixture: dict) -> dict:
+        """Builds the natural key of a match, which is the same from the pages of both the clubs.
+
+        The date is the calendar date of the match, at midnight, so a kickoff time announced or moved later
+        doesn't make another match. The kickoff is stored in the match document.
+
+        Args:
+            team (str): Name of the club whose page the fixture was parsed from
+            fixture (dict): parsed fixture
+
+        Returns:
+            dict: {date, home_club, away_club, competition}
+        """
+        if fixture["venue"] == "H":
+            home_club, away_club = team, fixture["opponent_team"]
+        elif fixture["venue"] == "A":
+            home_club, away_club = fixture["opponent_team"], team
+        else:
+            # neutral venue, ordered by name so that both pages give the same key
+            home_club, away_club = sorted([team, fixture["opponent_team"]])
+        return {
+            "date": datetime.datetime.combine(fixture["date"].date(), datetime.time()),
+            "home_club": home_club,
+            "away_club": away_club,
+            "competition": fixture["competition"],
+        }
+
+    def get_match_doc(self, team: str, season: str, fixture: dict) -> dict:
+        """Builds the document stored in matches for a played fixture.
+
+        Args:
+            team (str): Name of the club whose page the fixture was parsed from
+            season (str): Start year of season
+            fixture (dict): parsed fixture
+
+        Returns:
+            dict: match document
+        """
+        match = self.get_match_key(team, fixture)
+        is_home = match["home_club"] == team
+        match["clubs"] = [match["home_club"], match["away_club"]]
+        match["season"] = season
+        match["kickoff"] = fixture["date"]
+        match["status"] = fixture["match_status"]
+        match["home_goals"] = (
+            fixture["goals_scored"] if is_home else fixture["goals_conceded"]
+        )
+        match["away_goals"] = (
+            fixture["goals_conceded"] if is_home else fixture["goals_scored"]
+        )
+        match["home_matchday_rank"] = (
+            fixture["matchday_rank"] if is_home else fixture["opponent_matchday_rank"]
+        )
+        match["away_matchday_rank"] = (
+            fixture["opponent_matchday_rank"] if is_home else fixture["matchday_rank"]
+        )
+        # H: home win, A: away win, D: draw, None when the page doesn't give the result
+        match["result"] = (
+            None
+            if fixture.get("result") is None
+            else "D"
+            if fixture["result"] == "D"
+            else ("H" if is_home else "A")
+            if fixture["result"] == "W"
+            else ("A" if is_home else "H")
+        )
+        match["on_pens"] = fixture["on_pens"]
+        return match
+
+    def get_match_write_reqs(self, fixture_info: dict) -> list:
+        """Builds the idempotent upserts of the fixtures of a page into the matches collection.
+
+        A match moved to another date leaves its upcoming document at the old date, so the page also deletes, with
+        one write, the upcoming matches of the clubs it lists at a date it doesn't list for them. The deletes
+        of an unordered bulk write may run after its upserts, which is why every date of the page is kept.
+
+        Args:
+            fixture_info (dict): parsed fixture info
+
+        Returns:
+            list: write requests for the matches collection
+        """
+        write_reqs: list = []
+        # dates the page lists for every pair of clubs, {(home_club, away_club, competition): [date]}
+        key_dates: dict = {}
+        for fixture in fixture_info["fixtures"]:
+            key = self.get_match_key(fixture_info["team"], fixture)
+            key_dates.setdefault(
+                (key["home_club"], key["away_club"], key["competition"]), []
+            ).append(key["date"])
+        if len(key_dates) > 0:
+            write_reqs.append(
+                pymongo.DeleteMany(
+                    filter={
+                        "clubs": fixture_info["team"],
+                        "season": fixture_info["season"],
+                        "status": "UPCOMING",
+                        "$or": [
+                            {
+                                "home_club": home_club,
+                                "away_club": away_club,
+                                "competition": competition,
+                                "date": {"$nin": dates},
+                            }
+                            for (
+                                home_club,
+                                away_club,
+                                competition,
+                            ), dates in key_dates.items()
+                        ],
+                    }
+                )
+            )
+        for fixture in fixture_info["fixtures"]:
+            key = self.get_match_key(fixture_info["team"], fixture)
+            if fixture["match_status"] == "PLAYED":
+                write_reqs.append(
+                    pymongo.UpdateOne(
+                        filter=key,
+                        update={
+                            "$set": self.get_match_doc(
+                                fixture_info["team"], fixture_info["season"], fixture
+                            )
+                        },
+                        upsert=True,
+                    )
+                )
+            elif fixture["match_status"] == "UPCOMING":
+                # a page crawled earlier than the opponent's must not turn a played match back into upcoming
+                write_reqs.append(
+                    pymongo.UpdateOne(
+                        filter=key,
+                        update=[
+                            {
+                                "$set": {
+                                    "clubs": [key["home_club"], key["away_club"]],
+                                    "season": fixture_info["season"],
+                                    "kickoff": fixture["date"],
+                                    "status": {
+                                        "$ifNull": ["$status", fixture["match_status"]]
+                                    },
+                                }
+                            }
+                        ],
+                        upsert=True,
+                    )
+                )
+        return write_reqs
+
+    def get_club_matches(
+        self, club: str, season: str = None, status: str = None
+    ) -> list[dict]:
+        """Returns the matches of a club from the matches collection, ordered by date.
+
+        Args:
+            club (str): Name of the club
+            season (str, optional): Start year of season. Defaults to None for all seasons.
+            status (str, optional): PLAYED or UPCOMING. Defaults to None for both.
+
+        Returns:
+            list[dict]: match documents
+        """
+        db = self.get_db()
+        query: dict = {"clubs": club}
+        if season is not None:
+            query["season"] = season
+        if status is not None:
+            query["status"] = status
+        matches = [
+            doc
+            for doc in db.matches.find(
+                filter=query,
+                projection={"_id": False},
+                sort=[("date", 1), ("kickoff", 1)],
+            )
+        ]
+        self.logger.debug(f"RETURNED: {matches}")
+        self.logger.info(f"Returned matches of {club}.")
+        return matches
+
+    def get_typed_fixture_doc(self, doc: dict) -> dict:
+        """Converts a fixture or match stored with string fields into the typed schema.
+
+        Args:
+            doc (dict): stored fixture or match document
+
+        Returns:
+            dict: document with a kickoff datetime, int goals and ranks, None instead of "TBD" and "N/A" and
+            the compact venue and result enums. Documents already typed are returned unchanged.
+        """
+        if isinstance(doc["date"], datetime.datetime):
+            return doc
+        typed = {k: v for k, v in doc.items() if k not in ["day", "time"]}
+        typed["date"] = self.get_kickoff(
+            datetime.date.fromisoformat(doc["date"]), doc.get("time")
+        )
+        if "venue" in doc:
+            typed["venue"] = self.parse_venue(doc["venue"])
+        for field in [
+            "matchday_rank",
+            "opponent_matchday_rank",
+            "goals_scored",
+            "goals_conceded",
+            "home_matchday_rank",
+            "away_matchday_rank",
+            "home_goals",
+            "away_goals",
+        ]:
+            if field in doc and not isinstance(doc[field], int):
+                typed[field] = self.parse_int(doc[field])
+        if "result" in doc:
+            typed["result"] = {"Won": "W", "Lost": "L", "draw": "D"}.get(
+                doc["result"], doc["result"]
+            )
+        return typed
+
+    def migrate_fixtures_to_typed(self, batch_size: int = 1000) -> dict:
+        """Converts the fixtures and matches stored with string fields into the typed schema.
+
+        Args:
+            batch_size (int, optional): number of updates per bulk write. Defaults to 1000.
+
+        Returns:
+            dict: {collection_name: number of documents updated}
+        """
+        db = self.get_db()
+        updated: dict = {}
+        for col in ["played_fixtures", "upcoming_fixtures", "matches"]:
+            updated[col] = 0
+            updates: dict = {}
+            # only the documents that still have a string date somewhere
+            query = (
+                {"date": {"$type": "string"}}
+                if col == "matches"
+                else {"seasons": {"$exists": True}}
+            )
+            for doc in db[col].find(filter=query):
+                if col == "matches":
+                    typed = self.get_typed_fixture_doc(doc)
+                    update = {
+                        "$set": {k: v for k, v in typed.items() if not k == "_id"},
+                        "$unset": {"day": "", "time": ""},
+                    }
+                else:
+                    seasons = {
+                        season: {
+                            comp_name: [
+                                self.get_typed_fixture_doc(fixture)
+                                for fixture in fixtures
+                            ]
+                            for comp_name, fixtures in season_info.items()
+                        }
+                        for season, season_info in doc["seasons"].items()
+                    }
+                    if seasons == doc["seasons"]:
+                        continue
+                    update = {"$set": {"seasons": seasons}}
+                updates[doc["_id"]] = update
+                if len(updates) >= batch_size:
+                    updated[col] += self.write_typed_docs(db[col], updates)
+                    updates = {}
+            if len(updates) > 0:
+                updated[col] += self.write_typed_docs(db[col], updates)
+        self.logger.debug(f"RETURNED: {updated}")
+        self.logger.info("Migrated the stored fixtures and matches to typed fields.")
+        return updated
+
+    def write_typed_docs(self, collection, updates: dict) -> int:
+        """Sends the updates of the typed migration to a collection.
+
+        A match already upserted with a typed date by a crawl run before the migration collides with its
+        string dated copy on the match key, so the string dated copy is deleted instead.
+
+        Args:
+            collection (pymongo.collection.Collection): collection being migrated
+            updates (dict): {_id: update} of the documents to migrate
+
+        Returns:
+            int: number of documents updated or deleted
+        """
+        ids = list(updates.keys())
+        write_reqs = [pymongo.UpdateOne({"_id": _id}, updates[_id]) for _id in ids]
+        try:
+            return collection.bulk_write(write_reqs, ordered=False).modified_count
+        except pymongo.errors.BulkWriteError as e:
+            duplicates = [
+                ids[error["index"]]
+                for error in e.details["writeErrors"]
+                if error["code"] == 11000
+            ]
+            if len(duplicates) < len(e.details["writeErrors"]):
+                raise
+            collection.delete_many({"_id": {"$in": duplicates}})
+            return e.details["nModified"] + len(duplicates)
+
+    def get_fixture_from_doc(self, doc: dict, competition: str, status: str) -> dict:
+        """Turns a fixture stored in played_fixtures or upcoming_fixtures back into a parsed fixture.
+
+        Args:
+            doc (dict): stored fixture document
+            competition (str): Name of the competition it is stored under
+            status (str): PLAYED or UPCOMING
+
+        Returns:
+            dict: parsed fixture
+        """
+        doc = self.get_typed_fixture_doc(doc)
+        fixture = {k: v for k, v in doc.items() if not k == "opponent"}
+        fixture["opponent_team"] = doc["opponent"]
+        fixture["competition"] = competition
+        fixture["match_status"] = status
+        return fixture
+
+    def migrate_match_dates(self, batch_size: int = 1000) -> int:
+        """Keys the matches stored with their kickoff as date on the calendar date, storing the kickoff apart.
+
+        The matches of the same key left by a kickoff time that changed are merged into one, keeping the played
+        match or else the one with the latest kickoff.
+
+        Args:
+            batch_size (int, optional): number of writes per bulk write. Defaults to 1000.
+
+        Returns:
+            int: number of writes sent
+        """
+        db = self.get_db()
+        # {(date, home_club, away_club, competition): [match document]}
+        keyed: dict = {}
+        for doc in db.matches.find(filter={"date": {"$type": "date"}}):
+            date = datetime.datetime.combine(doc["date"].date(), datetime.time())
+            key = (date, doc["home_club"], doc["away_club"], doc["competition"])
+            keyed.setdefault(key, []).append(doc)
+        sent = 0
+        write_reqs: list = []
+        for key, docs in keyed.items():
+            if len(docs) == 1 and "kickoff" in docs[0]:
+                continue
+            docs = sorted(
+                docs,
+                key=lambda doc: (
+                    doc["status"] == "PLAYED",
+                    doc.get("kickoff", doc["date"]),
+                ),
+            )
+            # the unique key can only be moved once the other documents of the key are gone
+            write_reqs += [pymongo.DeleteOne({"_id": doc["_id"]}) for doc in docs[:-1]]
+            write_reqs.append(
+                pymongo.UpdateOne(
+                    filter={"_id": docs[-1]["_id"]},
+                    update={
+                        "$set": {
+                            "date": key[0],
+                            "kickoff": docs[-1].get("kickoff", docs[-1]["date"]),
+                        }
+                    },
+                )
+            )
+            if len(write_reqs) >= batch_size:
+                db.matches.bulk_write(write_reqs)
+                sent += len(write_reqs)
+                write_reqs = []
+        if len(write_reqs) > 0:
+            db.matches.bulk_write(write_reqs)
+            sent += len(write_reqs)
+        self.logger.debug(f"RETURNED: {sent}")
+        self.logger.info("Migrated the matches to calendar date keys.")
+        return sent
+
+    def migrate_fixtures_to_matches(self, batch_size: int = 1000) -> int:
+        """Copies the fixtures stored per club in played_fixtures and upcoming_fixtures into matches.
+
+        Args:
+            batch_size (int, optional): number of upserts per bulk write. Defaults to 1000.
+
+        Returns:
+            int: number of upserts sent
+        """
+        db = self.get_db()
+        sent = 0
+        write_reqs: list = []
+        # played first so that the upcoming upserts can't override the played matches
+        for col, status in [
+            ("played_fixtures", "PLAYED"),
+            ("upcoming_fixtures", "UPCOMING"),
+        ]:
+            for doc in db[col].find(projection={"_id": False}):
+                for season, season_info in doc.get("seasons", {}).items():
+                    write_reqs += self.get_match_write_reqs(
+                        {
+                            "team": doc["club"],
+                            "season": season,
+                            "fixtures": [
+                                self.get_fixture_from_doc(fixture, comp_name, status)
+                                for comp_name, fixtures in season_info.items()
+                                for fixture in fixtures
+                            ],
+                        }
+                    )
+                    if len(write_reqs) >= batch_size:
+                        db.matches.bulk_write(write_reqs, ordered=False)
+                        sent += len(write_reqs)
+                        write_reqs = []
+            if len(write_reqs) > 0:
+                db.matches.bulk_write(write_reqs, ordered=False)
+                sent += len(write_reqs)
+                write_reqs = []
+        self.logger.debug(f"RETURNED: {sent}")
+        self.logger.info("Migrated played and upcoming fixtures into matches.")
+        return sent
+
+    def record_fixtures_in_db(self, fixture_info) -> dict:
+        """Records fixture_info in database with one unordered bulk write per collection
+
+        Args:
+            fixture_info (dict): parsed fixture info
+
+        Returns:
+            dict: {collection_name: number of write operations sent}
+        """
+        ops_sent = self.bulk_write_reqs(
+            self.get_fixture_write_reqs(fixture_info), ordered=False
+        )
+        self.logger.debug(f"RETURNED: {ops_sent}")
+        self.logger.info(
+            f"Recorded {len(fixture_info['fixtures'])} fixtures of {fixture_info['team']} for {fixture_info['season']} season with {sum(ops_sent.values())} write operations."
+        )
+        return ops_sent
+
+    def get_league_clubs_current_season(self) -> list[dict]:
+        """Aggregates every league with the clubs it had in the concerned seasons and its current season.
+
+        Returns:
+            list[dict]: [{league: league_name, clubs: [club_name], current_season: season_start_year}]
+        """
+        db = self.get_db()
+        all_seasons: set = set()
+        for _, v in self.seasons.items():
+            all_seasons.update(v)
+        pipeline = [
+            {
+                "$project": {
+                    "_id": False,
+                    "name": True,
+                    "seasons": {"$objectToArray": "$clubs"},
+                }
+            },
+            {"$unwind": "$seasons"},
+            {"$match": {"seasons.k": {"$in": sorted(all_seasons)}}},
+            {"$unwind": "$seasons.v"},
+            {"$group": {"_id": "$name", "clubs": {"$addToSet": "$seasons.v"}}},
+            {
+                "$lookup": {
+                    "from": "competitions",
+                    "localField": "_id",
+                    "foreignField": "competitions.First Tier.name",
+                    "as": "competition",
+                }
+            },
+            {
+                "$project": {
+                    "_id": False,
+                    "league": "$_id",
+                    "clubs": True,
+                    "current_season": {
+                        "$arrayElemAt": ["$competition.current_season", 0]
+                    },
+                }
+            },
+        ]
+        leagues = [
+            {
+                **doc,
+                "clubs": [club for club in doc["clubs"] if self.is_selected(club=club)],
+            }
+            for doc in db.all_leagues.aggregate(pipeline)
+            if doc.get("current_season") is not None
+            and self.is_selected(league=doc["league"])
+        ]
+        self.logger.debug(f"RETURNED: {leagues}")
+        self.logger.info("Returned the clubs and the current season of all leagues.")
+        return leagues
+
+    def have_all_fixtures(self) -> bool:
+        """Checks if all the fixtures of all the clubs for relevant seasons are parsed.
 
         Returns:
             bool: True if all fixtures are passed else False
@@ -1154,33 +2530,66 @@ class Fixtures(BaseClass):
         db = self.get_db()
         played = db.played_fixtures
         upcoming = db.upcoming_fixtures
-        played_docs = [doc for doc in played.find(projection={"_id": False})]
-        have_all_fixtures_parsed: bool = len(played_docs) > 0
+        # a targeted crawl only checks the clubs of its selection
+        selected_leagues = self.get_selected_leagues() if self.has_selection() else {}
+        selected_clubs = sorted(
+            {
+                club
+                for seasons in selected_leagues.values()
+                for clubs in seasons.values()
+                for club in clubs
+            }
+        )
+        club_filter = {"club": {"$in": selected_clubs}} if self.has_selection() else {}
+        played_docs_count = played.count_documents(club_filter)
+        have_all_fixtures_parsed: bool = played_docs_count > 0
         if have_all_fixtures_parsed:
-            played_docs_count = len(played_docs)
-            all_clubs_count = len(
-                [doc for doc in db.all_clubs.find(projection={"_id": False})]
+            all_clubs_count = (
+                len(selected_clubs)
+                if self.has_selection()
+                else db.all_clubs.count_documents({})
             )
-            all_upcoming_fixtures_count = len(
-                [doc for doc in upcoming.find(projection={"_id": False})]
+            all_upcoming_fixtures_count = upcoming.count_documents(club_filter)
+            # clubs whose played fixtures don't have their league's current season
+            leagues = self.get_league_clubs_current_season()
+            clubs_out_of_current_season_count: int = (
+                played.count_documents(
+                    {
+                        "$or": [
+                            {
+                                "club": {"$in": league["clubs"]},
+                                f"seasons.{league['current_season']}": {
+                                    "$exists": False
+                                },
+                            }
+                            for league in leagues
+                        ]
+                    }
+                )
+                if len(leagues) > 0
+                else 0
             )
-            clubs_out_of_current_season_count: int = 0
-            for doc in played_docs:
-                all_seasons: list = []
-                for _, v in self.seasons.items():
-                    all_seasons += v
-                all_seasons = set(all_seasons)
-                queries = [{f"clubs.{season}": doc["club"]} for season in all_seasons]
-                doc_league = db.all_leagues.find_one(filter={"$or": queries})["name"]
-                doc_country_current_season = db.competitions.find_one(
-                    filter={"competitions.First Tier.name": doc_league}
-                )["current_season"]
-                if doc_country_current_season not in doc["seasons"].keys():
-                    clubs_out_of_current_season_count += 1
             have_all_fixtures_parsed = (played_docs_count == all_clubs_count) and (
                 played_docs_count - clubs_out_of_current_season_count
                 == all_upcoming_fixtures_count
             )
+            if have_all_fixtures_parsed and self.selected_seasons is not None:
+                # every club of a selected season that is over has that season recorded
+                resolver = self.get_resolver()
+                have_all_fixtures_parsed = all(
+                    [
+                        played.count_documents(
+                            {
+                                "club": {"$in": clubs},
+                                f"seasons.{season}": {"$exists": True},
+                            }
+                        )
+                        == len(clubs)
+                        for league, seasons in selected_leagues.items()
+                        for season, clubs in seasons.items()
+                        if not season == resolver.get_league_current_season(league)
+                    ]
+                )
             self.logger.debug(f"PLAYED DOCS COUNT: {played_docs_count}")
             self.logger.debug(f"ALL CLUBS COUNT: {all_clubs_count}")
             self.logger.debug(
@@ -1254,18 +2663,14 @@ class Fixtures(BaseClass):
         Returns:
             dict: dict: {league_name:[{'team':club_name, season: season_start_year 'url':club_fixture_url}]}
         """
-        db = self.get_db()
-        collection = db.all_leagues
-        docs = [c for c in collection.find(projection={"_id": False})]
+        resolver = self.get_resolver()
         urls: dict = {}
-        for doc in docs:
-            urls[doc["name"]] = []
-            current_season = db.competitions.find_one(
-                filter={"competitions.First Tier.name": doc["name"]}
-            )["current_season"]
+        for league, seasons in self.get_selected_leagues().items():
+            urls[league] = []
+            current_season = resolver.get_league_current_season(league)
 
-            for club in doc["clubs"][current_season]:
-                urls[doc["name"]] += [
+            for club in seasons.get(current_season, []):
+                urls[league] += [
                     {
                         "team": club,
                         "season": current_season,
@@ -1281,46 +2686,722 @@ class Fixtures(BaseClass):
     def reset_current_season_fixtures(self):
         """Resets the data stored about current season fixtures."""
         db = self.get_db()
-        played = db.played_fixtures
-        upcoming = db.upcoming_fixtures
-        # resetting played_fixtures for current season
-        played_docs = [doc for doc in played.find(projection={"_id": False})]
-        for doc in played_docs:
-            all_seasons: list = []
-            for _, v in self.seasons.items():
-                all_seasons += v
-            all_seasons = set(all_seasons)
-            queries = [{f"clubs.{season}": doc["club"]} for season in all_seasons]
-            doc_league = db.all_leagues.find_one(filter={"$or": queries})["name"]
-            doc_current_season = db.competitions.find_one(
-                filter={"competitions.First Tier.name": doc_league}
-            )["current_season"]
-            if doc_current_season in doc["seasons"].keys():
-                played.update_one(
-                    filter={"club": doc["club"]},
-                    update={"$unset": {f"seasons.{doc_current_season}": ""}},
-                )
-        # resetting upcoming_fixtures for current season
-        upcoming_docs = [doc for doc in upcoming.find(projection={"_id": False})]
-        for doc in upcoming_docs:
-            all_seasons: list = []
-            for _, v in self.seasons.items():
-                all_seasons += v
-            all_seasons = set(all_seasons)
-            queries = [{f"clubs.{season}": doc["club"]} for season in all_seasons]
-            doc_league = db.all_leagues.find_one(filter={"$or": queries})["name"]
-            doc_current_season = db.competitions.find_one(
-                filter={"competitions.First Tier.name": doc_league}
-            )["current_season"]
-            if doc_current_season in doc["seasons"].keys():
-                upcoming.update_one(
-                    filter={"club": doc["club"]},
-                    update={"$unset": {f"seasons.{doc_current_season}": ""}},
+        leagues = self.get_league_clubs_current_season()
+        # one update_many per league and its current season, for both the collections
+        for col in ["played_fixtures", "upcoming_fixtures"]:
+            write_reqs = [
+                pymongo.UpdateMany(
+                    filter={
+                        "club": {"$in": league["clubs"]},
+                        f"seasons.{league['current_season']}": {"$exists": True},
+                    },
+                    update={"$unset": {f"seasons.{league['current_season']}": ""}},
                 )
+                for league in leagues
+            ]
+            if len(write_reqs) > 0:
+                db[col].bulk_write(write_reqs, ordered=False)
         self.logger.info(
             "Reset current season fixtures for both played_fixtures collection and upcoming_fixtures collection."
         )
 
+    def start_shadow_refresh(self) -> bool:
+        """Copies the fixture collections into staging collections that receive the writes of the refresh.
+
+        The live collections keep serving the previous crawl until finish_shadow_refresh swaps the staging
+        collections in. Every re-scraped page replaces its club's season in the staging copy, so nothing has
+        to be reset beforehand.
+
+        The copy is of the whole collections, so a write into the live collections during the refresh is lost
+        at the swap. The refresh holds the shadow refresh lock until it finishes or is aborted, and the other
+        writers of the fixture collections check is_shadow_refresh_running before they start.
+
+        Returns:
+            bool: False if another refresh holds the lock, nothing is copied then.
+        """
+        if not self.acquire_shadow_refresh_lock():
+            self.logger.error(
+                "Not started a shadow refresh because another one is running."
+            )
+            return False
+        db = self.get_db()
+        for col in self.shadow_collections:
+            staging = f"{col}_refresh"
+            # server side copy, replacing a staging collection left over by an earlier refresh
+            db[col].aggregate([{"$match": {}}, {"$out": staging}])
+            # the staging collection becomes the live one, so it needs the same indexes
+            for name, info in db[col].index_information().items():
+                if name == "_id_":
+                    continue
+                options = {
+                    k: v
+                    for k, v in info.items()
+                    if k in ["unique", "partialFilterExpression", "sparse"]
+                }
+                db[staging].create_index(info["key"], name=name, **options)
+            self.refresh_collections[col] = staging
+        self.replace_seasons = True
+        self.delete_past_upcoming_matches()
+        self.logger.debug(f"REFRESH COLLECTIONS: {self.refresh_collections}")
+        self.logger.info("Started a shadow refresh of the fixture collections.")
+        return True
+
+    def finish_shadow_refresh(self):
+        """Swaps the staging collections of a shadow refresh in place of the live collections.
+
+        The swap is not atomic as a group: each collection is renamed on its own, so readers can see some
+        collections of the refresh next to others of the previous crawl, and a collection is missing for the
+        moment between its two renames. The live collections are renamed to {col}_previous before their staging
+        collection takes their place, and if a rename fails the collections swapped so far are put back, the
+        live collections are left as they were and the exception is raised again. The previous collections are
+        dropped once every collection has been swapped.
+
+        The staging collections are only swapped in while this refresh still holds the lock, as a refresh that
+        took the lock over has replaced them with its own copies.
+        """
+        if not self.acquire_shadow_refresh_lock():
+            self.refresh_collections = {}
+            self.replace_seasons = False
+            raise RuntimeError(
+                "Not swapped in the shadow refresh because another refresh took its lock over."
+            )
+        db = self.get_db()
+        existing = db.list_collection_names()
+        missing = [
+            staging
+            for staging in self.refresh_collections.values()
+            if staging not in existing
+        ]
+        if len(missing) > 0:
+            self.abort_shadow_refresh()
+            raise RuntimeError(
+                f"Not swapped in the shadow refresh because {missing} are missing."
+            )
+        # collections swapped so far, [(col, staging, whether the live collection was kept as previous)]
+        swapped: list = []
+        try:
+            for col, staging in self.refresh_collections.items():
+                has_live = col in existing
+                if has_live:
+                    db[col].rename(f"{col}_previous", dropTarget=True)
+                swapped.append((col, staging, has_live))
+                db[staging].rename(col)
+                self.logger.info(f"Swapped {staging} in as {col}.")
+        except Exception:
+            self.logger.error(
+                "Failed to swap in the shadow refresh, rolling back.", exc_info=True
+            )
+            self.roll_back_shadow_swap(swapped)
+            self.abort_shadow_refresh()
+            raise
+        for col, _, has_live in swapped:
+            if has_live:
+                db[f"{col}_previous"].drop()
+        self.refresh_collections = {}
+        self.replace_seasons = False
+        self.release_shadow_refresh_lock()
+        self.logger.info("Finished the shadow refresh of the fixture collections.")
+
+    def roll_back_shadow_swap(self, swapped: list):
+        """Puts the live collections of a failed swap back, in the reverse order they were swapped in.
+
+        Args:
+            swapped (list): [(col, staging, whether the live collection was kept as previous)]
+        """
+        db = self.get_db()
+        for col, staging, has_live in reversed(swapped):
+            existing = db.list_collection_names()
+            if col in existing and staging not in existing:
+                db[col].rename(staging)
+            if has_live and f"{col}_previous" in db.list_collection_names():
+                db[f"{col}_previous"].rename(col, dropTarget=True)
+            self.logger.warning(f"Rolled back the swap of {staging} in as {col}.")
+
+    def abort_shadow_refresh(self):
+        """Leaves the live collections untouched; the staging collections are replaced by the next refresh."""
+        self.logger.warning(
+            f"Aborted the shadow refresh, {list(self.refresh_collections.values())} were not swapped in."
+        )
+        self.refresh_collections = {}
+        self.replace_seasons = False
+        self.release_shadow_refresh_lock()
+
+    def acquire_shadow_refresh_lock(self) -> bool:
+        """Takes or renews the lock of a shadow refresh, unless another refresh holds an unexpired one.
+
+        Returns:
+            bool: True if this object holds the lock.
+        """
+        now = datetime.datetime.now()
+        try:
+            self.get_db().refresh_locks.find_one_and_update(
+                filter={
+                    "_id": "fixtures",
+                    "$or": [
+                        {"expires_at": {"$lt": now}},
+                        {"owner": self.shadow_refresh_owner},
+                    ],
+                },
+                update={
+                    "$set": {
+                        "owner": self.shadow_refresh_owner,
+                        "expires_at": now + self.shadow_refresh_lease,
+                    },
+                    "$setOnInsert": {"started_at": now},
+                },
+                upsert=True,
+            )
+        except pymongo.errors.DuplicateKeyError:
+            # the lock exists and belongs to a running refresh
+            return False
+        return True
+
+    def release_shadow_refresh_lock(self):
+        self.get_db().refresh_locks.delete_one(
+            {"_id": "fixtures", "owner": self.shadow_refresh_owner}
+        )
+
+    def is_shadow_refresh_running(self) -> bool:
+        """Checks if a shadow refresh holds the lock, during which the live fixture collections must not be
+        written as the swap would lose the writes.
+
+        Returns:
+            bool: True if a refresh is running.
+        """
+        running = (
+            self.get_db().refresh_locks.find_one(
+                {"_id": "fixtures", "expires_at": {"$gt": datetime.datetime.now()}}
+            )
+            is not None
+        )
+        self.logger.debug(f"RETURNED: {running}")
+        return running
+
+    def start_crawl_job(self, name: str, total: int) -> dict:
+        """Starts a crawl job, or resumes the last one of the same name if it never finished.
+
+        Args:
+            name (str): Name of the crawl job, the spider name
+            total (int): number of pages the crawl has to record
+
+        Returns:
+            dict: crawl_jobs document of the job
+        """
+        db = self.get_db()
+        now = datetime.datetime.now()
+        job = db.crawl_jobs.find_one(
+            filter={"name": name, "status": "running"}, sort=[("started_at", -1)]
+        )
+        if job is None:
+            job = {
+                "name": name,
+                "status": "running",
+                "started_at": now,
+                "resumed_at": now,
+                "done_at_resume": 0,
+                "total": total,
+            }
+            job["_id"] = db.crawl_jobs.insert_one(job).inserted_id
+            self.logger.info(f"Started {name} crawl job of {total} pages.")
+        else:
+            job["resumed_at"] = now
+            job["done_at_resume"] = len(self.get_completed_pages(job["started_at"]))
+            job["total"] = total
+            db.crawl_jobs.update_one(
+                {"_id": job["_id"]},
+                {
+                    "$set": {
+                        "resumed_at": now,
+                        "done_at_resume": job["done_at_resume"],
+                        "total": total,
+                    }
+                },
+            )
+            self.logger.info(
+                f"Resumed {name} crawl job started at {job['started_at']} with {job['done_at_resume']} of {total} pages done."
+            )
+        self.logger.debug(f"RETURNED: {job}")
+        return job
+
+    def get_completed_pages(self, since: datetime.datetime) -> set:
+        """Fetches the fixture pages recorded since a time, as their hash is written after their fixtures.
+
+        Args:
+            since (datetime.datetime): start of the crawl job
+
+        Returns:
+            set: {(page, name, season)}
+        """
+        db = self.get_db()
+        completed = {
+            (doc["page"], doc["name"], doc["season"])
+            for doc in db.fixture_pages.find(
+                filter={"crawled_at": {"$gte": since}},
+                projection={"_id": False, "page": True, "name": True, "season": True},
+            )
+        }
+        self.logger.info(f"Returned {len(completed)} pages recorded since {since}.")
+        return completed
+
+    def finish_crawl_job(self, job: dict):
+        """Marks a crawl job as finished, so that the next crawl starts a new one.
+
+        Args:
+            job (dict): crawl_jobs document of the job
+        """
+        db = self.get_db()
+        db.crawl_jobs.update_one(
+            {"_id": job["_id"]},
+            {"$set": {"status": "finished", "finished_at": datetime.datetime.now()}},
+        )
+        self.logger.info(f"Finished {job['name']} crawl job.")
+
+    def get_crawl_job_progress(self, name: str) -> dict:
+        """Computes the completion and the ETA of the last crawl job of a name from the recorded pages.
+
+        Args:
+            name (str): Name of the crawl job
+
+        Returns:
+            dict: {name, status, started_at, total, done, percent, pages_per_minute, eta}, None if there is no job
+        """
+        db = self.get_db()
+        job = db.crawl_jobs.find_one(filter={"name": name}, sort=[("started_at", -1)])
+        if job is None:
+            return None
+        done = db.fixture_pages.count_documents(
+            {"crawled_at": {"$gte": job["started_at"]}}
+        )
+        end = job.get("finished_at", datetime.datetime.now())
+        minutes = (end - job["resumed_at"]).total_seconds() / 60
+        rate = (done - job["done_at_resume"]) / minutes if minutes > 0 else 0
+        progress = {
+            "name": name,
+            "status": job["status"],
+            "started_at": job["started_at"],
+            "total": job["total"],
+            "done": done,
+            "percent": 100 * done / job["total"] if job["total"] > 0 else 100,
+            "pages_per_minute": rate,
+            "eta": (
+                datetime.datetime.now()
+                + datetime.timedelta(minutes=(job["total"] - done) / rate)
+                if job["status"] == "running" and rate > 0
+                else None
+            ),
+        }
+        self.logger.debug(f"RETURNED: {progress}")
+        return progress
+
+    def publish_fixture_tasks(self) -> int:
+        """Publishes the fixture pages of all the clubs in all seasons as tasks of the frontier collection.
+
+        Tasks already published are left as they are, so publishing again only adds the new pages.
+
+        Returns:
+            int: number of tasks added
+        """
+        write_reqs = [
+            pymongo.UpdateOne(
+                filter={
+                    "page": "club",
+                    "name": fixture["team"],
+                    "season": fixture["season"],
+                },
+                update={
+                    "$setOnInsert": {
+                        "league": league,
+                        "url": fixture["url"],
+                        "status": "pending",
+                        "attempts": 0,
+                    }
+                },
+                upsert=True,
+            )
+            for league, fixtures in self.get_all_club_all_season_fixture_urls().items()
+            for fixture in fixtures
+        ]
+        added = (
+            self.get_db().frontier.bulk_write(write_reqs, ordered=False).upserted_count
+            if len(write_reqs) > 0
+            else 0
+        )
+        self.logger.info(f"Published {added} new fixture tasks of {len(write_reqs)}.")
+        return added
+
+    def claim_fixture_task(
+        self, worker: str, lease: datetime.timedelta, max_attempts: int
+    ) -> dict:
+        """Claims a pending task of the frontier, or one whose lease expired because its worker died.
+
+        Args:
+            worker (str): id of the worker claiming the task
+            lease (datetime.timedelta): time the task is reserved for the worker
+            max_attempts (int): claims after which a failing task is given up
+
+        Returns:
+            dict: frontier document of the task, None if there is no task to claim
+        """
+        now = datetime.datetime.now()
+        task = self.get_db().frontier.find_one_and_update(
+            filter={
+                "$or": [
+                    {"status": "pending"},
+                    {"status": "leased", "lease_until": {"$lt": now}},
+                ],
+                "attempts": {"$lt": max_attempts},
+            },
+            update={
+                "$set": {
+                    "status": "leased",
+                    "lease_until": now + lease,
+                    "claimed_at": now,
+                    "worker": worker,
+                },
+                "$inc": {"attempts": 1},
+            },
+            return_document=pymongo.ReturnDocument.AFTER,
+        )
+        self.logger.debug(f"RETURNED: {task}")
+        return task
+
+    def get_ack_fixture_task_write_reqs(self, task_id) -> dict:
+        """Builds the write acknowledging a task, staged after the writes of its page.
+
+        Args:
+            task_id (ObjectId): _id of the task
+
+        Returns:
+            dict: {collection_name: [write requests]}
+        """
+        return {
+            "frontier": [
+                pymongo.UpdateOne(
+                    filter={"_id": task_id},
+                    update={
+                        "$set": {"status": "done", "done_at": datetime.datetime.now()},
+                        "$unset": {"lease_until": ""},
+                    },
+                )
+            ]
+        }
+
+    def renew_fixture_task_leases(
+        self, worker: str, task_ids: list, lease: datetime.timedelta
+    ) -> int:
+        """Extends the leases of the tasks a worker is still crawling, so no other worker claims them meanwhile.
+
+        Args:
+            worker (str): id of the worker holding the leases
+            task_ids (list): _id of the tasks
+            lease (datetime.timedelta): time the tasks are reserved for the worker from now
+
+        Returns:
+            int: number of leases renewed
+        """
+        if len(task_ids) == 0:
+            return 0
+        return (
+            self.get_db()
+            .frontier.update_many(
+                filter={"_id": {"$in": task_ids}, "status": "leased", "worker": worker},
+                update={"$set": {"lease_until": datetime.datetime.now() + lease}},
+            )
+            .modified_count
+        )
+
+    def ack_recorded_fixture_tasks(self, worker: str) -> int:
+        """Acknowledges the tasks leased by a worker whose page was recorded after they were claimed.
+
+        The ack staged after the writes of a page is dropped by the pipeline once it keeps failing, even when the
+        page itself was written. The page hash written with the fixtures is the durable record of the page, so
+        the task is acknowledged from it instead of being crawled again once its lease expires.
+
+        Args:
+            worker (str): id of the worker holding the leases
+
+        Returns:
+            int: number of tasks acknowledged
+        """
+        db = self.get_db()
+        done = [
+            task["_id"]
+            for task in db.frontier.find(
+                filter={"status": "leased", "worker": worker},
+                projection={
+                    "page": True,
+                    "name": True,
+                    "season": True,
+                    "claimed_at": True,
+                },
+            )
+            if db.fixture_pages.count_documents(
+                {
+                    "page": task["page"],
+                    "name": task["name"],
+                    "season": task["season"],
+                    "crawled_at": {"$gte": task["claimed_at"]},
+                },
+                limit=1,
+            )
+            > 0
+        ]
+        if len(done) == 0:
+            return 0
+        acknowledged = db.frontier.update_many(
+            filter={"_id": {"$in": done}, "status": "leased", "worker": worker},
+            update={
+                "$set": {"status": "done", "done_at": datetime.datetime.now()},
+                "$unset": {"lease_until": ""},
+            },
+        ).modified_count
+        self.logger.info(f"Acknowledged {acknowledged} tasks of recorded pages.")
+        return acknowledged
+
+    def fail_fixture_task(self, task_id, worker: str, abandon: bool, error: str):
+        """Releases a task whose page couldn't be fetched, giving it up once it is out of attempts.
+
+        Args:
+            task_id (ObjectId): _id of the task
+            worker (str): id of the worker holding the lease
+            abandon (bool): whether the task is out of attempts
+            error (str): error of the last attempt, kept on the task
+        """
+        now = datetime.datetime.now()
+        update: dict = {"status": "pending", "last_error": error}
+        if abandon:
+            update.update(status="abandoned", abandoned_at=now)
+        self.get_db().frontier.update_one(
+            filter={"_id": task_id, "status": "leased", "worker": worker},
+            update={"$set": update, "$unset": {"lease_until": ""}},
+        )
+
+    def abandon_fixture_tasks(self, max_attempts: int) -> int:
+        """Gives up the tasks whose lease expired on their last attempt, as no worker can claim them any more.
+
+        They are kept in the frontier with the abandoned status, as a record of the pages that were never crawled.
+
+        Args:
+            max_attempts (int): claims after which a failing task is given up
+
+        Returns:
+            int: number of tasks abandoned
+        """
+        now = datetime.datetime.now()
+        abandoned = (
+            self.get_db()
+            .frontier.update_many(
+                filter={
+                    "status": "leased",
+                    "lease_until": {"$lt": now},
+                    "attempts": {"$gte": max_attempts},
+                },
+                update={
+                    "$set": {"status": "abandoned", "abandoned_at": now},
+                    "$unset": {"lease_until": ""},
+                },
+            )
+            .modified_count
+        )
+        if abandoned > 0:
+            self.logger.warning(f"Abandoned {abandoned} tasks out of attempts.")
+        return abandoned
+
+    def retry_abandoned_fixture_tasks(self) -> int:
+        """Puts the abandoned tasks back into the frontier with their attempts reset.
+
+        Returns:
+            int: number of tasks put back
+        """
+        retried = (
+            self.get_db()
+            .frontier.update_many(
+                filter={"status": "abandoned"},
+                update={
+                    "$set": {"status": "pending", "attempts": 0},
+                    "$unset": {"abandoned_at": ""},
+                },
+            )
+            .modified_count
+        )
+        self.logger.info(f"Put {retried} abandoned tasks back into the frontier.")
+        return retried
+
+    def has_open_fixture_tasks(self, max_attempts: int) -> bool:
+        """Checks if the frontier has tasks which aren't done and can still be claimed, now or once their lease expires.
+
+        Args:
+            max_attempts (int): claims after which a failing task is given up
+
+        Returns:
+            bool: True if there are open tasks else False.
+        """
+        return (
+            self.get_db().frontier.count_documents(
+                {
+                    "status": {"$nin": ["done", "abandoned"]},
+                    "attempts": {"$lt": max_attempts},
+                },
+                limit=1,
+            )
+            > 0
+        )
+
+    def get_frontier_status(self) -> dict:
+        """Counts the tasks of the frontier by status.
+
+        Returns:
+            dict: {status: number of tasks}
+        """
+        status = {
+            doc["_id"]: doc["count"]
+            for doc in self.get_db().frontier.aggregate(
+                [{"$group": {"_id": "$status", "count": {"$sum": 1}}}]
+            )
+        }
+        self.logger.debug(f"RETURNED: {status}")
+        return status
+
+    def delete_past_upcoming_matches(self):
+        """Deletes the upcoming matches dated before today, which have been played or were moved to another date.
+
+        The pages of their clubs are re-scraped by the refresh, which records the played matches again.
+        """
+        db = self.get_db()
+        today = datetime.datetime.combine(datetime.date.today(), datetime.time())
+        deleted = (
+            db[self.refresh_collections.get("matches", "matches")]
+            .delete_many({"status": "UPCOMING", "date": {"$lt": today}})
+            .deleted_count
+        )
+        self.logger.info(f"Deleted {deleted} upcoming matches dated before today.")
+
+    def get_fixture_refresh_plan(self, staleness: datetime.timedelta) -> dict:
+        """Selects the clubs whose current season page has to be scraped again.
+
+        A club is selected if one of its upcoming fixtures kicked off between the last crawl of its page and now,
+        or if its page was last crawled longer ago than staleness, or never.
+
+        Args:
+            staleness (datetime.timedelta): age after which a page is scraped again even without a kickoff
+
+        Returns:
+            dict: {league_name: [club_name]}
+        """
+        db = self.get_db()
+        resolver = self.get_resolver()
+        now = datetime.datetime.now()
+        # {season: [club_name]} of the current season of every league
+        season_clubs: dict = {}
+        selected_leagues = self.get_selected_leagues()
+        for league, seasons in selected_leagues.items():
+            current_season = resolver.get_league_current_season(league)
+            season_clubs.setdefault(current_season, []).extend(
+                seasons.get(current_season, [])
+            )
+        crawled_at: dict = {}
+        last_kickoffs: dict = {}
+        for season, clubs in season_clubs.items():
+            for doc in db.fixture_pages.find(
+                filter={"page": "club", "season": season, "name": {"$in": clubs}},
+                projection={"_id": False, "name": True, "crawled_at": True},
+            ):
+                crawled_at[(doc["name"], season)] = doc["crawled_at"]
+            # latest kickoff of each club that was still upcoming at its last crawl and has passed since
+            for doc in db.upcoming_fixtures.aggregate(
+                [
+                    {"$match": {"club": {"$in": clubs}}},
+                    {
+                        "$project": {
+                            "_id": False,
+                            "club": True,
+                            "comps": {
+                                "$objectToArray": {
+                                    "$ifNull": [f"$seasons.{season}", {}]
+                                }
+                            },
+                        }
+                    },
+                    {"$unwind": "$comps"},
+                    {"$unwind": "$comps.v"},
+                    {"$match": {"comps.v.date": {"$lte": now}}},
+                    {
+                        "$group": {
+                            "_id": "$club",
+                            "last_kickoff": {"$max": "$comps.v.date"},
+                        }
+                    },
+                ]
+            ):
+                last_kickoffs[(doc["_id"], season)] = doc["last_kickoff"]
+        plan: dict = {}
+        for league, seasons in selected_leagues.items():
+            current_season = resolver.get_league_current_season(league)
+            for club in seasons.get(current_season, []):
+                last_crawl = crawled_at.get((club, current_season))
+                last_kickoff = last_kickoffs.get((club, current_season))
+                if (
+                    last_crawl is None
+                    or last_crawl < now - staleness
+                    or (last_kickoff is not None and last_kickoff > last_crawl)
+                ):
+                    plan.setdefault(league, []).append(club)
+        self.logger.debug(f"RETURNED: {plan}")
+        self.logger.info(
+            f"Planned the refresh of {sum([len(clubs) for clubs in plan.values()])} clubs."
+        )
+        return plan
+
+    def get_planned_club_current_season_urls(self, plan: dict) -> dict:
+        """Fetches the current season urls of the clubs selected by the refresh plan.
+
+        Args:
+            plan (dict): {league_name: [club_name]}
+
+        Returns:
+            dict: {league_name:[{'team':club_name, season: season_start_year 'url':club_fixture_url}]}
+        """
+        resolver = self.get_resolver()
+        urls = {
+            league: [
+                {
+                    "team": club,
+                    "season": resolver.get_league_current_season(league),
+                    "url": self.get_club_fixture_url(
+                        club, resolver.get_league_current_season(league)
+                    ),
+                }
+                for club in clubs
+            ]
+            for league, clubs in plan.items()
+        }
+        self.logger.debug(f"RETURNED: {urls}")
+        self.logger.info("Returned the urls of the clubs planned for refresh.")
+        return urls
+
+    def touch_fixture_pages(self, pages: list):
+        """Records the crawl of the pages skipped because their fixture table was unchanged.
+
+        Args:
+            pages (list): [(page, name, season)]
+        """
+        if len(pages) == 0:
+            return
+        now = datetime.datetime.now()
+        self.bulk_write_reqs(
+            {
+                self.refresh_collections.get("fixture_pages", "fixture_pages"): [
+                    pymongo.UpdateOne(
+                        filter={"page": page, "name": name, "season": season},
+                        update={"$set": {"crawled_at": now}},
+                    )
+                    for page, name, season in pages
+                ]
+            },
+            ordered=False,
+        )
+        self.logger.info(f"Recorded the crawl of {len(pages)} unchanged fixture pages.")
+
 
 class Injuries(BaseClass):
     def __init__(self):
@@ -1378,7 +3459,8 @@ class Injuries(BaseClass):
                 for comp_name, fixtures in season_info.items():
                     # UCL, [fixtures]
                     for fixture in fixtures:
-                        date = fixture["date"]
+                        # injuries are keyed by the day of the fixture
+                        date = str(fixture["date"].date())
                         if not self.check_if_fixture_injuries_parsed(team_name, date):
                             missing_injuries_played.append(
                                 {"club": team_name, "date": date}
@@ -0,0 +1,270 @@
+import os
+import datetime
+import pymongo
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure
+from .classes import BaseClass
+
+
+# indexes required by the queries of the spiders, {collection_name: [index models]}
+INDEXES: dict = {
+    "competitions": [
+        IndexModel(
+            [("country", pymongo.ASCENDING)],
+            name="country",
+            unique=True,
+            # documents with only a country code are completed later by CountryCodes
+            partialFilterExpression={"country": {"$exists": True}},
+        ),
+        IndexModel(
+            [("competitions.First Tier.name", pymongo.ASCENDING)],
+            name="first_tier_name",
+        ),
+    ],
+    "all_clubs": [
+        IndexModel([("name", pymongo.ASCENDING)], name="name", unique=True),
+    ],
+    "all_leagues": [
+        IndexModel([("name", pymongo.ASCENDING)], name="name", unique=True),
+        # clubs are stored under clubs.<season>, so every season needs to be covered
+        IndexModel([("clubs.$**", pymongo.ASCENDING)], name="clubs_seasons"),
+    ],
+    "played_fixtures": [
+        IndexModel([("club", pymongo.ASCENDING)], name="club", unique=True),
+    ],
+    "upcoming_fixtures": [
+        IndexModel([("club", pymongo.ASCENDING)], name="club", unique=True),
+    ],
+    "injuries": [
+        IndexModel([("club", pymongo.ASCENDING)], name="club"),
+    ],
+    "fixture_pages": [
+        IndexModel(
+            [
+                ("page", pymongo.ASCENDING),
+                ("name", pymongo.ASCENDING),
+                ("season", pymongo.ASCENDING),
+            ],
+            name="page_name_season",
+            unique=True,
+        ),
+        # pages recorded since the start of a crawl job
+        IndexModel([("crawled_at", pymongo.ASCENDING)], name="crawled_at"),
+    ],
+    "frontier": [
+        IndexModel(
+            [
+                ("page", pymongo.ASCENDING),
+                ("name", pymongo.ASCENDING),
+                ("season", pymongo.ASCENDING),
+            ],
+            name="page_name_season",
+            unique=True,
+        ),
+        # tasks to claim, pending or with an expired lease
+        IndexModel(
+            [("status", pymongo.ASCENDING), ("lease_until", pymongo.ASCENDING)],
+            name="status_lease_until",
+        ),
+    ],
+    "crawl_jobs": [
+        IndexModel(
+            [
+                ("name", pymongo.ASCENDING),
+                ("status", pymongo.ASCENDING),
+                ("started_at", pymongo.DESCENDING),
+            ],
+            name="name_status_started_at",
+        ),
+    ],
+    "matches": [
+        # natural key of a match, on its calendar date
+        IndexModel(
+            [
+                ("date", pymongo.ASCENDING),
+                ("home_club", pymongo.ASCENDING),
+                ("away_club", pymongo.ASCENDING),
+                ("competition", pymongo.ASCENDING),
+            ],
+            name="match_key",
+            unique=True,
+        ),
+        IndexModel(
+            [
+                ("clubs", pymongo.ASCENDING),
+                ("season", pymongo.ASCENDING),
+                ("date", pymongo.ASCENDING),
+            ],
+            name="clubs_season_date",
+        ),
+        # date range queries of a club across seasons, e.g. its matches of the last 30 days
+        IndexModel(
+            [("clubs", pymongo.ASCENDING), ("date", pymongo.ASCENDING)],
+            name="clubs_date",
+        ),
+        # date range queries over every club, e.g. the upcoming matches of the next week
+        IndexModel(
+            [("status", pymongo.ASCENDING), ("date", pymongo.ASCENDING)],
+            name="status_date",
+        ),
+    ],
+}
+
+# frequent queries of the spiders whose plans are checked by the index report, {collection_name: [filter]}
+HOT_QUERIES: dict = {
+    "competitions": [
+        {"country": "England"},
+        {"competitions.First Tier.name": "Premier League"},
+    ],
+    "all_clubs": [{"name": "Arsenal FC"}],
+    "all_leagues": [{"name": "Premier League"}, {"clubs.2023": "Arsenal FC"}],
+    "played_fixtures": [{"club": "Arsenal FC"}],
+    "upcoming_fixtures": [{"club": "Arsenal FC"}],
+    "injuries": [{"club": "Arsenal FC"}],
+    "fixture_pages": [{"page": "club", "name": "Arsenal FC", "season": "2023"}],
+    "matches": [
+        {"clubs": "Arsenal FC", "season": "2023"},
+        {"clubs": "Arsenal FC", "date": {"$gte": datetime.datetime(2024, 1, 1)}},
+        {"status": "UPCOMING", "date": {"$lt": datetime.datetime(2024, 1, 1)}},
+    ],
+}
+
+
+# class for creating and checking the indexes of the database
+class Indexes(BaseClass):
+    # indexes are only created once per process, however many spiders are started
+    _ensured: bool = False
+
+    def __init__(self):
+        super().__init__()
+        self.LOG_FILE = os.path.join(self.LOG_DIR, "indexes.log")
+        self.set_logger("indexes", self.LOG_FILE)
+
+    @classmethod
+    def ensure_indexes_once(cls) -> dict:
+        """Creates the missing indexes on the first call of the process; the later calls don't build an object,
+        which would truncate the log of the indexes and query the seasons again.
+
+        Returns:
+            dict: {collection_name: [names of the indexes present]}, empty after the first call
+        """
+        if cls._ensured:
+            return {}
+        return cls().ensure_indexes()
+
+    def ensure_indexes(self) -> dict:
+        """Creates the indexes of the registry that are missing; existing indexes are left untouched.
+
+        Returns:
+            dict: {collection_name: [names of the indexes present]}
+        """
+        if Indexes._ensured:
+            return {}
+        db = self.get_db()
+        ensured: dict = {}
+        for col, indexes in INDEXES.items():
+            try:
+                ensured[col] = db[col].create_indexes(indexes)
+            except OperationFailure as e:
+                # e.g. duplicate values for a unique index or an index of the same name with other options
+                self.logger.error(f"Could not create indexes of {col}: {e}")
+        Indexes._ensured = True
+        self.logger.debug(f"RETURNED: {ensured}")
+        self.logger.info("Ensured the indexes of all the collections.")
+        return ensured
+
+    def get_index_stats(self, col: str) -> dict:
+        """Returns the usage of every index of a collection since the server started.
+
+        Args:
+            col (str): collection name
+
+        Returns:
+            dict: {index_name: number of operations that used the index}
+        """
+        db = self.get_db()
+        index_stats = {
+            doc["name"]: doc["accesses"]["ops"]
+            for doc in db[col].aggregate([{"$indexStats": {}}])
+        }
+        self.logger.debug(f"RETURNED: {index_stats}")
+        self.logger.info(f"Returned the index stats of {col}.")
+        return index_stats
+
+    def get_plan_stages(self, plan: dict) -> list[str]:
+        """Flattens a query plan from explain into its stages.
+
+        Args:
+            plan (dict): winning plan of an explain output
+
+        Returns:
+            list[str]: stages such as "IXSCAN(name)" or "COLLSCAN", from the root to the leaves
+        """
+        stage = plan.get("stage", "")
+        if "indexName" in plan:
+            stage = f"{stage}({plan['indexName']})"
+        stages = [stage]
+        children = plan.get("inputStages", [])
+        if "inputStage" in plan:
+            children = [plan["inputStage"]]
+        for child in children:
+            stages += self.get_plan_stages(child)
+        return stages
+
+    def explain_query(self, col: str, query: dict) -> list[str]:
+        """Explains a query and returns the stages of its winning plan.
+
+        Args:
+            col (str): collection name
+            query (dict): filter of the query
+
+        Returns:
+            list[str]: stages of the winning plan
+        """
+        db = self.get_db()
+        explain = db[col].find(query).explain()
+        planner = explain["queryPlanner"]
+        # find queries run by the slot based engine nest the plan under queryPlan
+        winning_plan = planner["winningPlan"].get("queryPlan", planner["winningPlan"])
+        stages = self.get_plan_stages(winning_plan)
+        self.logger.debug(f"RETURNED: {stages}")
+        self.logger.info(f"Explained {query} on {col}.")
+        return stages
+
+    def get_index_report(self) -> dict:
+        """Reports the missing, unused and undeclared indexes as well as the plans of the hot queries.
+
+        Returns:
+            dict: {collection_name: {missing: [], unused: [], undeclared: [], queries: [{query, stages, collscan}]}}
+        """
+        report: dict = {}
+        for col, indexes in INDEXES.items():
+            declared = [index.document["name"] for index in indexes]
+            index_stats = self.get_index_stats(col)
+            queries = []
+            for query in HOT_QUERIES.get(col, []):
+                stages = self.explain_query(col, query)
+                queries.append(
+                    {
+                        "query": query,
+                        "stages": stages,
+                        "collscan": "COLLSCAN" in stages,
+                    }
+                )
+            report[col] = {
+                "missing": [name for name in declared if name not in index_stats],
+                "unused": [
+                    name
+                    for name, ops in index_stats.items()
+                    if ops == 0 and not name == "_id_"
+                ],
+                "undeclared": [
+                    name
+                    for name in index_stats
+                    if name not in declared and not name == "_id_"
+                ],
+                "queries": queries,
+            }
+        self.logger.debug(f"RETURNED: {report}")
+        self.logger.info("Returned the index report.")
+        return report
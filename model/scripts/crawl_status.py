@@ -0,0 +1,24 @@
+import os
+import sys
+from pprint import pp
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../scraper")))
+
+from scraper.spiders.spider_utils.classes import Fixtures
+
+
+def report_crawl_status():
+    """Prints the completion and the ETA of the last crawl job of the spiders named, fixture by default"""
+    fixtures = Fixtures()
+    names = sys.argv[1:] if len(sys.argv) > 1 else ["fixture"]
+    for name in names:
+        progress = fixtures.get_crawl_job_progress(name)
+        if progress is None:
+            print(f"No {name} crawl job found.")
+            continue
+        pp(progress)
+    Fixtures.close_client()
+
+
+if __name__ == "__main__":
+    report_crawl_status()
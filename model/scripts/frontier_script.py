@@ -0,0 +1,96 @@
+import argparse
+import os
+import subprocess
+import sys
+from pprint import pp
+
+SCRAPER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../scraper"))
+sys.path.append(SCRAPER_DIR)
+
+from scraper.spiders.spider_utils.classes import Fixtures
+
+
+def publish_tasks(args):
+    """Publishes the fixture pages of all the clubs in all seasons, or of the selected ones, into the frontier"""
+    fixtures = Fixtures()
+    selection = {
+        option: getattr(args, option)
+        for option in ["countries", "leagues", "seasons", "clubs"]
+        if getattr(args, option) is not None
+    }
+    if len(selection) > 0:
+        fixtures.select(**selection)
+    added = fixtures.publish_fixture_tasks()
+    print(f"Published {added} new tasks.")
+    pp(fixtures.get_frontier_status())
+
+
+def run_workers(args):
+    """Starts fixture_worker processes on this machine and waits for all of them to stop"""
+    workers = [
+        subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "scrapy",
+                "crawl",
+                "fixture_worker",
+                "-a",
+                f"lease_seconds={args.lease_seconds}",
+                "-a",
+                f"max_attempts={args.max_attempts}",
+            ],
+            cwd=SCRAPER_DIR,
+        )
+        for _ in range(args.workers)
+    ]
+    exit_codes = [worker.wait() for worker in workers]
+    print(f"Workers stopped with exit codes {exit_codes}.")
+    pp(Fixtures().get_frontier_status())
+    if any([not code == 0 for code in exit_codes]):
+        sys.exit(1)
+
+
+def print_status(args):
+    """Prints the number of tasks of the frontier by status"""
+    pp(Fixtures().get_frontier_status())
+
+
+def retry_tasks(args):
+    """Puts the abandoned tasks back into the frontier"""
+    fixtures = Fixtures()
+    retried = fixtures.retry_abandoned_fixture_tasks()
+    print(f"Put {retried} abandoned tasks back.")
+    pp(fixtures.get_frontier_status())
+
+
+def run_frontier():
+    """Publishes fixture tasks, runs fixture workers or reports the frontier"""
+    parser = argparse.ArgumentParser(
+        description="Crawls the fixtures with workers sharing a frontier collection."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    publish = commands.add_parser("publish", help="publish the fixture pages as tasks")
+    for option in ["countries", "leagues", "seasons", "clubs"]:
+        publish.add_argument(
+            f"--{option}", nargs="+", help=f"only publish the pages of these {option}"
+        )
+    publish.set_defaults(run=publish_tasks)
+    work = commands.add_parser("work", help="run fixture workers on this machine")
+    work.add_argument("-n", "--workers", type=int, default=os.cpu_count())
+    work.add_argument("--lease-seconds", type=int, default=300)
+    work.add_argument("--max-attempts", type=int, default=3)
+    work.set_defaults(run=run_workers)
+    commands.add_parser("status", help="count the tasks by status").set_defaults(
+        run=print_status
+    )
+    commands.add_parser(
+        "retry", help="put the abandoned tasks back into the frontier"
+    ).set_defaults(run=retry_tasks)
+    args = parser.parse_args()
+    args.run(args)
+    Fixtures.close_client()
+
+
+if __name__ == "__main__":
+    run_frontier()
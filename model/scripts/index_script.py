@@ -0,0 +1,20 @@
+import os
+import sys
+from pprint import pp
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../scraper")))
+
+from scraper.spiders.spider_utils.indexes import Indexes
+
+
+def report_indexes():
+    """Creates the missing indexes if asked to, then prints the index report"""
+    indexes = Indexes()
+    if "--create" in sys.argv[1:]:
+        indexes.ensure_indexes()
+    pp(indexes.get_index_report())
+    Indexes.close_client()
+
+
+if __name__ == "__main__":
+    report_indexes()
@@ -0,0 +1,49 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../scraper")))
+
+from scraper.spiders.spider_utils.classes import BaseClass, Fixtures
+
+
+def migrate_matches():
+    """Copies the fixtures stored per club into the matches collection"""
+    sent = Fixtures().migrate_fixtures_to_matches()
+    print(f"Sent {sent} match upserts.")
+
+
+def migrate_typed_fixtures():
+    """Converts the string dates, goals and ranks of the stored fixtures into typed fields"""
+    updated = Fixtures().migrate_fixtures_to_typed()
+    print(f"Updated {updated} documents.")
+
+
+def migrate_match_dates():
+    """Keys the stored matches on their calendar date instead of their kickoff"""
+    sent = Fixtures().migrate_match_dates()
+    print(f"Sent {sent} match writes.")
+
+
+MIGRATIONS = {
+    "matches": migrate_matches,
+    "typed_fixtures": migrate_typed_fixtures,
+    "match_dates": migrate_match_dates,
+}
+
+
+def run_migrations():
+    """Runs the migrations named on the command line, or all of them in order"""
+    names = sys.argv[1:] if len(sys.argv) > 1 else list(MIGRATIONS.keys())
+    for name in names:
+        if name not in MIGRATIONS:
+            sys.exit(
+                f"Unknown migration {name}, choose from {list(MIGRATIONS.keys())}."
+            )
+    for name in names:
+        print(f"Running migration {name}.")
+        MIGRATIONS[name]()
+    BaseClass.close_client()
+
+
+if __name__ == "__main__":
+    run_migrations()
@@ -0,0 +1,193 @@
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../scraper")))
+os.environ.setdefault("SCRAPY_SETTINGS_MODULE", "scraper.settings")
+
+from scrapy.http import HtmlResponse
+from scrapy.utils.project import get_project_settings
+
+from scraper.archive import PageArchive
+from scraper.spiders.spider_utils.classes import (
+    BaseClass,
+    ClubNames,
+    CompetitionNames,
+    CountryCodes,
+    Fixtures,
+    UnitOfWork,
+)
+
+
+def get_reparsers() -> list:
+    """Returns the archived callbacks that can be replayed, in the order of the crawl stages
+
+    The pages of a stage write the data the pages of the next stages are resolved against, so a stage is
+    written before the next one is replayed. The functions are called with the response, the callback arguments
+    of the page and the reference_date it was fetched on, which decides whether a fixture was played or upcoming.
+
+    Returns:
+        list: [(spider_name, callback_name, function returning the write requests of a response)]
+    """
+    country_codes = CountryCodes()
+    comp_names = CompetitionNames()
+    club_names = ClubNames()
+    fixtures = Fixtures()
+    # a replayed page replaces the season of its club, so the changed parsing reaches the stored fixtures
+    fixtures.replace_seasons = True
+
+    def club_fixtures(
+        response, team, season, skip_competitions=None, reference_date=None, **kwargs
+    ):
+        fixture_info = fixtures.parse_all_fixtures_info(
+            response, team, season, skip_competitions, reference_date
+        )
+        return fixtures.get_fixture_write_reqs(fixture_info)
+
+    return [
+        (
+            "country_code",
+            "parse",
+            lambda response, **kwargs: country_codes.get_write_reqs(
+                country_codes.parse_country_codes(response)
+            ),
+        ),
+        (
+            "comp_name",
+            "parse_domestic_comp",
+            lambda response, country, **kwargs: comp_names.get_write_reqs(
+                comp_names.parse_domestic_comp_names(response, country)
+            ),
+        ),
+        (
+            "comp_name",
+            "parse_intl_comp",
+            lambda response, **kwargs: comp_names.get_write_reqs(
+                comp_names.parse_intl_comp_names(response)
+            ),
+        ),
+        (
+            "comp_name",
+            "update_current_season",
+            lambda response, country, **kwargs: comp_names.get_current_season_write_reqs(
+                country, comp_names.parse_current_season(response)
+            ),
+        ),
+        (
+            "club_name",
+            "parse",
+            lambda response, league, season, **kwargs: club_names.get_write_reqs(
+                club_names.parse_club_names(response, league, season)
+            ),
+        ),
+        (
+            "fixture",
+            "parse_schedule",
+            lambda response, league, season, reference_date=None, **kwargs: fixtures.get_league_schedule_write_reqs(
+                fixtures.parse_league_schedule(response, league, season, reference_date)
+            ),
+        ),
+        ("fixture", "parse", club_fixtures),
+        ("fixture_worker", "parse_task", club_fixtures),
+        ("club_name", "parse_fixtures", club_fixtures),
+        (
+            "club_name",
+            "parse_schedule",
+            lambda response, league, season, reference_date=None, **kwargs: fixtures.get_league_schedule_write_reqs(
+                fixtures.parse_league_schedule(response, league, season, reference_date)
+            ),
+        ),
+    ]
+
+
+def replay(archive: PageArchive, spider: str, callback: str, reparser, args) -> dict:
+    """Replays the archived pages of a callback and writes what they parse into, batch_ops operations at a time
+
+    Args:
+        archive (PageArchive): opened archive
+        spider (str): name of the spider the pages were fetched by
+        callback (str): name of the callback the pages were fetched for
+        reparser: function returning the write requests of a response
+        args (argparse.Namespace): command line arguments
+
+    Returns:
+        dict: {pages, failed, ops}
+    """
+    logger = logging.getLogger("reparse_script")
+    counts = {"pages": 0, "failed": 0, "ops": 0}
+    writer = BaseClass()
+    uow = UnitOfWork()
+    for page in archive.iter_pages(
+        spider=spider, callback=callback, names=args.names, seasons=args.seasons
+    ):
+        response = HtmlResponse(
+            url=page["url"], body=page["body"], encoding=page["encoding"]
+        )
+        try:
+            # a fixture is played or upcoming as of the day its page was fetched, not the day it is replayed
+            uow.stage(
+                reparser(
+                    response,
+                    reference_date=page["fetched_at"].date(),
+                    **page["cb_kwargs"],
+                )
+            )
+        except Exception:
+            counts["failed"] += 1
+            logger.error(f"Failed to reparse {page['url']}.", exc_info=True)
+            continue
+        counts["pages"] += 1
+        if len(uow) >= args.batch_ops:
+            counts["ops"] += sum(writer.bulk_write_reqs(uow.write_reqs).values())
+            uow = UnitOfWork()
+    if len(uow) > 0:
+        counts["ops"] += sum(writer.bulk_write_reqs(uow.write_reqs).values())
+    return counts
+
+
+def run_reparse():
+    """Replays the archived pages through the current parsers and database writers, without the network"""
+    parser = argparse.ArgumentParser(
+        description="Reparses the archived pages into the database."
+    )
+    parser.add_argument("--spiders", nargs="+", help="only the pages of these spiders")
+    parser.add_argument(
+        "--names", nargs="+", help="only the pages of these clubs, leagues or countries"
+    )
+    parser.add_argument("--seasons", nargs="+", help="only the pages of these seasons")
+    parser.add_argument(
+        "--batch-ops",
+        type=int,
+        default=500,
+        help="write operations buffered before they are written",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if Fixtures().is_shadow_refresh_running():
+        sys.exit(
+            "A shadow refresh of the fixture collections is running, its swap would lose the replayed fixtures."
+        )
+
+    archive = PageArchive.from_settings(get_project_settings()).open()
+    print(f"Archived pages: {archive.count_pages()}")
+    started = time.monotonic()
+    for spider, callback, reparser in get_reparsers():
+        if args.spiders is not None and spider not in args.spiders:
+            continue
+        stage_started = time.monotonic()
+        counts = replay(archive, spider, callback, reparser, args)
+        if counts["pages"] + counts["failed"] == 0:
+            continue
+        print(
+            f"{spider}.{callback}: {counts['pages']} pages, {counts['failed']} failed, "
+            f"{counts['ops']} write operations in {time.monotonic() - stage_started:.1f}s"
+        )
+    print(f"Total: {time.monotonic() - started:.1f}s")
+    archive.close()
+    BaseClass.close_client()
+
+
+if __name__ == "__main__":
+    run_reparse()
@@ -1,13 +1,201 @@
-import subprocess
+import argparse
+import datetime
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../scraper")))
+os.environ.setdefault("SCRAPY_SETTINGS_MODULE", "scraper.settings")
+
+from scrapy.crawler import CrawlerRunner
+from twisted.internet import defer
+from scrapy.utils.log import configure_logging
+from scrapy.utils.project import get_project_settings
+from scrapy.utils.reactor import install_reactor
+
+# options restricting the crawl to a selection, passed to every spider as a comma separated argument
+SELECTION_OPTIONS = ["countries", "leagues", "seasons", "clubs"]
+
+# spiders of a crawl and the spiders whose data they need, {spider_name: [spider_name]}
+STAGES = {
+    "country_code": [],
+    "comp_name": ["country_code"],
+    "club_name": ["comp_name"],
+    "fixture": ["club_name"],
+    "injury": ["club_name"],
+}
+
+
+def run_stage(runner, name: str, deps: dict, results: dict, spider_kwargs: dict):
+    """Crawls a stage once the stages it depends on have finished, skipping it if one of them didn't
+
+    Args:
+        runner (CrawlerRunner): runner crawling the stages in this process
+        name (str): spider name of the stage
+        deps (dict): {spider_name: deferred} of the stages it depends on
+        results (dict): {spider_name: result}, the result of the stage is added to it
+        spider_kwargs (dict): arguments of the spider
+
+    Returns:
+        Deferred: fired once the stage has finished or was skipped
+    """
+
+    @defer.inlineCallbacks
+    def crawl():
+        yield defer.DeferredList(list(deps.values()))
+        failed_deps = [dep for dep in deps if not results[dep]["status"] == "finished"]
+        if len(failed_deps) > 0:
+            results[name] = {"status": f"skipped, {failed_deps} failed"}
+            return
+        started = time.monotonic()
+        crawler = None
+        try:
+            crawler = runner.create_crawler(name)
+            yield runner.crawl(crawler, **spider_kwargs)
+            status = crawler.stats.get_value("finish_reason")
+        except Exception as e:
+            status = f"failed, {type(e).__name__}"
+            logging.getLogger("spider_script").error(
+                f"Stage {name} failed.", exc_info=True
+            )
+        stats = (
+            {}
+            if crawler is None or crawler.stats is None
+            else crawler.stats.get_stats()
+        )
+        results[name] = {
+            "status": status,
+            "started": started,
+            "duration": time.monotonic() - started,
+            "requests": stats.get("downloader/request_count", 0),
+            "items": stats.get("item_scraped_count", 0),
+            "errors": stats.get("log_count/ERROR", 0),
+            # operations the mongo pipeline wrote, summed over the collections
+            "ops": sum(
+                [
+                    value
+                    for key, value in stats.items()
+                    if key.startswith("mongo_pipeline/ops_written/")
+                ]
+            ),
+        }
+
+    return crawl()
+
+
+def print_summary(results: dict, started: float):
+    """Prints the status, the timing and the throughput of every stage
+
+    Args:
+        results (dict): {spider_name: result}
+        started (float): monotonic time the run started at
+    """
+    print(
+        f"{'stage':<14}{'status':<36}{'start':>8}{'duration':>10}{'requests':>10}{'items':>8}{'errors':>8}"
+        f"{'ops':>8}{'req/s':>8}{'ops/s':>8}"
+    )
+    for name, result in results.items():
+        if "started" not in result:
+            print(f"{name:<14}{result['status']}")
+            continue
+        duration = max(result["duration"], 1e-6)
+        print(
+            f"{name:<14}{result['status']:<36}{result['started'] - started:>7.1f}s{result['duration']:>9.1f}s"
+            f"{result['requests']:>10}{result['items']:>8}{result['errors']:>8}{result['ops']:>8}"
+            f"{result['requests'] / duration:>8.1f}{result['ops'] / duration:>8.1f}"
+        )
+    print(f"Total: {time.monotonic() - started:.1f}s")
 
 
 def run_spiders():
-    """Runs command line scripts for scraping"""
-    subprocess.run(["scrapy", "crawl", "country_code"])
-    subprocess.run(["scrapy", "crawl", "comp_name"])
-    subprocess.run(["scrapy", "crawl", "club_name"])
-    subprocess.run(["scrapy", "crawl", "fixture"])
-    subprocess.run(["scrapy", "crawl", "injury"])
+    """Runs the spiders in one process, every stage starting once the stages it depends on have finished"""
+    parser = argparse.ArgumentParser(
+        description="Scrapes transfermarkt into the database."
+    )
+    parser.add_argument(
+        "stages",
+        nargs="*",
+        help=f"stages to run from {list(STAGES.keys())}, all of them by default; stages that aren't named are assumed to be done",
+    )
+    parser.add_argument(
+        "--stream-fixtures",
+        action="store_true",
+        help="request the fixtures of the clubs from club_name as soon as they are parsed, the fixture stage scrapes the rest",
+    )
+    for option in SELECTION_OPTIONS:
+        parser.add_argument(
+            f"--{option}",
+            nargs="+",
+            help=f"restrict the crawl to these {option}",
+        )
+    parser.add_argument(
+        "-s",
+        "--set",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="override a scrapy setting, such as HTTPCACHE_ENABLED=False",
+    )
+    args = parser.parse_args()
+    names = args.stages if len(args.stages) > 0 else list(STAGES.keys())
+    for name in names:
+        if name not in STAGES:
+            sys.exit(f"Unknown stage {name}, choose from {list(STAGES.keys())}.")
+
+    settings = get_project_settings()
+    # several spiders share the mongo client of the process, it is closed once all of them are done
+    settings.set("MONGODB_CLOSE_ON_SPIDER_CLOSE", False)
+    for setting in args.set:
+        if "=" not in setting:
+            sys.exit(f"Settings are overridden as NAME=VALUE, got {setting}.")
+        key, value = setting.split("=", 1)
+        settings.set(key, value, priority="cmdline")
+    install_reactor(settings["TWISTED_REACTOR"])
+    configure_logging(settings)
+    from twisted.internet import reactor
+    from scraper.spiders.spider_utils.classes import BaseClass
+
+    runner = CrawlerRunner(settings)
+    # {spider_name: arguments of the spider}
+    spider_kwargs: dict = {name: {} for name in STAGES}
+    if args.stream_fixtures:
+        spider_kwargs["club_name"]["stream_fixtures"] = "true"
+        # the fixture stage leaves out the pages club_name streamed, it still scrapes the ones it didn't
+        spider_kwargs["fixture"][
+            "skip_pages_since"
+        ] = datetime.datetime.now().isoformat()
+    for option in SELECTION_OPTIONS:
+        if getattr(args, option) is not None:
+            for kwargs in spider_kwargs.values():
+                kwargs[option] = ",".join(getattr(args, option))
+    results: dict = {}
+    started = time.monotonic()
+
+    def run_stages():
+        deferreds: dict = {}
+        # STAGES is in dependency order, so the deferreds of the dependencies already exist
+        for name in STAGES:
+            if name not in names:
+                continue
+            deferreds[name] = run_stage(
+                runner,
+                name,
+                {dep: deferreds[dep] for dep in STAGES[name] if dep in deferreds},
+                results,
+                spider_kwargs[name],
+            )
+        done = defer.DeferredList(list(deferreds.values()))
+        done.addBoth(lambda _: reactor.stop())
+
+    # started once the reactor runs, so that stages failing right away can still stop it
+    reactor.callWhenRunning(run_stages)
+    reactor.run()
+
+    BaseClass.close_client()
+    print_summary({name: results[name] for name in STAGES if name in results}, started)
+    if any([not result["status"] == "finished" for result in results.values()]):
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+
+MODEL_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(MODEL_DIR, "scraper"))
+
+from scrapy import Request
+from scrapy.http import HtmlResponse
+from scrapy.spiders import Spider
+from scrapy.statscollectors import MemoryStatsCollector
+from scrapy.utils.test import get_crawler
+
+from scraper.archive import ArchiveMiddleware, PageArchive
+
+URL = "https://www.transfermarkt.com/fc-arsenal/spielplandatum/verein/11/plus/0?saison_id=2019"
+
+
+def test_cache_hits_are_not_archived_again(tmp_path):
+    spider = Spider(name="fixture")
+    stats = MemoryStatsCollector(get_crawler(Spider))
+    archive = PageArchive(str(tmp_path), codec="gzip").open()
+    middleware = ArchiveMiddleware(archive, stats)
+    request = Request(URL, cb_kwargs={"team": "Arsenal FC", "season": "2019"})
+
+    for flags in [[], ["cached"]]:
+        response = HtmlResponse(
+            URL, body=b"<html></html>", encoding="utf-8", request=request, flags=flags
+        )
+        assert middleware.process_response(request, response, spider) is response
+    pages = list(archive.iter_pages("fixture"))
+    archive.close()
+
+    assert len(pages) == 1
+    assert stats.get_value("archive/pages") == 1
+    assert stats.get_value("archive/skipped_cached") == 1
+
+
+def test_archives_share_a_directory(tmp_path):
+    archives = [
+        PageArchive(str(tmp_path), codec="gzip", busy_timeout=1.0).open()
+        for _ in range(2)
+    ]
+    started = time.monotonic()
+    for i in range(5):
+        for n, archive in enumerate(archives):
+            archive.put(
+                url=f"{URL}&page={n}-{i}",
+                spider="fixture_worker",
+                callback="parse_task",
+                cb_kwargs={"team": "Arsenal FC", "season": "2019"},
+                body=f"<html>{n}-{i}</html>".encode("utf-8"),
+                encoding="utf-8",
+            )
+    for archive in archives:
+        archive.close()
+
+    # neither crawl waited on the write lock of the other
+    assert time.monotonic() - started < 1.0
+    archive = PageArchive(str(tmp_path), codec="gzip").open()
+    assert archive.count_pages() == {("fixture_worker", "parse_task"): 10}
+    archive.close()
@@ -0,0 +1,86 @@
+import argparse
+import datetime
+import os
+import sys
+
+MODEL_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(MODEL_DIR)
+sys.path.append(os.path.join(MODEL_DIR, "scraper"))
+
+from scraper.archive import PageArchive
+from scraper.spiders.spider_utils import classes
+from scripts.reparse_script import get_reparsers, replay
+
+URL = "https://www.transfermarkt.com/fc-arsenal/spielplandatum/verein/11/plus/0?saison_id=2019"
+
+
+def get_fixture_row(n: int, date: str, result: str) -> str:
+    return (
+        f'<tr style="background-color:#fff;"><td>{n}</td><td>{date}</td><td>3:00 PM</td><td>H</td>'
+        f'<td><span class="tabellenplatz">(2.)</span></td><td></td><td><a title="Chelsea FC" href="/fc-chelsea">'
+        f'Chelsea FC</a></td><td>4-3-3</td><td>60,000</td><td><a class="ergebnis-link" href="/spielbericht">'
+        f"{result}</a></td></tr>"
+    )
+
+
+# a fixture page fetched in January 2020, with a match played before and one still to come
+BODY = (
+    '<html><body><table class="auflistung"><tbody><tr><td>Season</td></tr></tbody></table><table><tbody>'
+    '<tr><td colspan="10"><a title="Premier League" href="/premier-league"></a></td></tr>'
+    + get_fixture_row(1, "Sun. 01.12.19", '<span class="greentext">2:1 </span>')
+    + get_fixture_row(2, "Sun. 01.03.20", "<span>-:-</span>")
+    + "</tbody></table></body></html>"
+).encode("utf-8")
+
+
+def test_replay_keeps_fixtures_upcoming_as_of_the_fetch(tmp_path, monkeypatch):
+    monkeypatch.setattr(classes.BaseClass, "parse_only", True)
+    parsed: list = []
+
+    def get_fixture_write_reqs(self, fixture_info):
+        parsed.append(fixture_info)
+        return {}
+
+    monkeypatch.setattr(
+        classes.Fixtures, "get_fixture_write_reqs", get_fixture_write_reqs
+    )
+    archive = PageArchive(str(tmp_path), codec="gzip").open()
+    archive.put(
+        url=URL,
+        spider="fixture",
+        callback="parse",
+        cb_kwargs={"team": "Arsenal FC", "season": "2019"},
+        body=BODY,
+        encoding="utf-8",
+    )
+    archive.commit()
+    archive.db.execute(
+        "UPDATE pages SET fetched_at = ?",
+        (datetime.datetime(2020, 1, 15, 10).isoformat(),),
+    )
+    reparser = next(
+        function
+        for spider, callback, function in get_reparsers()
+        if (spider, callback) == ("fixture", "parse")
+    )
+
+    counts = replay(
+        archive,
+        "fixture",
+        "parse",
+        reparser,
+        argparse.Namespace(names=None, seasons=None, batch_ops=500),
+    )
+    archive.close()
+
+    assert counts["pages"] == 1 and counts["failed"] == 0
+    statuses = {
+        fixture["date"].date(): fixture["match_status"]
+        for fixture in parsed[0]["fixtures"]
+    }
+    assert statuses == {
+        datetime.date(2019, 12, 1): "PLAYED",
+        datetime.date(2020, 3, 1): "UPCOMING",
+    }
+    upcoming = parsed[0]["fixtures"][1]
+    assert upcoming["goals_scored"] is None and "result" not in upcoming